@@ -9,6 +9,10 @@ from urllib.parse import urlparse
 import requests
 from openai import OpenAI
 
+from storage import summary_cache
+
+MODEL = "gpt-4o-mini"
+
 # ---- Fallback ----
 
 def fallback_ai_summary(text: str, limit_words: int = 100) -> str:
@@ -112,6 +116,12 @@ def generate_ai_summary(
         print("[AI] ⚠️ No text provided to summarise.")
         return "No content available to summarise."
 
+    key = summary_cache.cache_key(MODEL, summary_cache.ITEM_PROMPT_VERSION, limit_words, title, text[:6000])
+    cached = summary_cache.lookup(key)
+    if cached:
+        print("[AI] ♻️ Summary served from cache")
+        return cached
+
     client = openai_client()
     if not client:
         print("[AI] ⚠️ No OpenAI client available — using fallback snippet.")
@@ -127,7 +137,7 @@ TEXT:
     try:
         print("[AI] 🧠 Sending request to OpenAI API...")
         resp = client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=MODEL,
             messages=[
                 {
                     "role": "system",
@@ -142,6 +152,8 @@ TEXT:
         words = out.split()
         if len(words) > limit_words:
             out = " ".join(words[:limit_words]) + "…"
+        summary_cache.store(key, out, model=MODEL, prompt_version=summary_cache.ITEM_PROMPT_VERSION,
+                            limit_words=limit_words)
         return out
     except Exception as e:
         print(f"[AI] ❌ OpenAI request failed: {e}")
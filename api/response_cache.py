@@ -0,0 +1,128 @@
+# api/response_cache.py
+"""
+In-process LRU/TTL cache for hot read endpoints, plus ETag helpers.
+
+Entries are keyed by route + normalised query params + org. Each entry
+remembers the data version it was computed at (storage.db.data_version:
+bumped by item upserts, the AI summary tools and risk / control writes).
+An entry from an older version is a miss, so a write invalidates all of
+them at once. No per-route invalidation rules are needed. The TTL is a
+backstop for writers that don't bump the counter.
+
+What gets cached is query results or template context, not rendered HTML:
+pages still render per request, so session-specific bits stay correct.
+The ETag is derived from the key and the version (and the user, for
+pages), so a conditional request can be answered with a 304 before any
+query runs.
+
+Settings:
+- RESPONSE_CACHE: set to 0 to disable (ETags are still sent).
+- RESPONSE_CACHE_MAX_ENTRIES: LRU size.
+- RESPONSE_CACHE_TTL: seconds an entry may be served, whatever the version.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+ENABLED = os.getenv("RESPONSE_CACHE", "1").lower() not in ("0", "false", "no")
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+
+def cache_key(route: str, params: Iterable[Tuple[str, Any]] = (), org_id: Optional[int] = None) -> str:
+    """
+    Stable key: route, org and the query params sorted by name, with empty
+    values dropped (so ?q=&page=1 and ?page=1 share an entry).
+    """
+    norm: Dict[str, list] = {}
+    for k, v in params:
+        if v is None or v == "" or v == []:
+            continue
+        vals = v if isinstance(v, (list, tuple)) else [v]
+        norm.setdefault(k, []).extend(str(x) for x in vals if x not in (None, ""))
+    body = json.dumps(sorted((k, v) for k, v in norm.items() if v), separators=(",", ":"))
+    return f"{route}|org={org_id if org_id is not None else ''}|{body}"
+
+
+def etag_for(key: str, version: int, *extra: Any) -> str:
+    h = hashlib.sha1(f"{key}|v{version}|{'|'.join(str(x) for x in extra)}".encode("utf-8")).hexdigest()
+    return f'W/"{h[:20]}"'
+
+
+def not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of If-None-Match against our ETag (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    ours = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == ours:
+            return True
+    return False
+
+
+class ResponseCache:
+    """Thread-safe LRU of key -> (version, stored_at, value)."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl_seconds: float = TTL_SECONDS,
+                 enabled: bool = ENABLED) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self.enabled = enabled
+        self._data: "OrderedDict[str, Tuple[int, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stale": 0, "evicted": 0}
+
+    def get(self, key: str, version: int) -> Tuple[bool, Any]:
+        if not self.enabled:
+            return False, None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return False, None
+            ver, stored_at, value = entry
+            if ver != version or (self.ttl > 0 and time.monotonic() - stored_at > self.ttl):
+                del self._data[key]
+                self.stats["stale"] += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return True, value
+
+    def put(self, key: str, version: int, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (version, time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats["evicted"] += 1
+
+    def get_or_set(self, key: str, version: int, compute: Callable[[], Any]) -> Any:
+        """Cached value for (key, version), computing it on a miss. Concurrent misses may both compute."""
+        hit, value = self.get(key, version)
+        if hit:
+            return value
+        value = compute()
+        self.put(key, version, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._data)
+        return dict(self.stats, size=size, max_entries=self.max_entries, ttl=self.ttl, enabled=self.enabled)
@@ -12,10 +12,11 @@ import io
 import json
 import re
 import sqlite3
+import zlib
 import requests
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
-from typing import Optional, List, Set, Dict, Any, Tuple
+from typing import Optional, List, Set, Dict, Any, Tuple, Iterator
 from urllib.parse import urlparse, urlencode as _urlencode
 from contextlib import closing
 
@@ -36,6 +37,7 @@ from fastapi.responses import (
     JSONResponse,
     PlainTextResponse,
     FileResponse,
+    Response,
 )
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -46,7 +48,22 @@ from passlib.context import CryptContext
 from pydantic import BaseModel
 from openai import OpenAI
 
+try:  # optional: zstd content-encoding for /feed.ndjson
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
 from tools.email_utils import send_article_email
+from storage import search
+from storage.db import (
+    configure_connection,
+    connect as _db_connect,
+    pooled_connection,
+    backfill_published_ts,
+    bump_data_version,
+    data_version,
+)
+from api.response_cache import ResponseCache, cache_key, etag_for, not_modified
 
 # ---------------------------------------------------------------------------
 # Database connection helpers – SINGLE source of truth
@@ -104,27 +121,56 @@ templates.env.globals["urlencode"] = _urlencode
 
 def _get_sqlite_conn() -> sqlite3.Connection:
     """
-    Always open a fresh connection to the single DB this app uses.
+    Open a fresh connection to the single DB this app uses (caller closes it).
+    Same WAL / busy_timeout pragmas as the pooled one; FKs stay off here.
+    """
+    return _db_connect(DB_PATH, foreign_keys=False)
+
+
+def _stream_conn() -> sqlite3.Connection:
+    """Like _get_sqlite_conn, but usable from any thread (for streamed responses)."""
+    return configure_connection(sqlite3.connect(DB_PATH, check_same_thread=False), foreign_keys=False)
+
+
+def _pooled_conn() -> sqlite3.Connection:
+    """
+    This worker thread's long-lived connection, used by the _sql_* helpers.
+    Don't close it.
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return pooled_connection(DB_PATH, foreign_keys=False)
 
 
-def _sql_exec(sql: str, params: tuple | None = None) -> None:
+def _sql_exec(sql: str, params: tuple | None = None, invalidate: bool = False) -> None:
     """
     Run a write statement or a block of DDL.
     If params is None, treat sql as a script (for CREATE TABLE, etc.).
+    Pass invalidate=True for writes to tables the cached pages read (items,
+    risks, controls and the sites / orgs they name): it bumps the data
+    version in the same transaction. User, login and membership writes
+    leave the response cache alone.
     """
-    conn = _get_sqlite_conn()
-    try:
+    conn = _pooled_conn()
+    with conn:  # commit, or roll back so the pooled connection isn't left mid-transaction
         if params is None:
             conn.executescript(sql)
         else:
             conn.execute(sql, params)
-        conn.commit()
-    finally:
-        conn.close()
+            if invalidate:
+                bump_data_version(conn)
+
+
+# Hot read endpoints cache their query results / template context per data
+# version (see api/response_cache.py); writes bump the version.
+_response_cache = ResponseCache()
+
+
+def _data_version() -> int:
+    return data_version(_pooled_conn())
+
+
+def _etag_headers(etag: str) -> Dict[str, str]:
+    # Browsers keep the copy but revalidate each time (cheap: usually a 304)
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
 
 
 def _sql_all(sql: str, params: Tuple = ()) -> List[dict]:
@@ -135,13 +181,10 @@ def _sql_all(sql: str, params: Tuple = ()) -> List[dict]:
         return db.all(sql, params)  # type: ignore[attr-defined]
     if hasattr(db, "query"):
         return db.query(sql, params)  # type: ignore[attr-defined]
-    conn = _get_sqlite_conn()
-    try:
-        cur = conn.execute(sql, params)
+    conn = _pooled_conn()
+    with closing(conn.execute(sql, params)) as cur:
         rows = cur.fetchall()
-        return [dict(r) for r in rows]
-    finally:
-        conn.close()
+    return [dict(r) for r in rows]
 
 
 def _sql_one(sql: str, params: Tuple = ()) -> Optional[dict]:
@@ -150,13 +193,10 @@ def _sql_one(sql: str, params: Tuple = ()) -> Optional[dict]:
     """
     if hasattr(db, "one"):
         return db.one(sql, params)  # type: ignore[attr-defined]
-    conn = _get_sqlite_conn()
-    try:
-        cur = conn.execute(sql, params)
+    conn = _pooled_conn()
+    with closing(conn.execute(sql, params)) as cur:
         row = cur.fetchone()
-        return dict(row) if row else None
-    finally:
-        conn.close()
+    return dict(row) if row else None
 
 
 def _sql_all_safe(q: str, params: Tuple = ()) -> List[dict]:
@@ -195,27 +235,196 @@ def _list_sites_for_org(org_id: int) -> List[dict]:
     )
 
 
-def _list_items(limit: int) -> List[dict]:
-    return _sql_all(
-        """
-        SELECT *
+# Columns the item feeds can return; content is opt-in (fields=...,content)
+ITEM_FIELDS = (
+    "guid", "source", "title", "link", "published_at", "published_ts", "tags",
+    "summary", "ai_summary", "ai_summary_updated_at", "updated_at", "content",
+)
+DEFAULT_ITEM_FIELDS = tuple(f for f in ITEM_FIELDS if f != "content")
+_FEED_FETCH = 500  # rows pulled from the cursor at a time when streaming
+# Rows are stamped shortly before their transaction commits, so a sync
+# watermark is moved back this far to catch rows that commit late
+FEED_SYNC_OVERLAP_SECONDS = int(os.getenv("FEED_SYNC_OVERLAP_SECONDS", "120"))
+
+
+def _item_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Parse ?fields=a,b; guid, published_at and published_ts (the cursor) are always included."""
+    if not fields:
+        return DEFAULT_ITEM_FIELDS
+    wanted = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in wanted if f not in ITEM_FIELDS]
+    if unknown:
+        raise HTTPException(400, f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(ITEM_FIELDS)}")
+    return tuple(dict.fromkeys(["guid", "published_at", "published_ts", *wanted]))
+
+
+def _parse_after(after: Optional[str]) -> Optional[Tuple[int, str]]:
+    """?after=<published_ts>,<guid> (guid may itself contain commas)."""
+    if not after:
+        return None
+    ts, sep, guid = after.partition(",")
+    if not sep or not guid or not ts.strip().lstrip("-").isdigit():
+        raise HTTPException(400, "after must be '<published_ts>,<guid>'")
+    return int(ts), guid
+
+
+def _parse_updated_since(value: Optional[str]) -> Optional[str]:
+    """ISO date/datetime -> UTC isoformat, comparable with items.updated_at."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(400, "updated_since must be an ISO date or datetime")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def _items_sql(limit: int, fields: Tuple[str, ...], after: Optional[Tuple[int, str]],
+               extra: str = "", updated_since: Optional[str] = None) -> Tuple[str, tuple]:
+    """
+    Newest-first page of items, keyset-paginated on (published_ts, guid)
+    (idx_items_published_ts), selecting only `fields` (+ `extra` SQL).
+    `updated_since` keeps rows changed after that time (idx_items_updated).
+    """
+    cols = ", ".join(fields) + (f", {extra}" if extra else "")
+    where, params = [], []
+    if after:
+        where.append("(published_ts, guid) < (?, ?)")
+        params += list(after)
+    if updated_since:
+        where.append("updated_at > ?")
+        params.append(updated_since)
+    sql = f"""
+        SELECT {cols}
         FROM items
-        ORDER BY published_at DESC
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY published_ts DESC, guid DESC
         LIMIT ?
-        """,
-        (limit,),
-    )
+    """
+    return sql, tuple(params + [int(limit)])
+
+
+def _list_items(limit: int, fields: Optional[Tuple[str, ...]] = None,
+                after: Optional[Tuple[int, str]] = None,
+                updated_since: Optional[str] = None) -> List[dict]:
+    sql, params = _items_sql(limit, fields or ITEM_FIELDS, after, updated_since=updated_since)
+    return _sql_all(sql, params)
+
+
+def _iter_items(limit: int, fields: Tuple[str, ...], after: Optional[Tuple[int, str]] = None,
+                extra: str = "", updated_since: Optional[str] = None) -> Iterator[dict]:
+    """
+    Stream rows from a server-side cursor on a connection of its own (the
+    response may outlive the request thread), _FEED_FETCH rows at a time.
+
+    Starlette pulls each chunk of a sync streaming body on whichever
+    threadpool worker is free, so the connection must not be pinned to the
+    thread that opened it; only this generator ever uses it.
+    """
+    sql, params = _items_sql(limit, fields, after, extra, updated_since)
+    conn = _stream_conn()
+    try:
+        with closing(conn.execute(sql, params)) as cur:
+            while True:
+                rows = cur.fetchmany(_FEED_FETCH)
+                if not rows:
+                    break
+                for r in rows:
+                    yield dict(r)
+    finally:
+        conn.close()
+
+
+def _feed_watermark(updated_since: Optional[str]) -> Optional[str]:
+    """
+    Value for ?updated_since= on the next incremental pull: the newest
+    updated_at in the data (read before the rows are), less
+    FEED_SYNC_OVERLAP_SECONDS. Taken from the rows rather than the clock, so
+    a row stamped before the pull but committed after it is still picked up
+    next time; rows inside the overlap are sent twice, so clients dedupe by
+    guid. With no newer rows the client's own watermark is handed back.
+    """
+    row = _sql_one("SELECT MAX(updated_at) AS newest FROM items")
+    newest = (row or {}).get("newest")
+    if not newest:
+        return updated_since
+    try:
+        dt = datetime.fromisoformat(str(newest).replace("Z", "+00:00"))
+    except ValueError:
+        return updated_since
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    mark = (dt - timedelta(seconds=FEED_SYNC_OVERLAP_SECONDS)).astimezone(timezone.utc).isoformat()
+    return max(mark, updated_since) if updated_since else mark
+
+
+def _pick_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Choose a content-encoding from Accept-Encoding (honouring q=0):
+    zstd if the client takes it and `zstandard` is installed, else gzip.
+    """
+    offered: Dict[str, float] = {}
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        for p in params.split(";"):
+            k, _, v = p.strip().partition("=")
+            if k == "q":
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        offered[name.strip()] = q
+    candidates = ["zstd", "gzip"] if zstd is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for enc in candidates:
+        q = offered.get(enc, offered.get("*", 0.0))
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+def _encode_stream(chunks: Iterator[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """Compress a byte stream incrementally, flushing per chunk so clients see rows as they come."""
+    if encoding == "gzip":
+        comp = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+        for chunk in chunks:
+            out = comp.compress(chunk) + comp.flush(zlib.Z_SYNC_FLUSH)
+            if out:
+                yield out
+        yield comp.flush()
+    elif encoding == "zstd":
+        comp = zstd.ZstdCompressor(level=3).compressobj()
+        for chunk in chunks:
+            out = comp.compress(chunk) + comp.flush(zstd.COMPRESSOBJ_FLUSH_BLOCK)
+            if out:
+                yield out
+        yield comp.flush()
+    else:
+        yield from chunks
+
+
+def _next_after(rows: List[dict], limit: int) -> Optional[str]:
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return f"{int(last.get('published_ts') or 0)},{last['guid']}"
 
 
 def _set_sites_for_risk(risk_id: int, site_ids: List[int]) -> None:
     """
     Replace all site mappings for a given org_risk_id with the provided site_ids.
     """
-    _sql_exec("DELETE FROM org_risk_sites WHERE org_risk_id = ?", (risk_id,))
+    _sql_exec("DELETE FROM org_risk_sites WHERE org_risk_id = ?", (risk_id,), invalidate=True)
     for sid in site_ids:
         _sql_exec(
             "INSERT INTO org_risk_sites (org_risk_id, site_id) VALUES (?, ?)",
             (risk_id, sid),
+            invalidate=True,
         )
 
 
@@ -578,6 +787,28 @@ def _ensure_org_risk_tables():
     )
 
 
+def _ensure_item_columns():
+    """
+    The scraper's storage.db migrates items; the API may start first on an
+    older database, so make sure the columns the feeds select exist.
+    """
+    cols = {r["name"] for r in _sql_all("PRAGMA table_info(items)")}
+    if cols and "updated_at" not in cols:
+        _sql_exec("ALTER TABLE items ADD COLUMN updated_at TEXT")
+        _sql_exec(
+            "UPDATE items SET updated_at = ? WHERE updated_at IS NULL",
+            (datetime.now(timezone.utc).isoformat(),),
+        )
+    if cols and "published_ts" not in cols:
+        _sql_exec("ALTER TABLE items ADD COLUMN published_ts INTEGER NOT NULL DEFAULT 0")
+        conn = _pooled_conn()
+        with conn:
+            backfill_published_ts(conn)
+    if cols:
+        _sql_exec("CREATE INDEX IF NOT EXISTS idx_items_updated ON items(updated_at)")
+        _sql_exec("CREATE INDEX IF NOT EXISTS idx_items_published_ts ON items(published_ts, guid)")
+
+
 @app.on_event("startup")
 def _startup():
     # Legacy hook – db is None, so this is effectively a no-op
@@ -588,6 +819,7 @@ def _startup():
             pass
     _ensure_users_tables()
     _ensure_org_risk_tables()
+    _ensure_item_columns()
 
 
 # ---------------------------------------------------------------------------
@@ -703,6 +935,21 @@ def render(request: Request, template_name: str, ctx: Optional[dict] = None):
         )
 
 
+def _cached_page(request: Request, key: str, template_name: str, compute) -> Response:
+    """
+    render() with the context from the response cache. The ETag also covers
+    the user and session org, since the page header shows them.
+    """
+    version = _data_version()
+    etag = etag_for(key, version, get_user_id(request), resolve_org_id_soft(request))
+    if not_modified(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_etag_headers(etag))
+    resp = render(request, template_name, _response_cache.get_or_set(key, version, compute))
+    if resp.status_code == 200:
+        resp.headers.update(_etag_headers(etag))
+    return resp
+
+
 # ---------------------------------------------------------------------------
 # Basic routes
 # ---------------------------------------------------------------------------
@@ -717,42 +964,128 @@ def health():
 
 
 @app.get("/items")
-def items(limit: int = Query(50, ge=1, le=200)):
-    return _list_items(limit=limit)
+def items(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    after: Optional[str] = Query(None, description="Cursor: '<published_ts>,<guid>' of the last row seen"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns (content is left out by default)"),
+):
+    cols, cursor = _item_fields(fields), _parse_after(after)
+    key = cache_key("/items", [("limit", limit), ("after", after), ("fields", ",".join(cols))])
+    version = _data_version()
+    etag = etag_for(key, version)
+    if not_modified(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_etag_headers(etag))
+    rows = _response_cache.get_or_set(key, version, lambda: _list_items(limit=limit, fields=cols, after=cursor))
+    resp = JSONResponse(rows, headers=_etag_headers(etag))
+    nxt = _next_after(rows, limit)
+    if nxt:
+        # Next page cursor; the body stays a plain list for existing clients
+        resp.headers["X-Next-After"] = nxt
+        resp.headers["Link"] = f'<{request.url.include_query_params(after=nxt)}>; rel="next"'
+    return resp
 
 
 @app.get("/feed.json")
-def feed(limit: int = Query(5000, ge=1, le=20000)):
-    return _list_items(limit=limit)
+def feed(
+    request: Request,
+    limit: int = Query(5000, ge=1, le=20000),
+    after: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+):
+    cols, cursor = _item_fields(fields), _parse_after(after)
+    # Too big to hold in the response cache; it still gets an ETag so an
+    # unchanged feed costs a 304 instead of a full export
+    etag = etag_for(cache_key("/feed.json", [("limit", limit), ("after", after), ("fields", ",".join(cols))]),
+                    _data_version())
+    if not_modified(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_etag_headers(etag))
+    rows = _iter_items(limit, cols, cursor)
+
+    def body() -> Iterator[bytes]:
+        # A JSON array written row by row, so memory stays flat for big exports
+        yield b"["
+        for i, r in enumerate(rows):
+            yield (b"," if i else b"") + json.dumps(r, ensure_ascii=False).encode("utf-8")
+        yield b"]"
+
+    return StreamingResponse(body(), media_type="application/json", headers=_etag_headers(etag))
+
+
+@app.get("/feed.ndjson")
+def feed_ndjson(
+    request: Request,
+    limit: int = Query(20000, ge=1, le=200000),
+    after: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    updated_since: Optional[str] = Query(None, description="Only rows changed after this ISO date/datetime"),
+):
+    """
+    One JSON object per line, streamed from the cursor. Incremental syncs pass
+    the `X-Feed-Watermark` of their previous pull as ?updated_since= and
+    upsert by guid (see _feed_watermark).
+    """
+    since = _parse_updated_since(updated_since)
+    watermark = _feed_watermark(since)
+    rows = _iter_items(limit, _item_fields(fields), _parse_after(after), updated_since=since)
+
+    def lines() -> Iterator[bytes]:
+        batch: List[bytes] = []
+        for r in rows:
+            batch.append(json.dumps(r, ensure_ascii=False).encode("utf-8") + b"\n")
+            if len(batch) >= _FEED_FETCH:
+                yield b"".join(batch)
+                batch = []
+        if batch:
+            yield b"".join(batch)
+
+    encoding = _pick_encoding(request.headers.get("accept-encoding", ""))
+    headers = {"Vary": "Accept-Encoding"}
+    if watermark:
+        headers["X-Feed-Watermark"] = watermark
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(
+        _encode_stream(lines(), encoding),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
 
 
 @app.get("/feed.csv")
-def feed_csv(limit: int = Query(5000, ge=1, le=20000)):
-    rows = _list_items(limit=limit)
-    out = io.StringIO()
-    writer = csv.writer(out)
-    writer.writerow(
-        ["title", "link", "published_at", "tags", "guid", "source", "summary"]
-    )
-    for r in rows:
-        writer.writerow(
-            [
-                r.get("title", ""),
-                r.get("link", ""),
-                r.get("published_at", ""),
-                r.get("tags", ""),
-                r.get("guid", ""),
-                r.get("source", ""),
-                (
-                    r.get("ai_summary")
-                    or r.get("summary")
-                    or (r.get("content") or "")[:220]
-                ).replace("\n", " "),
-            ]
-        )
-    out.seek(0)
+def feed_csv(
+    limit: int = Query(5000, ge=1, le=20000),
+    after: Optional[str] = Query(None),
+):
+    fields = ("title", "link", "published_at", "tags", "guid", "source")
+    # Summary column computed in SQL so content is never loaded in full
+    rows = _iter_items(
+        limit, fields, _parse_after(after),
+        extra="COALESCE(NULLIF(ai_summary, ''), NULLIF(summary, ''), substr(COALESCE(content, ''), 1, 220)) AS csv_summary",
+    )
+
+    def body() -> Iterator[bytes]:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(["title", "link", "published_at", "tags", "guid", "source", "summary"])
+        for i, r in enumerate(rows, start=1):
+            writer.writerow([
+                r.get("title") or "",
+                r.get("link") or "",
+                r.get("published_at") or "",
+                r.get("tags") or "",
+                r.get("guid") or "",
+                r.get("source") or "",
+                (r.get("csv_summary") or "").replace("\n", " "),
+            ])
+            if i % _FEED_FETCH == 0:
+                yield buf.getvalue().encode("utf-8")
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue().encode("utf-8")
+
     return StreamingResponse(
-        io.BytesIO(out.getvalue().encode("utf-8")),
+        body(),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=ofgem_feed.csv"},
     )
@@ -768,6 +1101,32 @@ def items_json():
         )
     return FileResponse(path, media_type="application/json")
 
+@app.get("/api/search")
+def api_search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Ranked full-text search over items (title, summary, ai_summary, content).
+    Words match as prefixes, "quoted phrases" as phrases. `snippet` is HTML
+    with matches in <mark>; `score` is bm25 (lower is better).
+    """
+    match = search.fts_query(q)
+    if not match:
+        return {"query": q, "total": 0, "results": []}
+    if not _fts_ready():
+        return JSONResponse(
+            {"error": "Search index not built. Run: python -m scripts.rebuild_search_index"},
+            status_code=503,
+        )
+    total = int((_sql_one(search.COUNT_SQL, (match,)) or {}).get("n") or 0)
+    rows = _sql_all(search.SEARCH_SQL, (match, limit, offset))
+    for r in rows:
+        r["snippet"] = search.highlight(r.get("snippet"))
+    return {"query": q, "total": total, "results": rows}
+
+
 def tag_item_to_risk(
     user_email: str,
     item_guid: str,
@@ -841,7 +1200,7 @@ def list_items_for_risk(org_id: int, risk_id: int, user_email: str | None = None
         WHERE t.org_id = ?
           AND t.org_risk_id = ?
           {user_clause}
-        ORDER BY i.published_at DESC
+        ORDER BY i.published_ts DESC, i.guid DESC
         """,
         tuple(params),
     )
@@ -849,23 +1208,129 @@ def list_items_for_risk(org_id: int, risk_id: int, user_email: str | None = None
 # ---------------------------------------------------------------------------
 # Summaries UI
 # ---------------------------------------------------------------------------
-@app.get("/summaries", response_class=HTMLResponse)
-def summaries_page(
-    request: Request,
-    q: str = "",
-    date_from: Optional[str] = None,
-    date_to: Optional[str] = None,
-    sources: List[str] = Query(default=[]),
-    topics: List[str] = Query(default=[]),
-    page: int = 1,
-    per_page: int = 25,
-):
-    org_id = resolve_org_id(request)
+# Dates in items.published_at are ISO strings; rows with anything else (or
+# nothing) are never excluded by a date filter, as before.
+_ISO_DAY_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*"
+
+
+def _iso_day(value: Optional[str]) -> Optional[str]:
+    """'YYYY-MM-DD' for a date/datetime string, or None if it can't be parsed."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).date().isoformat()
+    except Exception:
+        return None
+
+
+_tables_seen: Set[str] = set()
+
+
+def _table_ready(name: str) -> bool:
+    """True once `name` exists (derived tables like items_fts / item_tags are created by storage.db.DB)."""
+    if name not in _tables_seen and _sql_one_safe(
+        "SELECT 1 AS ok FROM sqlite_master WHERE type='table' AND name=?", (name,)
+    ):
+        _tables_seen.add(name)
+    return name in _tables_seen
+
+
+def _fts_ready() -> bool:
+    return _table_ready(search.FTS_TABLE)
+
+
+def _summaries_where(
+    q: str,
+    date_from: Optional[str],
+    date_to: Optional[str],
+    sources: List[str],
+    topics: List[str],
+) -> Tuple[str, str, Tuple, bool]:
+    """
+    Build the FROM and WHERE clauses (and params) for the /summaries filters:
+    text search, inclusive date range, source list and any-of topic tags
+    (case-insensitive).
+
+    Text search uses the FTS5 index when it exists (the last value returned
+    is True and items_fts is joined, so callers can rank and snippet);
+    otherwise it is a substring match over title/content/ai_summary.
+    """
+    clauses: List[str] = []
+    params: List[Any] = []
+    frm = "items i"
+    ranked = False
+
+    q_norm = (q or "").strip()
+    match = search.fts_query(q_norm) if q_norm and _fts_ready() else ""
+    if match:
+        frm = f"items i JOIN {search.FTS_TABLE} ON {search.FTS_TABLE}.rowid = i.rowid"
+        clauses.append(f"{search.FTS_TABLE} MATCH ?")
+        params.append(match)
+        ranked = True
+    elif q_norm:
+        like = "%" + q_norm.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        clauses.append(
+            "(i.title LIKE ? ESCAPE '\\' OR i.content LIKE ? ESCAPE '\\' OR i.ai_summary LIKE ? ESCAPE '\\')"
+        )
+        params += [like, like, like]
+
+    for day, op in ((_iso_day(date_from), ">="), (_iso_day(date_to), "<=")):
+        if day:
+            clauses.append(
+                f"(COALESCE(i.published_at, '') NOT GLOB '{_ISO_DAY_GLOB}' "
+                f"OR substr(i.published_at, 1, 10) {op} ?)"
+            )
+            params.append(day)
+
+    src_list = [s for s in (sources or []) if s]
+    if src_list:
+        clauses.append(f"i.source IN ({','.join('?' for _ in src_list)})")
+        params += src_list
+
+    topic_list = sorted({t.lower() for t in (topics or []) if t})
+    if topic_list:
+        marks = ",".join("?" for _ in topic_list)
+        if _table_ready("item_tags"):
+            # item_tags.tag is COLLATE NOCASE, so this is an index lookup on (tag, item_guid)
+            clauses.append(f"i.guid IN (SELECT item_guid FROM item_tags WHERE tag IN ({marks}))")
+        else:
+            clauses.append(
+                f"""EXISTS (
+                  SELECT 1 FROM json_each(CASE WHEN json_valid(i.tags) THEN i.tags ELSE '[]' END) jt
+                  WHERE lower(jt.value) IN ({marks})
+                )"""
+            )
+        params += topic_list
+
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    return frm, where, tuple(params), ranked
+
+
+def _summaries_context(
+    org_id: int,
+    q: str,
+    date_from: Optional[str],
+    date_to: Optional[str],
+    sources: List[str],
+    topics: List[str],
+    page: int,
+    per_page: int,
+) -> dict:
+    """Template context for /summaries (cached per org, filters and data version)."""
     org_name = _org_name_by_id(org_id)
 
-    # Pull items directly from the DB, including ai_summary AND a per-item risk link count
-    rows = _sql_many(
-        """
+    page = max(1, int(page))
+    per_page = max(1, min(200, int(per_page)))
+
+    # Filtering, ordering and paging all happen in SQL; only the visible page
+    # is fetched, and never the full content column.
+    frm, where, params, ranked = _summaries_where(q, date_from, date_to, sources, topics)
+
+    total = int((_sql_one(f"SELECT COUNT(*) AS n FROM {frm} {where}", params) or {}).get("n") or 0)
+    total_pages = (total + per_page - 1) // per_page if total else 1
+
+    rows = _sql_all(
+        f"""
         SELECT
             i.guid,
             i.link,
@@ -873,102 +1338,78 @@ def summaries_page(
             i.source,
             i.published_at,
             i.ai_summary,
-            i.content,
+            i.summary,
+            -- content is only needed as the blurb fallback (shown up to 320 chars)
+            CASE
+              WHEN COALESCE(i.ai_summary, '') = '' AND COALESCE(i.summary, '') = ''
+              THEN substr(i.content, 1, 321)
+            END AS content,
             i.tags,
-            i.created_at,
-            (
-              SELECT COUNT(*)
-              FROM org_risk_items ori
-              WHERE ori.item_guid = i.guid
-            ) AS risk_link_count
-        FROM items i
-        ORDER BY i.published_at DESC
-        LIMIT ?
+            {search.SNIPPET_SQL if ranked else "NULL"} AS snippet
+        FROM {frm}
+        {where}
+        ORDER BY {search.RANK_SQL + ", " if ranked else ""}i.published_ts DESC, i.guid DESC
+        LIMIT ? OFFSET ?
         """,
-        (20000,),
-    )
+        params + (per_page, (page - 1) * per_page),
+    )
+
+    # Risk link counts for just this page, in one grouped query
+    risk_counts: Dict[str, int] = {}
+    guids = [r["guid"] for r in rows if r.get("guid")]
+    if guids:
+        marks = ",".join("?" for _ in guids)
+        for r in _sql_all(
+            f"""
+            SELECT item_guid, COUNT(*) AS n
+            FROM org_risk_items
+            WHERE item_guid IN ({marks})
+            GROUP BY item_guid
+            """,
+            tuple(guids),
+        ):
+            risk_counts[r["item_guid"]] = int(r["n"] or 0)
 
-    all_items: List[dict] = []
-    for r in rows:
-        e = dict(r)
+    page_items: List[dict] = []
+    for e in rows:
         tags_raw = e.get("tags")
         if isinstance(tags_raw, str):
             try:
                 e["tags"] = json.loads(tags_raw)
             except Exception:
                 e["tags"] = []
-        elif isinstance(tags_raw, list):
-            e["tags"] = tags_raw
-        else:
+        elif not isinstance(tags_raw, list):
             e["tags"] = []
+        e["risk_link_count"] = risk_counts.get(e.get("guid"), 0)
+        e["snippet"] = search.highlight(e["snippet"]) if e.get("snippet") else ""
+        page_items.append(e)
 
-        # Normalise risk_link_count
-        try:
-            e["risk_link_count"] = int(e.get("risk_link_count") or 0)
-        except Exception:
-            e["risk_link_count"] = 0
-
-        all_items.append(e)
-
-    def in_date_range(dt_str: str) -> bool:
-        if not (date_from or date_to):
-            return True
-        try:
-            dt = datetime.fromisoformat(str(dt_str).replace("Z", "+00:00"))
-        except Exception:
-            return True
-        if date_from and dt.date() < datetime.fromisoformat(date_from).date():
-            return False
-        if date_to and dt.date() > datetime.fromisoformat(date_to).date():
-            return False
-        return True
-
-    q_lower = (q or "").lower().strip()
-    src_set: Set[str] = set(sources or [])
-    topic_set = {t.lower() for t in (topics or [])}
-
-    filtered: List[dict] = []
-    for e in all_items:
-        text = " ".join(
-            [
-                str(e.get("title", "")),
-                str(e.get("content", "")),
-                str(e.get("ai_summary", "")),
-            ]
-        ).lower()
-
-        if q_lower and q_lower not in text:
-            continue
-        if not in_date_range(e.get("published_at")):
-            continue
-
-        tags = [t.lower() for t in (e.get("tags") or [])]
-        if topic_set and not any(t in tags for t in topic_set):
-            continue
-
-        if src_set and (e.get("source") not in src_set):
-            continue
-
-        filtered.append(e)
-
-    filtered.sort(key=lambda e: e.get("published_at", "") or "", reverse=True)
-
-    page = max(1, int(page))
-    per_page = max(1, min(200, int(per_page)))
-    total = len(filtered)
-    start = (page - 1) * per_page
-    end = start + per_page
-    page_items = filtered[start:end]
-    total_pages = (total + per_page - 1) // per_page if total else 1
     page_numbers = list(range(max(1, page - 2), min(total_pages, page + 2) + 1))
 
-    all_sources = sorted(
-        {(i.get("source") or "").strip() for i in all_items if i.get("source")}
-    )
+    # Sidebar facets: one GROUP BY each over indexed columns
+    source_counts = {
+        r["source"]: int(r["n"])
+        for r in _sql_all(
+            """
+            SELECT TRIM(source) AS source, COUNT(*) AS n
+            FROM items
+            WHERE TRIM(COALESCE(source, '')) <> ''
+            GROUP BY TRIM(source)
+            ORDER BY source
+            """
+        )
+    }
+    all_sources = list(source_counts)
+    topic_counts: Dict[str, int] = {}
+    if _table_ready("item_tags"):
+        by_tag = {
+            r["tag"].lower(): int(r["n"])
+            for r in _sql_all("SELECT tag, COUNT(*) AS n FROM item_tags GROUP BY tag")
+        }
+        topic_counts = {t: by_tag.get(t.lower(), 0) for t in TOPIC_TAGS}
     if not sources and not any([q, date_from, date_to, topics, page != 1]):
         sources = list(all_sources)
 
-    uid = get_user_id(request)
     saved_filters = []  # db is None, so no saved filters for now
 
     # Risks for the "Link to risk" dropdown
@@ -982,30 +1423,52 @@ def summaries_page(
         (org_id,),
     )
 
-    return render(
-        request,
-        "summaries.html",
-        {
-            "entries": page_items,
-            "page": page,
-            "total_pages": total_pages,
-            "page_numbers": page_numbers,
-            "active": {
-                "q": q,
-                "date_from": date_from or "",
-                "date_to": date_to or "",
-                "sources": sources,
-                "topics": topics,
-                "per_page": per_page,
-            },
-            "all_sources": all_sources,
-            "all_topics": TOPIC_TAGS,
-            "saved_filters": saved_filters,
-            "org_id": org_id,
-            "org_name": org_name,
-            "org_risks": org_risks_for_dropdown,
-            "folders": [],  # folders APIs still use db; keep empty for now
+    return {
+        "entries": page_items,
+        "page": page,
+        "total_pages": total_pages,
+        "page_numbers": page_numbers,
+        "active": {
+            "q": q,
+            "date_from": date_from or "",
+            "date_to": date_to or "",
+            "sources": sources,
+            "topics": topics,
+            "per_page": per_page,
         },
+        "all_sources": all_sources,
+        "all_topics": TOPIC_TAGS,
+        "source_counts": source_counts,
+        "topic_counts": topic_counts,
+        "saved_filters": saved_filters,
+        "org_id": org_id,
+        "org_name": org_name,
+        "org_risks": org_risks_for_dropdown,
+        "folders": [],  # folders APIs still use db; keep empty for now
+    }
+
+
+@app.get("/summaries", response_class=HTMLResponse)
+def summaries_page(
+    request: Request,
+    q: str = "",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    sources: List[str] = Query(default=[]),
+    topics: List[str] = Query(default=[]),
+    page: int = 1,
+    per_page: int = 25,
+):
+    org_id = resolve_org_id(request)
+    key = cache_key(
+        "/summaries",
+        [("q", q), ("date_from", date_from), ("date_to", date_to), ("sources", sources),
+         ("topics", topics), ("page", page), ("per_page", per_page)],
+        org_id,
+    )
+    return _cached_page(
+        request, key, "summaries.html",
+        lambda: _summaries_context(org_id, q, date_from, date_to, sources, topics, page, per_page),
     )
 
 
@@ -1063,6 +1526,7 @@ def org_new_create(
         VALUES (?, ?, ?, ?, ?, ?, ?)
         """,
         (name.strip(), phone.strip(), email.strip(), head_office_address.strip(), website.strip(), now, created_by),
+        invalidate=True,
     )
 
     row = _sql_one(
@@ -1528,6 +1992,7 @@ def create_site(
     _sql_exec(
         f"INSERT INTO sites ({','.join(fields)}) VALUES ({placeholders})",
         tuple(params),
+        invalidate=True,
     )
 
     return RedirectResponse(url=f"/orgs/{org_id}/controls", status_code=303)
@@ -1622,11 +2087,11 @@ def site_edit_save(
     if updates:
         set_sql = ", ".join([f"{k}=?" for k in updates.keys()])
         params = list(updates.values()) + [site_id]
-        _sql_exec(f"UPDATE sites SET {set_sql} WHERE id=?", tuple(params))
+        _sql_exec(f"UPDATE sites SET {set_sql} WHERE id=?", tuple(params), invalidate=True)
 
     if "updated_at" in cols:
         _sql_exec(
-            "UPDATE sites SET updated_at=datetime('now') WHERE id=?", (site_id,)
+            "UPDATE sites SET updated_at=datetime('now') WHERE id=?", (site_id,), invalidate=True
         )
 
     return RedirectResponse(url=f"/orgs/{org_id}/sites/{site_id}", status_code=302)
@@ -1694,6 +2159,7 @@ def _ensure_ai_summary_for_item(row: Dict[str, Any]) -> Dict[str, Any]:
     _sql_exec(
         "UPDATE items SET ai_summary = ? WHERE id = ?",
         (summary, row["id"]),
+        invalidate=True,
     )
     row["ai_summary"] = summary
     return row
@@ -1735,15 +2201,7 @@ def api_test_openai():
 # ---------------------------------------------------------------------------
 # Org controls
 # ---------------------------------------------------------------------------
-@app.get("/orgs/{org_id}/controls")
-def org_controls_page(
-    request: Request,
-    org_id: int,
-    site: Optional[int] = Query(None),
-):
-    """
-    Organisation controls page — shows controls grouped by site, plus sidebar of sites.
-    """
+def _org_controls_context(org_id: int, site: Optional[int]) -> dict:
     org = _sql_one("SELECT * FROM orgs WHERE id = ?", (org_id,))
 
     sites = _sql_all(
@@ -1787,16 +2245,25 @@ def org_controls_page(
         site_name = r.get("site_name") or "Corporate"
         grouped.setdefault(site_name, []).append(r)
 
-    return render(
-        request,
-        "org_controls.html",
-        {
-            "org": org,
-            "org_id": org_id,
-            "sites": sites,
-            "grouped": grouped,
-        },
-    )
+    return {
+        "org": org,
+        "org_id": org_id,
+        "sites": sites,
+        "grouped": grouped,
+    }
+
+
+@app.get("/orgs/{org_id}/controls")
+def org_controls_page(
+    request: Request,
+    org_id: int,
+    site: Optional[int] = Query(None),
+):
+    """
+    Organisation controls page — shows controls grouped by site, plus sidebar of sites.
+    """
+    key = cache_key("/orgs/controls", [("site", site)], org_id)
+    return _cached_page(request, key, "org_controls.html", lambda: _org_controls_context(org_id, site))
 
 
 @app.post("/orgs/{org_id}/controls/{control_id}/update")
@@ -1841,6 +2308,7 @@ async def update_control(
                 org_id,
             ),
         )
+        bump_data_version(conn)
         conn.commit()
     finally:
         conn.close()
@@ -1857,6 +2325,7 @@ def delete_control(org_id: int, control_id: int):
             "DELETE FROM org_controls WHERE id = ? AND org_id = ?",
             (control_id, org_id),
         )
+        bump_data_version(conn)
         conn.commit()
     finally:
         conn.close()
@@ -1928,6 +2397,7 @@ def org_control_create(
             now,
             user,
         ),
+        invalidate=True,
     )
 
     return RedirectResponse(url=f"/orgs/{org_id}/controls", status_code=303)
@@ -1936,21 +2406,16 @@ def org_control_create(
 # ---------------------------------------------------------------------------
 # Org & site risks pages
 # ---------------------------------------------------------------------------
-@app.get("/orgs/{org_id}/org-risks", response_class=HTMLResponse)
-def org_risks_page(
-    request: Request,
+def _org_risks_context(
     org_id: int,
-    status: str | None = Query(None),
-    severity: str | None = Query(None),
-    category: str | None = Query(None),
-    location: str | None = Query(None),  # "", "corp" or site_id as string
-    page: int = Query(1, ge=1),
-    per_page: int = Query(25, ge=1, le=200),
-):
-    """
-    List all risks for an org – both corporate and site-specific – using
-    org_risks + org_risk_sites (many-to-many).
-    """
+    status: Optional[str],
+    severity: Optional[str],
+    category: Optional[str],
+    location: Optional[str],
+    page: int,
+    per_page: int,
+) -> dict:
+    """Template context for the org risk register (cached per org, filters and data version)."""
     org = _org_basic(org_id)
     sites = _list_sites_for_org(org_id)
     total_sites = len(sites)
@@ -2120,7 +2585,34 @@ def org_risks_page(
         "page_numbers": page_numbers,
     }
 
-    return render(request, "org_risks.html", ctx)
+    return ctx
+
+
+@app.get("/orgs/{org_id}/org-risks", response_class=HTMLResponse)
+def org_risks_page(
+    request: Request,
+    org_id: int,
+    status: str | None = Query(None),
+    severity: str | None = Query(None),
+    category: str | None = Query(None),
+    location: str | None = Query(None),  # "", "corp" or site_id as string
+    page: int = Query(1, ge=1),
+    per_page: int = Query(25, ge=1, le=200),
+):
+    """
+    List all risks for an org – both corporate and site-specific – using
+    org_risks + org_risk_sites (many-to-many).
+    """
+    key = cache_key(
+        "/orgs/org-risks",
+        [("status", status), ("severity", severity), ("category", category),
+         ("location", location), ("page", page), ("per_page", per_page)],
+        org_id,
+    )
+    return _cached_page(
+        request, key, "org_risks.html",
+        lambda: _org_risks_context(org_id, status, severity, category, location, page, per_page),
+    )
 
 
 @app.get("/orgs/{org_id}/org-risks/{risk_id}", response_class=HTMLResponse)
@@ -2171,7 +2663,7 @@ def org_risk_detail_page(request: Request, org_id: int, risk_id: int):
         FROM org_risk_items ori
         JOIN items i ON i.guid = ori.item_guid
         WHERE ori.org_risk_id = ?
-        ORDER BY i.published_at DESC
+        ORDER BY i.published_ts DESC, i.guid DESC
         """,
         (risk_id,),
     )
@@ -2332,9 +2824,9 @@ async def org_risk_update(
         risk_id,
         org_id,
     )
-    _sql_exec(sql, params)
+    _sql_exec(sql, params, invalidate=True)
 
-    _sql_exec("DELETE FROM org_controls_risks WHERE org_risk_id = ?", (risk_id,))
+    _sql_exec("DELETE FROM org_controls_risks WHERE org_risk_id = ?", (risk_id,), invalidate=True)
 
     for cid in control_ids:
         _sql_exec(
@@ -2343,6 +2835,7 @@ async def org_risk_update(
             VALUES (?, ?)
             """,
             (risk_id, cid),
+            invalidate=True,
         )
 
     return JSONResponse({"ok": True})
@@ -2357,8 +2850,8 @@ def org_risk_delete(request: Request, org_id: int, risk_id: int):
     if not risk:
         raise HTTPException(status_code=404, detail="Risk not found for this organisation")
 
-    _sql_exec("DELETE FROM org_controls_risks WHERE org_risk_id = ?", (risk_id,))
-    _sql_exec("DELETE FROM org_risks WHERE org_id = ? AND id = ?", (org_id, risk_id))
+    _sql_exec("DELETE FROM org_controls_risks WHERE org_risk_id = ?", (risk_id,), invalidate=True)
+    _sql_exec("DELETE FROM org_risks WHERE org_id = ? AND id = ?", (org_id, risk_id), invalidate=True)
 
     accepts = (request.headers.get("accept") or "").lower()
     is_ajax = "application/json" in accepts or request.headers.get("x-requested-with") == "fetch"
@@ -2426,6 +2919,7 @@ async def api_tag_item_to_risk(org_id: int, risk_id: int, request: Request):
             VALUES (?, ?)
             """,
             (risk_id, guid),
+            invalidate=True,
         )
         print(f"[tag-item] Linked guid={guid} -> risk_id={risk_id}")
     except Exception as e:
@@ -2642,6 +3136,7 @@ async def org_risk_create(request: Request, org_id: int):
             ),
         )
         new_id = int(cur.lastrowid)
+        bump_data_version(conn)
         conn.commit()
     finally:
         conn.close()
@@ -2713,6 +3208,7 @@ async def api_tag_item_to_risk(org_id: int, risk_id: int, request: Request):
             VALUES (?, ?)
             """,
             (risk_id, guid),
+            invalidate=True,
         )
         print(f"[tag-item] Linked guid={guid} -> risk_id={risk_id}")
     except Exception as e:
@@ -2750,25 +3246,22 @@ router = APIRouter()
 
 @app.get("/controls", response_class=HTMLResponse)
 def controls_page(request: Request):
-    all_controls = _sql_all(
-        """
-        SELECT
-          c.*,
-          s.name AS site_name,
-          o.name AS org_name
-        FROM org_controls c
-        LEFT JOIN sites s ON s.id = c.site_id
-        LEFT JOIN orgs  o ON o.id = c.org_id
-        ORDER BY o.name, s.name, c.code, c.title
-        """
-    )
-    return render(
-        request,
-        "controls.html",
-        {
-            "controls": all_controls,
-        },
-    )
+    def context() -> dict:
+        all_controls = _sql_all(
+            """
+            SELECT
+              c.*,
+              s.name AS site_name,
+              o.name AS org_name
+            FROM org_controls c
+            LEFT JOIN sites s ON s.id = c.site_id
+            LEFT JOIN orgs  o ON o.id = c.org_id
+            ORDER BY o.name, s.name, c.code, c.title
+            """
+        )
+        return {"controls": all_controls}
+
+    return _cached_page(request, cache_key("/controls"), "controls.html", context)
 
 
 @router.get("/controls/{cid}", response_class=HTMLResponse)
@@ -2795,7 +3288,7 @@ def control_detail(request: Request, cid: int):
         FROM user_item_tags t
         JOIN items i ON i.guid = t.item_guid
         WHERE t.org_control_id = ?
-        ORDER BY i.published_at DESC
+        ORDER BY i.published_ts DESC, i.guid DESC
         LIMIT 100
         """,
         (cid,),
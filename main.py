@@ -2,19 +2,33 @@
 from __future__ import annotations
 
 import argparse
+import os
 from datetime import datetime, timezone, timedelta
 
 from storage.db import DB
 from summariser.model import summarise_and_tag
-from scraper.ofgem import collect_items
+from scraper import cleaner, http_cache
+from scraper.ofgem import MAX_WORKERS, collect_items
 from scraper.ofgem_publications import scrape_ofgem_publications
+from scraper.pipeline import Pipeline, Stage
+
+INGEST_BATCH = int(os.getenv("INGEST_BATCH", "500"))
+# Concurrent summarise_and_tag calls, and the bound on each stage's input queue
+SUMMARISE_WORKERS = int(os.getenv("SUMMARISE_WORKERS", "4"))
+PIPELINE_QUEUE = int(os.getenv("PIPELINE_QUEUE", "100"))
 
 
 def _iso_now() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
-def run(days_since: int | None = None) -> None:
+def run(
+    days_since: int | None = None,
+    workers: int | None = None,
+    refresh: bool = False,
+    summarise_workers: int | None = None,
+    clean_workers: int | None = None,
+) -> None:
     db = DB("ofgem.db")
 
     since_dt = None
@@ -25,14 +39,30 @@ def run(days_since: int | None = None) -> None:
     saved = skipped = failed = 0
 
     # ---------------------------
-    # 1) Existing scraper (RSS/GOV.UK style)
+    # 1) Existing scraper (RSS/GOV.UK style), as a staged pipeline:
+    #    fetch + clean → filter/dedupe → summarise → persist
+    #    Fetch and clean run inside collect_items (thread pools for sources and
+    #    entry pages, scraper.cleaner's process pool for HTML) because the
+    #    per-source filters need the cleaned text; the "fetch+clean" row of the
+    #    report covers both, and the collector's own stats are printed with it.
     # ---------------------------
     print("[ofgem] collecting items…")
-    for item in collect_items():
+    stats: dict = {}
+    fetch_workers = MAX_WORKERS if workers is None else max(1, int(workers))
+    clean_pool = cleaner.shared_pool(clean_workers)
+    # Conditional GETs (ETag / Last-Modified) unless a full refresh is asked for.
+    # This run's validators are only stored once its items are (see below).
+    cache = None if refresh else http_cache.DeferredValidators(db)
+    # Known guids/links are loaded once so stored entries are never re-fetched
+    known = db.known_keys()
+
+    def keep(item: dict) -> dict | None:
+        # Single worker: owns the `known` set
+        nonlocal skipped
         guid = item.get("guid") or item.get("link")
         if not guid:
             skipped += 1
-            continue
+            return None
 
         # Skip if older than cutoff
         if since_dt and item.get("published_at"):
@@ -40,15 +70,18 @@ def run(days_since: int | None = None) -> None:
                 pub = datetime.fromisoformat(str(item["published_at"]).replace("Z", "+00:00"))
                 if pub < since_dt:
                     skipped += 1
-                    continue
+                    return None
             except Exception:
                 pass  # keep if date is malformed
 
-        # Skip if already saved
-        if db.exists(guid):
+        # Skip if already saved (or queued earlier in this run)
+        if guid in known or (item.get("link") and item["link"] in known):
             skipped += 1
-            continue
+            return None
+        known.update(k for k in (guid, item.get("link")) if k)
+        return dict(item, guid=guid)
 
+    def summarise(item: dict) -> dict:
         title = (item.get("title") or "").strip()
         source = (item.get("source") or "").strip()
         fulltext = item.get("content") or ""
@@ -57,12 +90,13 @@ def run(days_since: int | None = None) -> None:
         try:
             summary, tags = summarise_and_tag(fulltext, title=title, source=source)
         except Exception as e:
-            # Be resilient
+            # Be resilient: save the item unsummarised
+            print(f"[summarise] ⚠️ {title[:60]!r}: {e}")
             summary, tags = "", []
 
         # Normalise payload and keep tags as a LIST (important!)
-        payload = {
-            "guid": guid,
+        return {
+            "guid": item["guid"],
             "source": source or "UNKNOWN",
             "title": title,
             "link": item.get("link") or "",
@@ -72,28 +106,74 @@ def run(days_since: int | None = None) -> None:
             "tags": list(sorted({t.strip() for t in (tags or []) if t.strip()})),
         }
 
-        try:
-            db.upsert_item(payload)
-            saved += 1
-            print(f"+ Saved: {title[:90]}")
-        except Exception as e:
-            failed += 1
-            print(f"! Failed to save '{title[:90]}': {e}")
+    # Buffered; written in batches (one transaction per batch), the rest when the block exits
+    with db.ingest(batch_size=INGEST_BATCH) as ingest:
+
+        def persist(payload: dict) -> dict:
+            # Single worker: owns the ingest buffer
+            ingest.add(payload)
+            print(f"+ Queued: {payload['title'][:90]}")
+            return payload
+
+        pipeline = Pipeline(
+            collect_items(workers=fetch_workers, stats=stats, cache=cache, known=known),
+            [
+                Stage("filter", keep),
+                Stage("summarise", summarise, workers=summarise_workers or SUMMARISE_WORKERS),
+                Stage("persist", persist),
+            ],
+            queue_size=PIPELINE_QUEUE,
+            source_name="fetch+clean",
+            source_workers=fetch_workers,
+        )
+        pipeline.run()
+
+    saved += ingest.saved
+    failed += ingest.failed
+
+    # Items are committed: a 304 next run can't hide anything unsaved now
+    if cache is not None:
+        if ingest.failed:
+            print(f"[ofgem] {ingest.failed} items failed to save; feed validators not stored")
+        else:
+            cache.save()
 
     # ---------------------------
     # 2) New Ofgem publications library crawler
     # ---------------------------
     print("[ofgem_publications] crawling library pages…")
-    k, s = scrape_ofgem_publications(db, since=since_dt)
+    k, s = scrape_ofgem_publications(db, since=since_dt, conditional=not refresh, known=known)
     print(f"[ofgem_publications] kept {k} · skipped {s}")
     saved += k
     skipped += s
 
+    skipped += stats.get("known_skipped", 0)
+
+    pipeline.report()
+
+    # The fetch+clean stage's detail, from collect_items
+    clean = f"{clean_pool.workers} clean processes" if clean_pool.workers else "cleaning inline"
+    print(
+        f"  fetch+clean: {fetch_workers} fetch threads, {clean} · "
+        f"{stats.get('known_skipped', 0)} already-stored entries skipped before fetching "
+        f"({stats.get('fetches_saved', 0)} article fetches saved)"
+    )
+    timings = stats.get("timings") or {}
+    if timings:
+        print("\n[ofgem] per-source fetch time:")
+        for src, secs in sorted(timings.items(), key=lambda kv: kv[1], reverse=True):
+            print(f"  {src:<22} {secs:6.1f}s")
+
     print(f"\nDone. Saved: {saved} · Skipped: {skipped} · Failed: {failed}")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch and summarise Ofgem/energy sector feeds")
     parser.add_argument("--since", type=int, help="Only save items published in the last N days")
+    parser.add_argument("--workers", type=int, help="Sources fetched in parallel (1 = sequential; default SCRAPER_WORKERS)")
+    parser.add_argument("--refresh", action="store_true", help="Ignore stored ETag/Last-Modified and re-download every page")
+    parser.add_argument("--summarise-workers", type=int, help="Concurrent summarise calls (default SUMMARISE_WORKERS)")
+    parser.add_argument("--clean-workers", type=int, help="Processes cleaning HTML (0 = inline; default SCRAPER_CLEAN_WORKERS)")
     args = parser.parse_args()
-    run(days_since=args.since)
+    run(days_since=args.since, workers=args.workers, refresh=args.refresh,
+        summarise_workers=args.summarise_workers, clean_workers=args.clean_workers)
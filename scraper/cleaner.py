@@ -0,0 +1,153 @@
+# scraper/cleaner.py
+"""
+HTML -> plain text for scraped articles, optionally on a process pool.
+
+clean_html() is the old ofgem._clean_text: parse, drop page chrome (scripts,
+nav, cookie banners, search boxes...), flatten to text, strip UI phrases.
+It is CPU-bound and used to run on the collector threads for every entry.
+CleanPool moves it onto worker processes. The collectors keep fetching
+while pages are cleaned; small fragments such as feed summaries are still
+cleaned inline, because the IPC would cost more than the parse.
+
+Settings:
+- SCRAPER_CLEAN_WORKERS: worker processes (0 = clean inline, the default).
+- SCRAPER_HTML_PARSER: "html.parser" (default) or "lxml", which is faster.
+  Its text can differ slightly on malformed markup.
+- SCRAPER_CLEAN_INLINE_BYTES: below this size HTML is cleaned in the
+  calling thread.
+
+Workers use the "spawn" start method, so they never inherit the
+collectors' threads or locks. This module keeps its imports light, so a
+spawned worker starts quickly. Compare parsers and worker counts with
+`python -m tools.bench_clean`.
+"""
+
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, List, Optional
+
+from bs4 import BeautifulSoup
+
+CLEAN_WORKERS = int(os.getenv("SCRAPER_CLEAN_WORKERS", "0"))
+HTML_PARSER = os.getenv("SCRAPER_HTML_PARSER", "html.parser")
+INLINE_BYTES = int(os.getenv("SCRAPER_CLEAN_INLINE_BYTES", "4096"))
+
+# Everything dropped before flattening, as one selector list (one tree walk)
+_DROP_SELECTOR = ", ".join([
+    "script", "style", "noscript",
+    "header", "footer", "nav", "aside",
+    "[role='navigation']", "[role='search']",
+    ".cookie", ".cookie-banner", "#cookie-banner",
+    ".search", "#search", ".sr-only", ".skip-link",
+    "form[role='search']",
+])
+_UI_PHRASES = re.compile(r"(skip to main content|sign in|register|search|toggle menu|show/hide menu)", re.I)
+_SPACES = re.compile(r"\s+")
+
+
+def _parser(name: Optional[str]) -> str:
+    name = name or HTML_PARSER
+    if name == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except Exception:
+            return "html.parser"
+    return name
+
+
+def clean_html(html: str, parser: Optional[str] = None) -> str:
+    if not isinstance(html, str):
+        return ""
+    soup = BeautifulSoup(html or "", _parser(parser))
+    for t in soup.select(_DROP_SELECTOR):
+        # Children of an element already dropped come back too
+        if not t.decomposed:
+            t.decompose()
+    text = soup.get_text(separator=" ")
+    text = _UI_PHRASES.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def _clean_batch(htmls: List[str], parser: Optional[str]) -> List[str]:
+    return [clean_html(h, parser) for h in htmls]
+
+
+class CleanPool:
+    """
+    clean_html() on `workers` processes. submit() returns a Future;
+    with workers <= 0 (or for small inputs) the work is done inline and
+    an already-completed Future is returned, so callers need one code path.
+    """
+
+    def __init__(self, workers: int = CLEAN_WORKERS, parser: Optional[str] = None,
+                 inline_bytes: int = INLINE_BYTES) -> None:
+        self.workers = max(0, int(workers))
+        self.parser = _parser(parser)
+        self.inline_bytes = inline_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def submit(self, html: str) -> Future:
+        if self.workers <= 0 or len(html or "") < self.inline_bytes:
+            fut: Future = Future()
+            try:
+                fut.set_result(clean_html(html, self.parser))
+            except Exception as e:
+                fut.set_exception(e)
+            return fut
+        return self._executor().submit(clean_html, html, self.parser)
+
+    def map(self, htmls: Iterable[str], chunksize: int = 8) -> List[str]:
+        htmls = list(htmls)
+        if self.workers <= 0:
+            return _clean_batch(htmls, self.parser)
+        chunks = [htmls[i:i + chunksize] for i in range(0, len(htmls), chunksize)]
+        out: List[str] = []
+        for part in self._executor().map(_clean_batch, chunks, [self.parser] * len(chunks)):
+            out.extend(part)
+        return out
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+
+_shared: Optional[CleanPool] = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool(workers: Optional[int] = None) -> CleanPool:
+    """
+    The process-wide pool used by the scrapers (started on first use).
+    `workers` sizes it on that first call (default SCRAPER_CLEAN_WORKERS).
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = CleanPool(CLEAN_WORKERS if workers is None else workers)
+        return _shared
+
+
+@atexit.register
+def shutdown_shared_pool() -> None:
+    global _shared
+    with _shared_lock:
+        if _shared is not None:
+            _shared.shutdown()
+            _shared = None
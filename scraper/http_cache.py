@@ -0,0 +1,116 @@
+# scraper/http_cache.py
+"""
+Conditional GET support for the scrapers.
+
+ETag / Last-Modified validators are kept per URL in the `http_cache` table
+of ofgem.db (see storage.db.DB). Requests for a URL we've seen before send
+If-None-Match / If-Modified-Since; a 304 reply means "unchanged since the last
+run" and callers skip parsing it entirely.
+
+Separately, known_kind() / remember_kind() keep what each entry link served
+last time ("html" or "pdf", table `url_kinds`). That memo never makes a
+request conditional, so it can't leave an entry without a body.
+
+`db` may be None everywhere, in which case requests are unconditional.
+
+Wrap the DB in DeferredValidators when the pages' contents are saved later
+(the feeds' items go through an ingest session): validators from this run are
+held back until save() is called, so a crash before the items are stored
+can't leave a validator that makes the next run skip them with a 304.
+"""
+
+from __future__ import annotations
+
+import threading
+
+
+def conditional_headers(db, url: str) -> dict:
+    """Extra request headers for a conditional GET of `url`."""
+    if db is None:
+        return {}
+    try:
+        v = db.get_http_validators(url)
+    except Exception:
+        return {}
+    if not v:
+        return {}
+    headers = {}
+    if v.get("etag"):
+        headers["If-None-Match"] = v["etag"]
+    if v.get("last_modified"):
+        headers["If-Modified-Since"] = v["last_modified"]
+    return headers
+
+
+def remember(db, url: str, resp) -> None:
+    """Store the validators from a 200 response (no-op if the server sent none)."""
+    if db is None or resp.status_code != 200:
+        return
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if not (etag or last_modified):
+        return
+    try:
+        db.save_http_validators(url, etag, last_modified)
+    except Exception as e:
+        print(f"[http_cache] could not store validators for {url}: {e}")
+
+
+def known_kind(db, url: str) -> str:
+    """What `url` served when last probed: "html", "pdf" or "" if unknown."""
+    if db is None:
+        return ""
+    try:
+        return db.get_url_kind(url) or ""
+    except Exception:
+        return ""
+
+
+def remember_kind(db, url: str, kind: str) -> None:
+    if db is None:
+        return
+    try:
+        db.save_url_kind(url, kind)
+    except Exception as e:
+        print(f"[http_cache] could not store the kind of {url}: {e}")
+
+
+
+class DeferredValidators:
+    """
+    Stands in for the DB as a `cache`: reads and the kind memo go straight to
+    `db`, but validators from 200 replies are held until save().
+    """
+
+    def __init__(self, db) -> None:
+        self.db = db
+        self.path = getattr(db, "path", None)
+        self._held: dict[str, tuple[str | None, str | None]] = {}
+        self._lock = threading.Lock()
+
+    def get_http_validators(self, url: str):
+        return self.db.get_http_validators(url)
+
+    def save_http_validators(self, url: str, etag: str | None, last_modified: str | None) -> None:
+        with self._lock:
+            self._held[url] = (etag, last_modified)
+
+    def get_url_kind(self, url: str):
+        return self.db.get_url_kind(url)
+
+    def save_url_kind(self, url: str, kind: str) -> None:
+        self.db.save_url_kind(url, kind)
+
+    def save(self, urls=None) -> int:
+        """Store the held validators (only those for `urls`, if given); returns how many."""
+        with self._lock:
+            wanted = self._held.keys() if urls is None else self._held.keys() & set(urls)
+            held = {url: self._held.pop(url) for url in list(wanted)}
+        stored = 0
+        for url, (etag, last_modified) in held.items():
+            try:
+                self.db.save_http_validators(url, etag, last_modified)
+                stored += 1
+            except Exception as e:
+                print(f"[http_cache] could not store validators for {url}: {e}")
+        return stored
@@ -0,0 +1,128 @@
+# scraper/http_client.py
+"""
+Shared HTTP client for the scrapers and PDF fetcher.
+
+- One pooled requests.Session (keep-alive, per-host connection pools).
+- Shared default headers and timeouts.
+- tenacity retry with exponential backoff on connection errors, timeouts
+  and 429/5xx responses.
+- A per-host concurrency limit so parallel collectors stay polite.
+- Optional conditional GET via scraper.http_cache (pass the DB as `cache`).
+
+Tune with HTTP_TIMEOUT, HTTP_RETRIES, HTTP_POOL_SIZE and SCRAPER_PER_HOST.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from scraper import http_cache
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-GB,en;q=0.9",
+}
+
+TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "25"))
+RETRIES = max(1, int(os.getenv("HTTP_RETRIES", "3")))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+PER_HOST_LIMIT = int(os.getenv("SCRAPER_PER_HOST", "2"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# --- session -----------------------------------------------------------------
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def session() -> requests.Session:
+    """The process-wide pooled session (created on first use)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            s.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=max(POOL_SIZE, PER_HOST_LIMIT))
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+
+# --- per-host limit ----------------------------------------------------------
+_host_slots: dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+
+
+def host_slot(url: str) -> threading.BoundedSemaphore:
+    """Semaphore limiting concurrent requests to the host of `url`."""
+    host = (urlparse(url).netloc or "").lower()
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(max(1, PER_HOST_LIMIT))
+        return slot
+
+
+# --- requests ----------------------------------------------------------------
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code in RETRY_STATUSES
+    return False
+
+
+@retry(
+    retry=retry_if_exception(_is_retryable),
+    stop=stop_after_attempt(RETRIES),
+    wait=wait_random_exponential(multiplier=1, max=20),
+    reraise=True,
+)
+def _send(method: str, url: str, **kwargs) -> requests.Response:
+    # Only hold the host slot for the request itself, not the backoff wait
+    with host_slot(url):
+        resp = session().request(method, url, **kwargs)
+    if resp.status_code in RETRY_STATUSES:
+        resp.close()
+        raise requests.HTTPError(f"{resp.status_code} for {url}", response=resp)
+    return resp
+
+
+def request(method: str, url: str, *, headers: dict | None = None, timeout: float | None = None,
+            cache=None, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared session with retry/backoff.
+
+    With a validator `cache` (a storage.db.DB) a GET is conditional: callers
+    should treat status 304 as "unchanged". Validators from 200 replies are
+    stored automatically (or held, if `cache` is an http_cache.DeferredValidators).
+    """
+    hdrs = dict(headers or {})
+    if cache is not None and method.upper() == "GET":
+        hdrs.update(http_cache.conditional_headers(cache, url))
+    kwargs.setdefault("allow_redirects", True)
+    resp = _send(method, url, headers=hdrs, timeout=timeout or TIMEOUT, **kwargs)
+    if cache is not None:
+        http_cache.remember(cache, url, resp)
+    return resp
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def head(url: str, **kwargs) -> requests.Response:
+    return request("HEAD", url, **kwargs)
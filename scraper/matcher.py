@@ -0,0 +1,154 @@
+# scraper/matcher.py
+"""
+Precompiled keyword / regex matchers for scraper filters and topic tags.
+
+The rule tables (ofgem.FILTERS, ofgem.TOPIC_RULES, summariser.model.RULES)
+are compiled once at import, per tag (and per source include/exclude list):
+
+- literal patterns are lower-cased once into a tuple checked with `in`;
+- regex patterns are joined into one precompiled alternation.
+
+A single combined regex per tag (or a trie-shaped one) was measured too:
+for keyword lists this small, CPython's substring search beats any regex
+scan, so only the real regexes go through `re`.
+
+Matching semantics are the same as the old per-pattern loops:
+- text is lower-cased once (`text_blob`);
+- literal patterns are plain substrings;
+- which patterns are regexes depends on the rule table: FILTERS marks them
+  with a "re:" prefix, TOPIC_RULES was character-sniffed, RULES has none.
+  Invalid regexes are ignored, as before.
+
+Benchmark against the old loops with `python -m tools.bench_matcher`.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+RegexOf = Callable[[str], Optional[str]]
+
+
+def text_blob(title: str, body: str) -> str:
+    """The lower-cased text every rule is matched against."""
+    return f"{title or ''}\n{body or ''}".lower()
+
+
+# --- how each rule table marks regexes ------------------------------------------
+def literal(pattern: str) -> Optional[str]:
+    """Every pattern is a plain substring."""
+    return None
+
+
+def prefixed_regex(pattern: str) -> Optional[str]:
+    """FILTERS style: 're:<regex>' (prefix in either case), otherwise literal."""
+    if pattern.startswith("re:") or pattern.startswith("RE:"):
+        return pattern.split(":", 1)[1]
+    return None
+
+
+_SNIFF_CHARS = r"[]()?*+{}|\b"
+
+
+def sniffed_regex(pattern: str) -> Optional[str]:
+    """TOPIC_RULES style: treated as a regex if it looks like one."""
+    if pattern.startswith(r"\b") or any(ch in pattern for ch in _SNIFF_CHARS):
+        return pattern
+    return None
+
+
+# --- compilation -----------------------------------------------------------------
+_REGEX_META = set(".^$*+?{}[]\\|()")
+_ESCAPE_RE = re.compile(r"\\.")
+
+
+class Rule:
+    """Compiled form of one pattern list: literal substrings + one regex."""
+
+    __slots__ = ("patterns", "regex_of", "words", "regex")
+
+    def __init__(self, patterns: Iterable[str], regex_of: RegexOf = literal) -> None:
+        self.patterns = list(patterns)
+        self.regex_of = regex_of
+        words: List[str] = []
+        regexes: List[str] = []
+        for pat in self.patterns:
+            rx = regex_of(pat)
+            if rx is None or not any(ch in rx for ch in _REGEX_META):
+                # Literal, or a "regex" without metacharacters (e.g. sniffed
+                # because it contains a "b"): a substring either way.
+                words.append((pat if rx is None else rx).lower())
+                continue
+            try:
+                re.compile(rx)
+            except re.error as e:
+                print(f"! matcher: ignoring invalid regex {pat!r}: {e}")
+                continue
+            regexes.append(f"(?:{rx})")
+        self.words = tuple(dict.fromkeys(words))
+        self.regex = None
+        if regexes:
+            joined = "|".join(regexes)
+            # The text is already lower-case, so IGNORECASE (noticeably slower)
+            # only matters when the regex itself has upper-case letters.
+            case_sensitive_bits = _ESCAPE_RE.sub("", joined)
+            flags = re.IGNORECASE if case_sensitive_bits != case_sensitive_bits.lower() else 0
+            self.regex = re.compile(joined, flags)
+
+    def search(self, blob: str) -> bool:
+        for w in self.words:
+            if w in blob:
+                return True
+        return self.regex is not None and self.regex.search(blob) is not None
+
+    def first_hit(self, blob: str) -> Optional[str]:
+        """The first pattern (in rule order) that matches - for tuning rules, not the hot path."""
+        if not self.search(blob):
+            return None
+        return next((p for p in self.patterns if Rule([p], self.regex_of).search(blob)), None)
+
+
+class TagMatcher:
+    """Tags whose patterns occur in a text, in rule-table order."""
+
+    def __init__(self, rules: Mapping[str, Iterable[str]], regex_of: RegexOf = literal) -> None:
+        self._rules: List[Tuple[str, Rule]] = [(tag, Rule(pats, regex_of)) for tag, pats in rules.items()]
+
+    def tags(self, blob: str) -> List[str]:
+        return [tag for tag, rule in self._rules if rule.search(blob)]
+
+    def hits(self, blob: str) -> Dict[str, str]:
+        """{tag: first matching pattern}."""
+        out: Dict[str, str] = {}
+        for tag, rule in self._rules:
+            pat = rule.first_hit(blob)
+            if pat is not None:
+                out[tag] = pat
+        return out
+
+
+class SourceFilter:
+    """Per-source include / exclude lists (the FILTERS table)."""
+
+    def __init__(self, filters: Mapping[str, Mapping[str, Iterable[str]]], regex_of: RegexOf = prefixed_regex) -> None:
+        self._by_source: Dict[str, Tuple[Optional[Rule], Optional[Rule]]] = {}
+        for source, cfg in filters.items():
+            inc = list(cfg.get("include") or [])
+            exc = list(cfg.get("exclude") or [])
+            self._by_source[source] = (
+                Rule(inc, regex_of) if inc else None,
+                Rule(exc, regex_of) if exc else None,
+            )
+
+    def passes(self, source: str, blob: str) -> bool:
+        """Exact-key lookup, like FILTERS.get(source): unknown sources pass."""
+        rule = self._by_source.get(source)
+        if rule is None:
+            return True
+        inc, exc = rule
+        if inc is not None and not inc.search(blob):
+            return False
+        if exc is not None and exc.search(blob):
+            return False
+        return True
@@ -13,11 +13,16 @@ import os
 import re
 import time
 import json
-import requests
+import threading
 import feedparser
 from bs4 import BeautifulSoup
 from dateutil import parser as dateparser
+
+from scraper import cleaner, http_cache, http_client, matcher
+from storage import pdf_cache
+from tools.ai_utils import PDF_MAX_BYTES, PDF_TEXT_MAX_CHARS, pdf_text_from_spool, spool_response
 from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # --- Sources (left key becomes the publisher tag) ----------------------------
 SOURCES = [
@@ -43,12 +48,6 @@ SOURCES = [
     ("rea", "https://www.r-e-a.net/feed/"),
 ]
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Accept-Language": "en-GB,en;q=0.9",
-}
-
 # --- Noise filters: social / shorteners -------------------------------------
 SOCIAL_DOMAINS = (
     "facebook.com", "m.facebook.com", "fb.me",
@@ -184,59 +183,112 @@ TOPIC_RULES = {
 
 BYPASS = os.getenv("BYPASS_FILTERS", "0") == "1"
 
+# Compiled once; see scraper/matcher.py
+SOURCE_FILTER = matcher.SourceFilter(FILTERS, regex_of=matcher.prefixed_regex)
+TOPIC_MATCHER = matcher.TagMatcher(TOPIC_RULES, regex_of=matcher.sniffed_regex)
+
+# --- Concurrency -------------------------------------------------------------
+# Global cap on sources fetched in parallel (1 = the old sequential walk).
+# The per-host request limit lives in scraper.http_client (SCRAPER_PER_HOST).
+MAX_WORKERS = int(os.getenv("SCRAPER_WORKERS", "6"))
+
+_stats_lock = threading.Lock()
+
+def _record_stats(stats: dict | None, src: str, elapsed: float, **counts: int) -> None:
+    """Merge one source's timing and counters into the shared `stats` dict."""
+    if stats is None:
+        return
+    with _stats_lock:
+        stats.setdefault("timings", {})[src] = elapsed
+        for key, n in counts.items():
+            stats[key] = stats.get(key, 0) + n
+
 # --- Core utils --------------------------------------------------------------
 
 def _clean_text(html: str) -> str:
-    if not isinstance(html, str):
-        return ""
-    soup = BeautifulSoup(html or "", "html.parser")
-    for sel in [
-        "script", "style", "noscript",
-        "header", "footer", "nav", "aside",
-        "[role='navigation']", "[role='search']",
-        ".cookie", ".cookie-banner", "#cookie-banner",
-        ".search", "#search", ".sr-only", ".skip-link",
-        "form[role='search']"
-    ]:
-        for t in soup.select(sel):
-            t.decompose()
-    text = soup.get_text(separator=" ")
-    text = re.sub(r"(skip to main content|sign in|register|search|toggle menu|show/hide menu)", " ", text, flags=re.I)
-    return re.sub(r"\s+", " ", text).strip()
-
-def _is_pdf_url(url: str) -> bool:
-    """Return True if the URL points to a PDF (by path or Content-Type)."""
+    return cleaner.clean_html(html)
+
+def _fetch(url: str, cache=None) -> str | None:
+    """
+    GET a page as text through the shared client (pooled, with retries).
+    With a validator `cache` (a storage.db.DB) the request is conditional and
+    None is returned when the server answers 304.
+    """
+    resp = http_client.get(url, cache=cache)
+    if resp.status_code == 304:
+        return None
+    resp.raise_for_status()
+    return resp.text
+
+PDF_PLACEHOLDER = "[PDF document – open the title link to view]"
+MAX_DOCUMENT_BYTES = PDF_MAX_BYTES
+
+def _looks_like_pdf(url: str, content_type: str, first_bytes: bytes = b"") -> bool:
+    return (
+        "pdf" in (content_type or "").lower()
+        or first_bytes.startswith(b"%PDF-")
+        or urlparse(url).path.lower().endswith(".pdf")
+    )
+
+def _fetch_raw(url: str, cache=None) -> tuple[str, str]:
+    """
+    Fetch an entry's linked page with a single streamed GET, without cleaning.
+
+    Returns (kind, payload): ("html", raw markup) for pages, ("text", text)
+    for PDFs (extracted) and anything that needs no cleaning. The
+    Content-Type header (or the %PDF- magic in the first chunk) decides which,
+    and the answer is remembered per URL in the DB passed as `cache`
+    (http_cache.remember_kind). A link already known to be a PDF whose text
+    is in the PDF text cache isn't downloaded again.
+
+    The GET is never conditional: an entry we fetched before may have been
+    filtered out or never saved, and a 304 would leave it with no text. Only
+    feeds and listing pages use validators.
+    """
+    db_path = getattr(cache, "path", None)
+    known = http_cache.known_kind(cache, url)
+    if known == "pdf":
+        hit = pdf_cache.by_url(url, PDF_TEXT_MAX_CHARS, path=db_path)
+        if hit is not None:
+            return "text", hit["text"] or PDF_PLACEHOLDER
+
     try:
-        # Quick check by extension
-        if urlparse(url).path.lower().endswith(".pdf"):
-            return True
-        # HEAD check to confirm content-type
-        h = requests.head(url, headers=HEADERS, timeout=15, allow_redirects=True)
-        ct = (h.headers.get("Content-Type") or "").lower()
-        return "pdf" in ct
+        resp = http_client.get(url, stream=True)
     except Exception:
-        # On any error, be conservative and treat as non-PDF to avoid blocking content
-        return False
-
-def _fetch(url: str, tries: int = 3, backoff: float = 1.6) -> str:
-    last_err = None
-    for i in range(tries):
-        try:
-            resp = requests.get(url, headers=HEADERS, timeout=25)
-            resp.raise_for_status()
-            return resp.text
-        except Exception as e:
-            last_err = e
-            if i < tries - 1:
-                time.sleep(backoff ** i)
-    raise last_err
-
-def _extract_article(url: str) -> str:
+        return "text", ""
     try:
-        html = _fetch(url)
-        return _clean_text(html)
+        if resp.status_code >= 400:
+            return "text", ""
+
+        # Spooled to a temp file past 1 MB, hashed while streaming
+        spool, digest = spool_response(resp, MAX_DOCUMENT_BYTES)
+        with spool:
+            head = spool.read(8)
+            spool.seek(0)
+
+            header_ct = (resp.headers.get("Content-Type") or "").lower()
+            kind = "pdf" if _looks_like_pdf(url, header_ct, head) else "html"
+            if kind != known:
+                http_cache.remember_kind(cache, url, kind)
+            if kind == "pdf":
+                # Parsed once per content hash; fall back to the note if it has no text
+                text = pdf_text_from_spool(url, spool, digest, db_path=db_path)
+                return "text", text or PDF_PLACEHOLDER
+            return "html", spool.read().decode(resp.encoding or "utf-8", errors="replace")
     except Exception:
-        return ""
+        return "text", ""
+    finally:
+        resp.close()
+
+def _fetch_entry(url: str, cache, pool: "cleaner.CleanPool"):
+    """_fetch_raw, handing HTML on to the clean pool: returns text, or a Future of it."""
+    kind, payload = _fetch_raw(url, cache=cache)
+    return pool.submit(payload) if kind == "html" else payload
+
+def _fetch_document(url: str, cache=None) -> str:
+    """_fetch_raw + cleaning: the text of an entry's linked page or PDF."""
+    kind, payload = _fetch_raw(url, cache=cache)
+    return _clean_text(payload) if kind == "html" else payload
 
 def _parse_date(dstr):
     if not dstr:
@@ -258,27 +310,10 @@ def _pick_summary(entry) -> str:
                 return val
     return ""
 
-def _match(pattern: str, blob: str) -> bool:
-    if pattern.startswith("re:") or pattern.startswith("re:".upper()):
-        pat = pattern.split(":", 1)[1]
-        try:
-            return re.search(pat, blob, flags=re.IGNORECASE) is not None
-        except re.error:
-            return False
-    return pattern.lower() in blob
-
-def _passes_filters(source: str, title: str, body: str) -> bool:
+def _passes_filters(source: str, title: str, body: str, blob: str | None = None) -> bool:
     if BYPASS:
         return True
-    cfg = FILTERS.get(source, {})
-    inc = cfg.get("include") or []
-    exc = cfg.get("exclude") or []
-    blob = f"{title}\n{body}".lower()
-    if inc and not any(_match(p, blob) for p in inc):
-        return False
-    if exc and any(_match(p, blob) for p in exc):
-        return False
-    return True
+    return SOURCE_FILTER.passes(source, blob if blob is not None else matcher.text_blob(title, body))
 
 # --- HTML scrapers -----------------------------------------------------------
 
@@ -323,13 +358,15 @@ def _find_date_text(node):
         return dt.get("datetime") or dt.get_text(strip=True)
     return None
 
-def _scrape_ico_news(list_url: str, max_pages: int = 2):
+def _scrape_ico_news(list_url: str, max_pages: int = 2, cache=None):
     results, url = [], list_url
     for _ in range(max_pages):
         try:
-            html = _fetch(url)
+            html = _fetch(url, cache=cache)
         except Exception:
             break
+        if html is None:
+            break
         soup = BeautifulSoup(html, "html.parser")
 
         for item in _jsonld_news(soup):
@@ -379,9 +416,11 @@ def _looks_like_page(url: str) -> bool:
     path = urlparse(url).path.lower()
     return any(path.endswith(ext) for ext in (".html", "/")) or path.count("/") >= 3
 
-def _scrape_dcode_list(url: str):
+def _scrape_dcode_list(url: str, cache=None):
     """Scrape only open consultations listed on the official DCode 'open consultations' page."""
-    html = _fetch(url)
+    html = _fetch(url, cache=cache)
+    if html is None:
+        return []
     soup = BeautifulSoup(html, "html.parser")
 
     results = []
@@ -421,8 +460,10 @@ def _scrape_dcode_list(url: str):
     print(f"[dcode_html] filtered to {len(results)} open consultations")
     return results
 
-def _scrape_ena_news(url: str):
-    html = _fetch(url)
+def _scrape_ena_news(url: str, cache=None):
+    html = _fetch(url, cache=cache)
+    if html is None:
+        return
     soup = BeautifulSoup(html, "html.parser")
     for a in soup.select("a[href*='/newsroom/'], a[href*='/all-news-and-updates/'], article a"):
         href = a.get("href")
@@ -438,132 +479,220 @@ def _scrape_ena_news(url: str):
 
 # --- Topic tagging -----------------------------------------------------------
 
-def _topic_tags(title: str, content: str) -> list[str]:
+def _topic_tags(title: str, content: str, blob: str | None = None) -> list[str]:
     """Return a list of topic tags matched against title+content."""
-    import re as _re
-    blob = f"{title or ''}\n{content or ''}".lower()
-    hit = []
-    for tag, patterns in TOPIC_RULES.items():
-        for pat in patterns:
-            if pat.startswith(r"\b") or any(ch in pat for ch in r"[]()?*+{}|\b"):
-                try:
-                    if _re.search(pat, blob, flags=_re.IGNORECASE):
-                        hit.append(tag)
-                        break
-                except Exception:
-                    continue
-            else:
-                if pat.lower() in blob:
-                    hit.append(tag)
-                    break
-    # de-dup while preserving order
-    seen = set()
-    out = []
-    for t in hit:
-        if t not in seen:
-            seen.add(t)
-            out.append(t)
-    return out
+    return TOPIC_MATCHER.tags(blob if blob is not None else matcher.text_blob(title, content))
 
 # --- Main collector ----------------------------------------------------------
 
-def collect_items():
-    for source_name, feed_url in SOURCES:
-        src = (source_name or "").strip().lower()
+def _collect_source(
+    source_name: str,
+    feed_url: str,
+    stats: dict | None = None,
+    cache=None,
+    known: set[str] | frozenset[str] = frozenset(),
+    fetcher: ThreadPoolExecutor | None = None,
+) -> list[dict]:
+    """
+    Fetch one source and return its cleaned, filtered, tagged items.
+    Entries whose guid or link is in `known` are dropped before any work.
+    With a `fetcher` pool, the entries' linked pages are downloaded on it
+    concurrently (the client's per-host limit still applies).
+    """
+    started = time.perf_counter()
+    src = (source_name or "").strip().lower()
+    out: list[dict] = []
+
+    # Route special HTML sources first
+    if src == "ico_html":
+        try:
+            parsed_entries = list(_scrape_ico_news(feed_url, cache=cache))
+            print(f"[{src}] (html) {len(parsed_entries)} entries fetched")
+        except Exception as e:
+            print(f"[{src}] HTML scrape error: {e}")
+            return out
+        base_src = "ico"
 
-        # Route special HTML sources first
-        if src == "ico_html":
-            try:
-                parsed_entries = list(_scrape_ico_news(feed_url))
-                print(f"[{src}] (html) {len(parsed_entries)} entries fetched")
-            except Exception as e:
-                print(f"[{src}] HTML scrape error: {e}")
-                continue
-            base_src = "ico"
+    elif src in ("dcode_mods_html", "dcode_consults_html"):
+        try:
+            parsed_entries = list(_scrape_dcode_list(feed_url, cache=cache))
+            print(f"[{src}] (html) {len(parsed_entries)} entries fetched")
+        except Exception as e:
+            print(f"[{src}] HTML scrape error: {e}")
+            return out
+        base_src = "dcode"
 
-        elif src in ("dcode_mods_html", "dcode_consults_html"):
-            try:
-                parsed_entries = list(_scrape_dcode_list(feed_url))
-                print(f"[{src}] (html) {len(parsed_entries)} entries fetched")
-            except Exception as e:
-                print(f"[{src}] HTML scrape error: {e}")
-                continue
-            base_src = "dcode"
+    elif src == "ena_html":
+        try:
+            parsed_entries = list(_scrape_ena_news(feed_url, cache=cache))
+            print(f"[{src}] (html) {len(parsed_entries)} entries fetched")
+        except Exception as e:
+            print(f"[{src}] HTML scrape error: {e}")
+            return out
+        base_src = "ena"
 
-        elif src == "ena_html":
-            try:
-                parsed_entries = list(_scrape_ena_news(feed_url))
-                print(f"[{src}] (html) {len(parsed_entries)} entries fetched")
-            except Exception as e:
-                print(f"[{src}] HTML scrape error: {e}")
-                continue
-            base_src = "ena"
+    # elif src == "neso_html":
+    #     parsed_entries = list(_scrape_neso_news(feed_url))
+    #     base_src = "neso"
 
-        # elif src == "neso_html":
-        #     parsed_entries = list(_scrape_neso_news(feed_url))
-        #     base_src = "neso"
+    else:
+        # Default: Atom/RSS
+        try:
+            xml = _fetch(feed_url, cache=cache)
+            if xml is None:
+                print(f"[{src}] not modified (304)")
+                _record_stats(stats, src, time.perf_counter() - started)
+                return out
+            d = feedparser.parse(xml)
+            parsed_entries = d.entries
+            print(f"[{src}] {len(parsed_entries)} entries fetched")
+        except Exception as e:
+            print(f"[{src}] Feed error: {e}")
+            return out
+        base_src = src
+
+    # Pass 1: fetch raw bodies (on the fetcher pool if given) and hand HTML to
+    # the clean pool, so pages are cleaned (on worker processes when enabled)
+    # while the next ones download.
+    pool = cleaner.shared_pool()
+    pending: list[tuple[dict, object]] = []
+    skipped = known_skipped = fetches_saved = 0
+    for e in parsed_entries:
+        link = e.get("link")
+        title = (e.get("title") or "").strip()
+        guid = e.get("id") or link or title
+
+        # Already stored: skip before any fetch, HTML parse or filter work
+        if guid in known or (link and link in known):
+            known_skipped += 1
+            if link and not (e.get("summary") or e.get("description")):
+                fetches_saved += 1
+            continue
+
+        # 🚫 Skip social/noise links early
+        if is_social_url(link):
+            skipped += 1
+            # print(f"[skip:{base_src}] social/noise {link}")
+            continue
 
+        summary_html = e.get("summary") or e.get("description") or ""
+        if isinstance(summary_html, str) and summary_html:
+            content = pool.submit(summary_html)
+        elif link:
+            # One streamed GET: PDFs come back as extracted text, HTML is cleaned
+            if fetcher is not None:
+                content = fetcher.submit(_fetch_entry, link, cache, pool)
+            else:
+                content = _fetch_entry(link, cache, pool)
         else:
-            # Default: Atom/RSS
+            content = ""
+        pending.append((e, content))
+
+    # Pass 2: filter and tag, in feed order
+    kept = 0
+    for e, content in pending:
+        # A fetch Future may resolve to a clean Future
+        while not isinstance(content, str):
             try:
-                xml = _fetch(feed_url)
-                d = feedparser.parse(xml)
-                parsed_entries = d.entries
-                print(f"[{src}] {len(parsed_entries)} entries fetched")
-            except Exception as e:
-                print(f"[{src}] Feed error: {e}")
-                continue
-            base_src = src
-
-        kept = skipped = 0
-        for e in parsed_entries:
-            link = e.get("link")
-            title = (e.get("title") or "").strip()
-            guid = e.get("id") or link or title
-            published = (
-                _parse_date(e.get("published"))
-                or _parse_date(e.get("updated"))
-                or _parse_date(e.get("issued"))
-            )
-
-            # 🚫 Skip social/noise links early
-            if is_social_url(link):
-                skipped += 1
-                # print(f"[skip:{base_src}] social/noise {link}")
-                continue
+                content = content.result()
+            except Exception as err:
+                print(f"[{src}] fetch/clean error: {err}")
+                content = ""
+        if not content and (e.get("summary") or e.get("description")) and e.get("link"):
+            # Summary cleaned to nothing: fall back to the linked page, as before
+            content = _fetch_document(e.get("link"), cache=cache)
+
+        link = e.get("link")
+        title = (e.get("title") or "").strip()
+        guid = e.get("id") or link or title
+        published = (
+            _parse_date(e.get("published"))
+            or _parse_date(e.get("updated"))
+            or _parse_date(e.get("issued"))
+        )
+
+        # Filter and tag off the same lower-cased text
+        blob = matcher.text_blob(title, content)
+        if not _passes_filters(base_src, title, content, blob=blob):
+            skipped += 1
+            continue
 
-            summary_html = e.get("summary") or e.get("description") or ""
-            content = _clean_text(summary_html) if isinstance(summary_html, str) and summary_html else ""
-            if not content and link:
-                if _is_pdf_url(link):
-                    # Don’t inline binary; show a simple note so UI stays clean.
-                    content = "[PDF document – open the title link to view]"
-                else:
-                    content = _extract_article(link)
-
-            if not _passes_filters(base_src, title, content):
-                skipped += 1
-                continue
+        # --- Topic tagging ---
+        topics = _topic_tags(title, content, blob=blob)
+
+        # Always include the source tag (as upper-case) alongside topics
+        source_tag = (base_src or "").upper()
+        tags = topics + ([source_tag] if source_tag else [])
+
+        kept += 1
+        out.append({
+            "source": base_src,
+            "link": link,
+            "guid": guid,
+            "title": title,
+            "published_at": published,
+            "content": content,
+            "tags": tags,  # list of topics + source
+        })
 
-            # --- Topic tagging ---
-            topics = _topic_tags(title, content)
-
-            # Always include the source tag (as upper-case) alongside topics
-            source_tag = (base_src or "").upper()
-            tags = topics + ([source_tag] if source_tag else [])
-
-            kept += 1
-            yield {
-                "source": base_src,
-                "link": link,
-                "guid": guid,
-                "title": title,
-                "published_at": published,
-                "content": content,
-                "tags": tags,  # list of topics + source
-            }
-
-        print(f"[{src}] kept {kept} · skipped {skipped}")
+    elapsed = time.perf_counter() - started
+    _record_stats(stats, src, elapsed, known_skipped=known_skipped, fetches_saved=fetches_saved)
+    print(f"[{src}] kept {kept} · skipped {skipped} · known {known_skipped} · {elapsed:.1f}s")
+    return out
+
+
+def collect_items(
+    workers: int | None = None,
+    stats: dict | None = None,
+    cache=None,
+    known: set[str] | frozenset[str] | None = None,
+):
+    """
+    Yield cleaned items from every entry in SOURCES.
+
+    With more than one worker, sources are fetched on a thread pool and each
+    source's items are yielded as soon as that source finishes. Within a
+    source, entry pages are downloaded on a second pool shared by all
+    sources. Both are capped at `workers` threads, and requests at
+    SCRAPER_PER_HOST per host.
+    Per-source wall-clock seconds are recorded in stats["timings"] if given.
+
+    Pass the DB as `cache` to make feed and listing-page requests conditional
+    (ETag / Last-Modified); sources that answer 304 yield nothing. Article and
+    PDF fetches are always unconditional. Wrap it in
+    http_cache.DeferredValidators and call save() once the yielded items are
+    stored, so the validators never run ahead of the data.
+
+    `known` is a set of guids/links already stored (see DB.known_keys());
+    matching entries are dropped up front. stats["known_skipped"] counts them
+    and stats["fetches_saved"] the article downloads that avoided.
+    """
+    workers = MAX_WORKERS if workers is None else int(workers)
+    known = known or frozenset()
+
+    if workers <= 1:
+        for source_name, feed_url in SOURCES:
+            yield from _collect_source(source_name, feed_url, stats, cache, known)
+        return
+
+    pool = ThreadPoolExecutor(max_workers=min(workers, len(SOURCES)), thread_name_prefix="collect")
+    fetcher = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch")
+    try:
+        futures = {
+            pool.submit(_collect_source, source_name, feed_url, stats, cache, known, fetcher): source_name
+            for source_name, feed_url in SOURCES
+        }
+        for fut in as_completed(futures):
+            try:
+                items = fut.result()
+            except Exception as e:
+                print(f"[{futures[fut]}] collector error: {e}")
+                continue
+            yield from items
+    finally:
+        # If the consumer stops early, don't start sources or fetches nobody will read
+        pool.shutdown(wait=False, cancel_futures=True)
+        fetcher.shutdown(wait=False, cancel_futures=True)
 
 # -----------------------------------------------------------------------------
 
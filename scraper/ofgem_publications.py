@@ -1,20 +1,24 @@
 # scraper/ofgem_publications.py
 from __future__ import annotations
 
+import os
 import re
-import time
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Iterable, Optional, Tuple, Dict, Any, List
+from typing import Deque, Iterable, Iterator, Optional, Tuple, Dict, Any, List
 from urllib.parse import urljoin, urlparse, parse_qs, urlencode, urlunparse
 
 import requests
 from bs4 import BeautifulSoup
 
-USER_AGENT = (
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/127.0.0.0 Safari/537.36"
-)
+from scraper import http_cache, http_client
+from tools.ai_pipeline import RateLimiter
+
+# Concurrent page fetches, and requests per second per host (replaces the fixed sleep)
+PUBLICATIONS_WORKERS = int(os.getenv("PUBLICATIONS_WORKERS", "4"))
+PUBLICATIONS_RPS = float(os.getenv("PUBLICATIONS_RPS", "2"))
 
 # You can add more entry points here later
 DEFAULT_START_URLS = [
@@ -26,8 +30,15 @@ DEFAULT_START_URLS = [
 
 # ---------------------------------------------------------------------------
 
-def _get(session: requests.Session, url: str) -> BeautifulSoup:
-    resp = session.get(url, timeout=30)
+def _get(url: str, cache=None) -> Optional[BeautifulSoup]:
+    """
+    Fetch and parse a page via the shared HTTP client. With a validator
+    `cache` (the DB) the request is conditional, and None is returned on 304
+    so the caller can skip the page.
+    """
+    resp = http_client.get(url, timeout=30, cache=cache)
+    if resp.status_code == 304:
+        return None
     resp.raise_for_status()
     return BeautifulSoup(resp.text, "lxml")
 
@@ -160,13 +171,13 @@ def _find_next_page(soup: BeautifulSoup, current_url: str, page_num: int) -> Opt
     return _add_or_set_query(current_url, page=page_num + 1)
 
 
-def _extract_detail_text(session: requests.Session, url: str) -> str:
+def _extract_detail_text(url: str) -> str:
     """
     (Optional) Fetch a detail page and pull some readable text from common containers.
     We keep this conservative so it doesn't break if the template changes.
     """
     try:
-        dp = _get(session, url)
+        dp = _get(url)
     except Exception:
         return ""
 
@@ -188,93 +199,207 @@ def _extract_detail_text(session: requests.Session, url: str) -> str:
 
 # ---------------------------------------------------------------------------
 
+class _Crawler:
+    """
+    Fetching for one crawl: listing and detail pages on a thread pool,
+    spaced per host by a token bucket (no bursts) instead of fixed sleeps.
+    http_client still caps concurrent connections per host.
+    """
+
+    def __init__(self, cache, per_second: float, workers: int) -> None:
+        self.cache = cache
+        self.per_second = per_second
+        self.workers = max(1, int(workers))
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def throttle(self, url: str) -> None:
+        host = (urlparse(url).netloc or "").lower()
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = RateLimiter(self.per_second * 60, burst=1)
+        limiter.acquire()
+
+    def listing(self, url: str) -> Optional[BeautifulSoup]:
+        self.throttle(url)
+        return _get(url, cache=self.cache)
+
+    def detail(self, url: str) -> str:
+        self.throttle(url)
+        return _extract_detail_text(url)
+
+    def pages(self, pool: ThreadPoolExecutor, root: str, max_pages: int) -> Iterator[Tuple[str, BeautifulSoup]]:
+        """
+        Yield (url, soup) for a section's listing pages, in order. When pages
+        are numbered (?page=N) the next `workers` pages are fetched ahead;
+        pages still in flight are cancelled once the caller stops iterating.
+        """
+        url = root
+        soup = self._fetch_or_log(lambda: self.listing(url), url)
+        if soup is None:
+            return
+        yield url, soup
+
+        next_url = _find_next_page(soup, url, 1)
+        if max_pages <= 1 or not next_url or next_url == url:
+            return
+
+        if parse_qs(urlparse(next_url).query).get("page") == ["2"]:
+            ahead: Deque[Tuple[str, Future]] = deque()
+            page = 2
+            try:
+                while True:
+                    while page <= max_pages and len(ahead) < self.workers:
+                        page_url = _add_or_set_query(next_url, page=page)
+                        ahead.append((page_url, pool.submit(self.listing, page_url)))
+                        page += 1
+                    if not ahead:
+                        return
+                    page_url, fut = ahead.popleft()
+                    soup = self._fetch_or_log(fut.result, page_url)
+                    if soup is None:
+                        return
+                    yield page_url, soup
+            finally:
+                for _, fut in ahead:
+                    fut.cancel()
+
+        # Un-numbered "next" links: follow them one by one
+        page = 1
+        while soup is not None and page < max_pages:
+            next_url = _find_next_page(soup, url, page)
+            if not next_url or next_url == url:
+                return
+            page += 1
+            url = next_url
+            soup = self._fetch_or_log(lambda: self.listing(url), url)
+            if soup is not None:
+                yield url, soup
+
+    @staticmethod
+    def _fetch_or_log(fetch, url: str) -> Optional[BeautifulSoup]:
+        try:
+            soup = fetch()
+        except requests.HTTPError as e:
+            print(f"[ofgem_publications] HTTP {e.response.status_code} for {url}")
+            return None
+        except Exception as e:
+            print(f"[ofgem_publications] Error fetching {url}: {e}")
+            return None
+        if soup is None:
+            print(f"[ofgem_publications] not modified (304): {url}")
+        return soup
+
+
 def scrape_ofgem_publications(
     db,
     since: Optional[datetime] = None,
     start_urls: Optional[Iterable[str]] = None,
-    delay_seconds: float = 0.7,
+    delay_seconds: Optional[float] = None,
     fetch_detail: bool = False,
     max_pages: int = 50,
+    conditional: bool = True,
+    workers: Optional[int] = None,
+    known: Optional[set] = None,
+    stop_early: bool = True,
 ) -> Tuple[int, int]:
     """
     Crawl Ofgem 'publications' library pages and upsert items into DB.
 
+    With `conditional`, listing pages are requested with the ETag /
+    Last-Modified stored from the previous run; a section whose page
+    answers 304 hasn't changed and is not re-parsed. New validators are
+    stored after the items are, and only for pages whose cards were all
+    gone through (not pages fetched ahead and then cancelled or left
+    behind by `stop_early`).
+
+    Listing pages are fetched ahead and detail pages (`fetch_detail`)
+    concurrently on `workers` threads (PUBLICATIONS_WORKERS), at most one
+    request per `delay_seconds` per host (default 1 / PUBLICATIONS_RPS).
+    With `stop_early`, cards already stored (`known`, default
+    db.known_keys()) are skipped, and a section stops at the first page
+    whose cards are all known or older than `since`.
+
     Returns (kept_count, skipped_count).
     """
+    cache = http_cache.DeferredValidators(db) if conditional else None
     start_urls = list(start_urls or DEFAULT_START_URLS)
+    per_second = 1.0 / delay_seconds if delay_seconds else PUBLICATIONS_RPS
+    crawler = _Crawler(cache, per_second, workers or PUBLICATIONS_WORKERS)
+    if stop_early and known is None:
+        known = db.known_keys()
+    known = known if stop_early else set()
     kept, skipped = 0, 0
+    consumed: set = set()
+    # Items are buffered and written in batches (one transaction per batch),
+    # the rest when the block exits
+    with (
+        db.ingest() as ingest,
+        ThreadPoolExecutor(max_workers=crawler.workers, thread_name_prefix="publications") as pool,
+    ):
+        for root in start_urls:
+            for url, soup in crawler.pages(pool, root, max_pages):
+                cards = list(_extract_cards(soup, url))
+                if not cards:
+                    # No results on this page; done with this section
+                    consumed.add(url)
+                    break
 
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": USER_AGENT,
-        "Accept": "text/html,application/xhtml+xml",
-    })
-
-    for root in start_urls:
-        page = 1
-        url = root
-
-        while True:
-            try:
-                soup = _get(session, url)
-            except requests.HTTPError as e:
-                print(f"[ofgem_publications] HTTP {e.response.status_code} for {url}")
-                break
-            except Exception as e:
-                print(f"[ofgem_publications] Error fetching {url}: {e}")
-                break
-
-            cards = list(_extract_cards(soup, url))
-            if not cards:
-                # No results on this page; done with this section
-                break
-
-            for c in cards:
-                published_iso = c["published_at"]
-                if not _should_keep(published_iso, since):
-                    skipped += 1
-                    continue
-
-                title = c["title"]
-                link = c["link"]
-                pub_type = c["type"]
-
-                # Optional detail fetch
-                content_text = _extract_detail_text(session, link) if fetch_detail else ""
-
-                # Lightweight tags
-                tags: List[str] = []
-                if pub_type:
-                    tags.append(pub_type)
-                if "small-scale" in root:
-                    tags.append("Small-scale generation")
-
-                item = {
-                    "guid": link,                         # stable unique id
-                    "source": "Ofgem Publications",       # <-- normal source name
-                    "title": title,
-                    "link": link,
-                    "content": content_text,
-                    "summary": "",                        # your summariser can fill this later
-                    "published_at": published_iso or "",
-                    "tags": tags,
-                }
-
-                try:
-                    db.upsert_item(item)
-                    kept += 1
-                except Exception as e:
-                    print(f"! Failed to save '{title}': {e}")
-                    skipped += 1
-
-            # Next page logic
-            if page >= max_pages:
-                break
-            next_url = _find_next_page(soup, url, page)
-            if not next_url or next_url == url:
-                break
-            page += 1
-            url = next_url
-            time.sleep(delay_seconds)
+                fresh = []
+                for c in cards:
+                    if not _should_keep(c["published_at"], since):
+                        skipped += 1
+                    elif c["link"] in known:
+                        skipped += 1
+                    else:
+                        fresh.append(c)
+
+                # Optional detail fetch, concurrently for the whole page
+                details = {c["link"]: pool.submit(crawler.detail, c["link"]) for c in fresh} if fetch_detail else {}
+
+                for c in fresh:
+                    title = c["title"]
+                    link = c["link"]
+                    pub_type = c["type"]
+
+                    content_text = ""
+                    if link in details:
+                        try:
+                            content_text = details[link].result()
+                        except Exception:
+                            content_text = ""
+
+                    # Lightweight tags
+                    tags: List[str] = []
+                    if pub_type:
+                        tags.append(pub_type)
+                    if "small-scale" in root:
+                        tags.append("Small-scale generation")
+
+                    item = {
+                        "guid": link,                         # stable unique id
+                        "source": "Ofgem Publications",       # <-- normal source name
+                        "title": title,
+                        "link": link,
+                        "content": content_text,
+                        "summary": "",                        # your summariser can fill this later
+                        "published_at": c["published_at"] or "",
+                        "tags": tags,
+                    }
+
+                    ingest.add(item)
+                    if stop_early:
+                        known.add(link)
+
+                consumed.add(url)
+                if stop_early and not fresh:
+                    # Everything here is stored already or too old: later pages are older still
+                    print(f"[ofgem_publications] nothing new on {url}; stopping this section")
+                    break
 
+    kept += ingest.saved
+    skipped += ingest.failed
+    if cache is not None and not ingest.failed:
+        cache.save(urls=consumed)
     return kept, skipped
@@ -0,0 +1,160 @@
+# scraper/pipeline.py
+"""
+A small staged producer/consumer pipeline (threads + bounded queues).
+
+    Pipeline(source, [Stage("filter", fn), Stage("summarise", fn, workers=4), ...]).run()
+
+- `source` is any iterable; it is drained on its own thread, so a slow
+  stage never stops the fetchers until its input queue is full. It may do
+  several steps itself (collect_items fetches and cleans on its own pools);
+  its row in the report then covers all of them.
+- Each Stage runs fn(item) on `workers` threads. Returning None drops the
+  item; anything else is passed to the next stage. Exceptions are counted
+  and the item is dropped.
+- Queues are bounded (`queue_size`), so a slow stage applies backpressure
+  upstream instead of buffering the whole run in memory.
+
+run() returns per-stage stats (items in/out/dropped/errors, busy seconds,
+max and mean input-queue depth); report() prints them as a table.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_DONE = object()
+
+
+class Stage:
+    """One step of the pipeline: fn(item) on `workers` threads."""
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], workers: int = 1) -> None:
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers))
+        # filled in while running
+        self.stats: Dict[str, float] = {
+            "in": 0, "out": 0, "dropped": 0, "errors": 0, "busy_s": 0.0,
+            "max_depth": 0, "depth_sum": 0, "depth_samples": 0,
+        }
+
+
+class Pipeline:
+    def __init__(self, source: Iterable[Any], stages: List[Stage], queue_size: int = 100,
+                 source_name: str = "fetch", source_workers: int = 1) -> None:
+        if not stages:
+            raise ValueError("pipeline needs at least one stage")
+        self.source = source
+        self.source_name = source_name
+        # Reported only: a source with its own pools (e.g. collect_items) says how big they are
+        self.source_workers = max(1, int(source_workers))
+        self.stages = stages
+        self.queue_size = max(1, int(queue_size))
+        self.source_stats: Dict[str, float] = {"out": 0, "errors": 0, "busy_s": 0.0}
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    # --- internals --------------------------------------------------------------
+    def _put(self, q: "queue.Queue", item: Any, stage: Optional[Stage]) -> None:
+        q.put(item)
+        if stage is not None and item is not _DONE:
+            depth = q.qsize()
+            with self._lock:
+                s = stage.stats
+                s["max_depth"] = max(s["max_depth"], depth)
+                s["depth_sum"] += depth
+                s["depth_samples"] += 1
+
+    def _feed(self, out_q: "queue.Queue", first: Stage) -> None:
+        t = time.perf_counter()
+        try:
+            for item in self.source:
+                self._put(out_q, item, first)
+                self.source_stats["out"] += 1
+        except Exception as e:
+            self.source_stats["errors"] += 1
+            print(f"[pipeline] {self.source_name} failed: {e}")
+        finally:
+            self.source_stats["busy_s"] = time.perf_counter() - t
+            for _ in range(first.workers):
+                out_q.put(_DONE)
+
+    def _work(self, stage: Stage, in_q: "queue.Queue", out_q: Optional["queue.Queue"],
+              nxt: Optional[Stage], remaining: List[int]) -> None:
+        s = stage.stats
+        while True:
+            item = in_q.get()
+            if item is _DONE:
+                break
+            t = time.perf_counter()
+            try:
+                result = stage.fn(item)
+            except Exception as e:
+                result = None
+                with self._lock:
+                    s["errors"] += 1
+                print(f"[pipeline] {stage.name} error: {e}")
+            busy = time.perf_counter() - t
+            with self._lock:
+                s["in"] += 1
+                s["busy_s"] += busy
+                if result is None:
+                    s["dropped"] += 1
+                else:
+                    s["out"] += 1
+            if result is not None and out_q is not None:
+                self._put(out_q, result, nxt)
+
+        # Last worker of this stage out closes the next stage's input
+        with self._lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last and out_q is not None and nxt is not None:
+            for _ in range(nxt.workers):
+                out_q.put(_DONE)
+
+    # --- public -----------------------------------------------------------------
+    def run(self) -> Dict[str, Dict[str, float]]:
+        started = time.perf_counter()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = [threading.Thread(target=self._feed, args=(queues[0], self.stages[0]),
+                                    name=f"pipe-{self.source_name}", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            nxt = self.stages[i + 1] if i + 1 < len(self.stages) else None
+            out_q = queues[i + 1] if nxt is not None else None
+            remaining = [stage.workers]
+            for w in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(stage, queues[i], out_q, nxt, remaining),
+                    name=f"pipe-{stage.name}-{w}", daemon=True,
+                ))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.elapsed = time.perf_counter() - started
+        return self.stats()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        out: Dict[str, Dict[str, float]] = {self.source_name: dict(self.source_stats, workers=self.source_workers)}
+        for stage in self.stages:
+            s = dict(stage.stats)
+            s["workers"] = stage.workers
+            s["mean_depth"] = s["depth_sum"] / s["depth_samples"] if s["depth_samples"] else 0.0
+            out[stage.name] = s
+        return out
+
+    def report(self) -> None:
+        wall = max(self.elapsed, 1e-9)
+        print(f"\n[pipeline] {wall:.1f}s wall, queue size {self.queue_size}")
+        print(f"  {'stage':<11} {'workers':>7} {'in':>6} {'out':>6} {'drop':>6} {'err':>4} "
+              f"{'items/s':>8} {'busy s':>7} {'q max':>6} {'q mean':>7}")
+        for name, s in self.stats().items():
+            print(
+                f"  {name:<11} {s['workers']:>7} {int(s.get('in', s['out'])):>6} {int(s['out']):>6} "
+                f"{int(s.get('dropped', 0)):>6} {int(s['errors']):>4} {s['out'] / wall:>8.1f} "
+                f"{s['busy_s']:>7.1f} {int(s.get('max_depth', 0)):>6} {s.get('mean_depth', 0.0):>7.1f}"
+            )
@@ -4,8 +4,7 @@ from storage.db import DB
 db = DB("ofgem.db")
 items = db.list_items(limit=100000)
 
-for it in items:
-    # list_items already returns tags as a list; upsert will re-store as JSON
-    db.upsert_item(it)
+# list_items already returns tags as a list; upsert will re-store as JSON
+saved, failed = db.upsert_items(items)
 
-print(f"Normalised {len(items)} rows.")
+print(f"Normalised {saved} rows." + (f" ({failed} failed)" if failed else ""))
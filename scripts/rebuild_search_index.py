@@ -0,0 +1,11 @@
+# scripts/rebuild_search_index.py
+# Create (if needed) and rebuild the items_fts full-text index.
+# Usage: python -m scripts.rebuild_search_index
+import os
+
+from storage.db import DB
+
+db = DB(os.getenv("DB_PATH", "ofgem.db"))
+n = db.rebuild_search_index()
+
+print(f"Rebuilt search index over {n} items.")
@@ -0,0 +1,19 @@
+# scripts/summary_cache.py
+# Show AI summary cache totals, optionally pruning stale / least-used entries.
+# Usage: python -m scripts.summary_cache [--prune] [--max-rows N] [--max-age-days N]
+import argparse
+
+from storage import summary_cache
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--prune", action="store_true")
+ap.add_argument("--max-rows", type=int, default=summary_cache.MAX_ROWS)
+ap.add_argument("--max-age-days", type=int, default=summary_cache.MAX_AGE_DAYS)
+args = ap.parse_args()
+
+if args.prune:
+    n = summary_cache.prune(max_rows=args.max_rows, max_age_days=args.max_age_days)
+    print(f"Pruned {n} cached summaries.")
+
+s = summary_cache.stats()
+print(f"Summary cache: {s['rows']} entries, {s['total_hits']} hits served.")
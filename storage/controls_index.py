@@ -0,0 +1,136 @@
+# storage/controls_index.py
+"""
+In-memory inverted index over the `controls` table for item↔control scoring.
+
+Controls are loaded once; each item is then scored against all of them in a
+single pass over its tokens:
+
+- single-word keywords: token -> [(control, multiplicity)]
+- phrase keywords: distinct phrases, each checked once as a substring
+- control-name tokens: distinct tokens, each checked once as a substring
+
+Scores are identical to the old per-control loop in DB.relink_item_controls:
+keyword overlap / number of single-word keywords, plus 0.5 per matched phrase
+(halved, capped at 1), plus 0.1 if any name token occurs in the text, capped
+at 1.0.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+_WORD = re.compile(r"[A-Za-z0-9]{3,}")
+
+
+def tokenize(text: str) -> set[str]:
+    return {w.lower() for w in _WORD.findall(text or "")}
+
+
+def item_text(item: dict) -> str:
+    """The text an item is scored on: title + best available summary."""
+    return " ".join(
+        [
+            (item.get("title") or "").strip(),
+            (item.get("ai_summary") or item.get("summary") or item.get("content") or "").strip(),
+        ]
+    ).strip()
+
+
+def text_hash(text: str) -> str:
+    """Content hash of the scored text, to skip items that haven't changed."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _keywords(raw: str | None) -> List[str]:
+    try:
+        kws = json.loads(raw or "[]")
+    except json.JSONDecodeError:
+        kws = []
+    return [k for k in (kws or []) if isinstance(k, str) and k.strip()]
+
+
+class ControlIndex:
+    def __init__(self, controls: List[sqlite3.Row | dict]) -> None:
+        self.ids: List[int] = []
+        self.refs: List[str] = []
+        self._n_single: List[int] = []
+        self._by_token: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._by_phrase: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._by_name_token: Dict[str, List[int]] = defaultdict(list)
+        digest = hashlib.sha256()
+
+        for ci, c in enumerate(controls):
+            digest.update(json.dumps([c["id"], c["ref"], c["name"], c["keywords"]]).encode("utf-8"))
+            self.ids.append(int(c["id"]))
+            self.refs.append(c["ref"])
+            kws = _keywords(c["keywords"])
+            # Denominator counts the raw keywords without a space (as before)
+            self._n_single.append(len([k for k in kws if " " not in k]))
+            tokens: Dict[str, int] = defaultdict(int)
+            phrases: Dict[str, int] = defaultdict(int)
+            for kw in kws:
+                k = kw.strip().lower()
+                if " " in k:
+                    phrases[k] += 1
+                else:
+                    tokens[k] += 1
+            for k, n in tokens.items():
+                self._by_token[k].append((ci, n))
+            for k, n in phrases.items():
+                self._by_phrase[k].append((ci, n))
+            for tok in tokenize(c["name"]):
+                self._by_name_token[tok].append(ci)
+
+        # Changes whenever anything that affects scoring changes
+        self.version = digest.hexdigest()
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "ControlIndex":
+        rows = conn.execute("SELECT id, ref, name, keywords FROM controls ORDER BY id").fetchall()
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def score(self, text: str, min_relevance: float = 0.35) -> List[Tuple[int, str, float]]:
+        """[(control_id, ref, score)] for controls scoring >= min_relevance, in id order."""
+        if not text or not self.ids:
+            return []
+        low = text.lower()
+        words = tokenize(low)
+
+        overlap: Dict[int, int] = defaultdict(int)
+        for w in words:
+            for ci, n in self._by_token.get(w, ()):
+                overlap[ci] += n
+        phrase_boost: Dict[int, float] = defaultdict(float)
+        for phrase, hits in self._by_phrase.items():
+            if phrase in low:
+                for ci, n in hits:
+                    phrase_boost[ci] += 0.5 * n
+        bonus: set[int] = set()
+        for tok, cis in self._by_name_token.items():
+            if tok in low:
+                bonus.update(cis)
+
+        min_relevance = float(min_relevance)
+        if min_relevance > 0:
+            candidates = sorted(set(overlap) | set(phrase_boost) | bonus)
+        else:
+            candidates = range(len(self.ids))
+
+        out: List[Tuple[int, str, float]] = []
+        for ci in candidates:
+            base = overlap.get(ci, 0) / max(1, self._n_single[ci])
+            score = min(1.0, base + min(1.0, phrase_boost.get(ci, 0.0) / 2.0))
+            if ci in bonus:
+                score += 0.1
+            score = min(1.0, score)
+            if score >= min_relevance:
+                out.append((self.ids[ci], self.refs[ci], float(score)))
+        return out
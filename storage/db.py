@@ -1,14 +1,220 @@
 # storage/db.py
 from __future__ import annotations
 
+import atexit
 import json
 import os
 import re
 import sqlite3
+import threading
 from contextlib import closing
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional
 
+from dateutil import parser as dateparser
+
+from storage.controls_index import ControlIndex, item_text as controls_item_text, text_hash as controls_text_hash
+
+# ---------------------------------------------------------------------------
+# Connection manager
+#
+# Every connection (scraper, API, tools) gets the same pragmas: WAL so readers
+# never block on a writer, synchronous=NORMAL (safe with WAL), a larger page
+# cache, mmap'd reads and a busy timeout instead of "database is locked".
+# ---------------------------------------------------------------------------
+# ofgem.db at the repo root, as api.server uses it. The caches in storage.*
+# fall back to it (after DB_PATH), so tools run from any directory share them.
+DEFAULT_DB_PATH = str((Path(__file__).resolve().parent.parent / "ofgem.db").resolve())
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "15000"))
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "65536"))
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+
+
+def configure_connection(conn: sqlite3.Connection, foreign_keys: bool = True) -> sqlite3.Connection:
+    """Apply the shared pragmas and row factory to an open connection."""
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.OperationalError:
+        # Another process holds a lock while switching; it's persistent, so
+        # whoever gets there first sets it for everyone.
+        pass
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA foreign_keys={'ON' if foreign_keys else 'OFF'}")
+    return conn
+
+
+def connect(path: str, foreign_keys: bool = True) -> sqlite3.Connection:
+    """A new configured connection. The caller owns it and must close it."""
+    return configure_connection(sqlite3.connect(path), foreign_keys=foreign_keys)
+
+
+def published_epoch(value: Optional[str]) -> int:
+    """
+    UTC epoch seconds for an items.published_at string, whatever format the
+    scraper wrote it in (ISO with an offset or Z, date only, RFC 822...).
+    Naive times count as UTC. 0 means unknown; it sorts last.
+    """
+    s = str(value or "").strip()
+    if not s:
+        return 0
+    try:
+        dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            dt = dateparser.parse(s)
+        except (ValueError, OverflowError):
+            return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    try:
+        return int(dt.timestamp())
+    except (OverflowError, OSError, ValueError):
+        return 0
+
+
+def backfill_published_ts(conn: sqlite3.Connection, batch_size: int = 1000) -> int:
+    """Fill items.published_ts from published_at where it is still 0. Returns rows updated."""
+    rows = conn.execute(
+        "SELECT rowid, published_at FROM items WHERE published_ts = 0 AND COALESCE(published_at, '') <> ''"
+    ).fetchall()
+    updates = [(ts, rowid) for rowid, ts in ((r[0], published_epoch(r[1])) for r in rows) if ts]
+    for i in range(0, len(updates), batch_size):
+        conn.executemany("UPDATE items SET published_ts = ? WHERE rowid = ?", updates[i:i + batch_size])
+    return len(updates)
+
+
+def data_version(conn: sqlite3.Connection) -> int:
+    """
+    Counter bumped by every write to items and the org/risk/control tables.
+    The API's response cache keys on it, and it lives in the database so
+    the scraper's writes from another process invalidate the cache too.
+    """
+    try:
+        row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0]) if row else 0
+
+
+def bump_data_version(conn: sqlite3.Connection) -> None:
+    """Increment data_version (inside the caller's transaction, if any)."""
+    sql = (
+        "INSERT INTO data_version (id, version) VALUES (1, 1) "
+        "ON CONFLICT(id) DO UPDATE SET version = version + 1"
+    )
+    try:
+        conn.execute(sql)
+    except sqlite3.OperationalError:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS data_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)"
+        )
+        conn.execute(sql)
+
+
+_local = threading.local()
+_pool: list[tuple[threading.Thread, sqlite3.Connection]] = []
+_pool_lock = threading.Lock()
+
+
+def pooled_connection(path: str, foreign_keys: bool = True) -> sqlite3.Connection:
+    """
+    The calling thread's long-lived connection to `path`.
+
+    Connections are reused for the life of the thread and closed at exit (or
+    once their thread has finished), so don't close the returned object.
+    """
+    key = (os.path.abspath(path), bool(foreign_keys))
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(key)
+    if conn is None:
+        # check_same_thread=False only so close_pooled_connections() can close
+        # it from the main thread; it is never shared between live threads.
+        conn = configure_connection(
+            sqlite3.connect(path, check_same_thread=False), foreign_keys=foreign_keys
+        )
+        conns[key] = conn
+        with _pool_lock:
+            _prune_dead_threads()
+            _pool.append((threading.current_thread(), conn))
+    return conn
+
+
+def _prune_dead_threads() -> None:
+    alive = []
+    for thread, conn in _pool:
+        if thread.is_alive():
+            alive.append((thread, conn))
+        else:
+            try:
+                conn.close()
+            except Exception:
+                pass
+    _pool[:] = alive
+
+
+def close_pooled_connections() -> None:
+    """Close every pooled connection (lets SQLite checkpoint and drop the WAL)."""
+    with _pool_lock:
+        for _, conn in _pool:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        _pool.clear()
+    _local.__dict__.pop("conns", None)
+
+
+atexit.register(close_pooled_connections)
+
+
+def _link_version(index: ControlIndex, min_relevance: float) -> str:
+    """What link_state.controls_version records: the controls and the threshold."""
+    return f"{index.version}:{float(min_relevance)}"
+
+
+class IngestSession:
+    """
+    Buffers items and writes them through DB.upsert_items in batches.
+
+    Everything still buffered is flushed when the `with` block exits;
+    `saved` / `failed` hold the running totals.
+    """
+
+    def __init__(self, db: "DB", batch_size: int = 500) -> None:
+        self.db = db
+        self.batch_size = max(1, int(batch_size))
+        self.saved = 0
+        self.failed = 0
+        self._buffer: List[Dict[str, Any]] = []
+
+    def add(self, item: Dict[str, Any]) -> None:
+        self._buffer.append(item)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        buffered, self._buffer = self._buffer, []
+        saved, failed = self.db.upsert_items(buffered, batch_size=self.batch_size)
+        self.saved += saved
+        self.failed += failed
+
+    def __enter__(self) -> "IngestSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.flush()
+
 
 class DB:
     def __init__(self, path: str = "ofgem.db") -> None:
@@ -27,12 +233,9 @@ class DB:
 
     # --- connections --------------------------------------------------------
     def _conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.path)
-        conn.row_factory = sqlite3.Row
-        # Enforce FK constraints
-        with conn:
-            conn.execute("PRAGMA foreign_keys=ON")
-        return conn
+        # Thread-local pooled connection with FK constraints enforced.
+        # `with self._conn() as conn` commits / rolls back but doesn't close.
+        return pooled_connection(self.path, foreign_keys=True)
 
     # --- schema -------------------------------------------------------------
     def _has_column(self, cur: sqlite3.Cursor, table: str, col: str) -> bool:
@@ -70,9 +273,78 @@ class DB:
                 cur.execute("ALTER TABLE items ADD COLUMN ai_summary TEXT")
             if "ai_summary_updated_at" not in cols:
                 cur.execute("ALTER TABLE items ADD COLUMN ai_summary_updated_at TEXT")
+            if "published_ts" not in cols:
+                # Canonical sort key: published_at is stored in mixed formats, and
+                # ordering by datetime(published_at) can't use an index
+                cur.execute("ALTER TABLE items ADD COLUMN published_ts INTEGER NOT NULL DEFAULT 0")
+                n = backfill_published_ts(conn)
+                print(f"[schema] items.published_ts added ({n} rows backfilled)")
+            if "updated_at" not in cols:
+                # Last time the row changed (insert, re-scrape with new data, AI summary);
+                # feeds use it for incremental syncs (?updated_since=)
+                cur.execute("ALTER TABLE items ADD COLUMN updated_at TEXT")
+                cur.execute(
+                    "UPDATE items SET updated_at = ? WHERE updated_at IS NULL",
+                    (datetime.now(timezone.utc).isoformat(),),
+                )
 
             cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_items_guid ON items(guid)")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_items_published ON items(published_at)")
+            # List order (newest first) and the feeds' keyset cursor: (published_ts, guid)
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_items_published_ts ON items(published_ts, guid)")
+            cur.execute("DROP INDEX IF EXISTS idx_items_published_guid")
+
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_items_source ON items(source)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_items_updated ON items(updated_at)")
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS data_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)"
+            )
+            # AI summaries are written by several tools with plain UPDATEs
+            cur.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS items_updated_ai_summary
+                AFTER UPDATE OF ai_summary ON items
+                WHEN new.ai_summary IS NOT old.ai_summary BEGIN
+                  UPDATE items SET updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')
+                  WHERE rowid = new.rowid;
+                END
+                """
+            )
+
+            # ------------------- normalised tags -------------------
+            self._init_item_tags(cur)
+
+            # ------------------- full-text search (FTS5) -------------------
+            self._init_search_index(cur)
+
+            # ------------------- HTTP validators (conditional GET) -------------------
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    checked_at TEXT NOT NULL
+                )
+                """
+            )
+            if self._has_column(cur, "http_cache", "content_type"):
+                # Superseded by url_kinds (kept apart from the validators)
+                try:
+                    cur.execute("ALTER TABLE http_cache DROP COLUMN content_type")
+                except sqlite3.OperationalError:
+                    pass  # SQLite < 3.35: the column just stays unused
+
+            # What an entry link served last time (html / pdf), remembered across runs
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS url_kinds (
+                    url TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    checked_at TEXT NOT NULL
+                )
+                """
+            )
 
             # ------------------- saved filters -------------------
             cur.execute(
@@ -126,6 +398,18 @@ class DB:
             cur.execute("CREATE INDEX IF NOT EXISTS idx_icl_item ON item_control_links(item_guid)")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_icl_control ON item_control_links(control_id)")
 
+            # What each item was last linked against (for incremental relinking)
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS link_state (
+                    item_guid TEXT PRIMARY KEY,
+                    text_hash TEXT NOT NULL,
+                    controls_version TEXT NOT NULL,
+                    linked_at TEXT NOT NULL
+                )
+                """
+            )
+
             # ------------------- organisations & sites -------------------
             cur.execute(
                 """
@@ -383,6 +667,61 @@ class DB:
             )
             return cur.fetchone() is not None
 
+    def known_keys(self) -> set[str]:
+        """Every stored guid and link, for skipping known entries in bulk."""
+        with self._conn() as conn, closing(conn.cursor()) as cur:
+            cur.execute("SELECT guid, link FROM items")
+            keys: set[str] = set()
+            for guid, link in cur.fetchall():
+                if guid:
+                    keys.add(guid)
+                if link:
+                    keys.add(link)
+            return keys
+
+    # --- HTTP validator cache -----------------------------------------------
+    def get_http_validators(self, url: str) -> Optional[Dict[str, Any]]:
+        """Stored ETag / Last-Modified for a URL, or None if never seen."""
+        with self._conn() as conn, closing(conn.cursor()) as cur:
+            cur.execute(
+                "SELECT url, etag, last_modified, checked_at FROM http_cache WHERE url = ?",
+                (url,),
+            )
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+    def save_http_validators(self, url: str, etag: str | None, last_modified: str | None) -> None:
+        with self._conn() as conn, closing(conn.cursor()) as cur:
+            cur.execute(
+                """
+                INSERT INTO http_cache (url, etag, last_modified, checked_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                  etag=excluded.etag,
+                  last_modified=excluded.last_modified,
+                  checked_at=excluded.checked_at
+                """,
+                (url, etag, last_modified, datetime.now(timezone.utc).isoformat()),
+            )
+            conn.commit()
+
+    def get_url_kind(self, url: str) -> Optional[str]:
+        """'html' / 'pdf' as last probed for an entry link, or None."""
+        with self._conn() as conn, closing(conn.cursor()) as cur:
+            row = cur.execute("SELECT kind FROM url_kinds WHERE url = ?", (url,)).fetchone()
+            return row["kind"] if row else None
+
+    def save_url_kind(self, url: str, kind: str) -> None:
+        with self._conn() as conn, closing(conn.cursor()) as cur:
+            cur.execute(
+                """
+                INSERT INTO url_kinds (url, kind, checked_at) VALUES (?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET kind=excluded.kind, checked_at=excluded.checked_at
+                """,
+                (url, kind, datetime.now(timezone.utc).isoformat()),
+            )
+            conn.commit()
+
     # --- tags helpers -------------------------------------------------------
     @staticmethod
     def _dump_tags(tags: Optional[Iterable[str] | str]) -> str:
@@ -439,10 +778,160 @@ class DB:
             pass
         return json.dumps([p.strip() for p in s.split(",") if p.strip()], ensure_ascii=False)
 
+    def _init_item_tags(self, cur: sqlite3.Cursor) -> None:
+        """
+        item_tags(item_guid, tag): one row per tag of each item, mirrored from
+        the items.tags JSON array by triggers so filters are indexed joins.
+        Backfilled (with the lenient _load_tags parser) when first created.
+        """
+        existed = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='item_tags'"
+        ).fetchone()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS item_tags (
+                item_guid TEXT NOT NULL,
+                tag TEXT NOT NULL COLLATE NOCASE,
+                PRIMARY KEY (item_guid, tag)
+            )
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_item_tags_tag ON item_tags(tag, item_guid)")
+
+        # Only well-formed JSON arrays are mirrored; _dump_tags always writes one.
+        # De-duplicated here rather than with OR IGNORE, which an outer UPSERT
+        # would override.
+        tags_of_new = """
+            SELECT new.guid, TRIM(value) FROM json_each(
+              CASE WHEN json_valid(new.tags) AND json_type(new.tags) = 'array' THEN new.tags ELSE '[]' END
+            ) WHERE TRIM(value) <> ''
+              AND NOT EXISTS (
+                SELECT 1 FROM item_tags t WHERE t.item_guid = new.guid AND t.tag = TRIM(value)
+              )
+            GROUP BY TRIM(value) COLLATE NOCASE
+        """
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS items_tags_ai AFTER INSERT ON items BEGIN
+              INSERT INTO item_tags (item_guid, tag) {tags_of_new};
+            END
+            """
+        )
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS items_tags_au AFTER UPDATE OF guid, tags ON items BEGIN
+              DELETE FROM item_tags WHERE item_guid = old.guid;
+              INSERT INTO item_tags (item_guid, tag) {tags_of_new};
+            END
+            """
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS items_tags_ad AFTER DELETE ON items BEGIN
+              DELETE FROM item_tags WHERE item_guid = old.guid;
+            END
+            """
+        )
+
+        if not existed:
+            rows = cur.execute("SELECT guid, tags FROM items WHERE COALESCE(tags, '') <> ''").fetchall()
+            cur.executemany(
+                "INSERT OR IGNORE INTO item_tags (item_guid, tag) VALUES (?, ?)",
+                ((r["guid"], t) for r in rows for t in self._load_tags(r["tags"])),
+            )
+
+    def _init_search_index(self, cur: sqlite3.Cursor) -> None:
+        """
+        External-content FTS5 index over items, synced by triggers.
+        Filled from existing rows the first time it is created.
+        """
+        existed = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='items_fts'"
+        ).fetchone()
+        try:
+            cur.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+                    title, summary, ai_summary, content,
+                    content='items', content_rowid='rowid',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+                """
+            )
+        except sqlite3.OperationalError as e:
+            print(f"! Full-text search disabled (FTS5 unavailable: {e})")
+            return
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN
+              INSERT INTO items_fts(rowid, title, summary, ai_summary, content)
+              VALUES (new.rowid, new.title, new.summary, new.ai_summary, new.content);
+            END
+            """
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+              INSERT INTO items_fts(items_fts, rowid, title, summary, ai_summary, content)
+              VALUES ('delete', old.rowid, old.title, old.summary, old.ai_summary, old.content);
+            END
+            """
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS items_fts_au
+            AFTER UPDATE OF title, summary, ai_summary, content ON items BEGIN
+              INSERT INTO items_fts(items_fts, rowid, title, summary, ai_summary, content)
+              VALUES ('delete', old.rowid, old.title, old.summary, old.ai_summary, old.content);
+              INSERT INTO items_fts(rowid, title, summary, ai_summary, content)
+              VALUES (new.rowid, new.title, new.summary, new.ai_summary, new.content);
+            END
+            """
+        )
+        if not existed:
+            cur.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+
+    def rebuild_search_index(self) -> int:
+        """
+        Recreate the FTS index contents from items (e.g. after a VACUUM, which
+        may renumber rowids) and merge its segments. Returns the item count.
+        """
+        with self._conn() as conn, closing(conn.cursor()) as cur:
+            self._init_search_index(cur)
+            cur.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+            cur.execute("INSERT INTO items_fts(items_fts) VALUES ('optimize')")
+            n = cur.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            conn.commit()
+        return int(n)
+
     # --- public API (items) -------------------------------------------------
-    def upsert_item(self, item: Dict[str, Any]) -> None:
-        """Upsert an item."""
-        payload: Dict[str, Any] = {
+    _UPSERT_ITEM_SQL = """
+        INSERT INTO items (guid, source, title, link, content, summary, published_at, published_ts, tags, updated_at)
+        VALUES (:guid, :source, :title, :link, :content, :summary, :published_at, :published_ts, :tags, :updated_at)
+        ON CONFLICT(guid) DO UPDATE SET
+          source=excluded.source,
+          title=excluded.title,
+          link=excluded.link,
+          content=excluded.content,
+          summary=excluded.summary,
+          published_at=excluded.published_at,
+          published_ts=excluded.published_ts,
+          tags=excluded.tags,
+          -- only bump when the scrape actually changed something
+          updated_at=CASE
+            WHEN items.source IS NOT excluded.source
+              OR items.title IS NOT excluded.title
+              OR items.link IS NOT excluded.link
+              OR items.content IS NOT excluded.content
+              OR items.summary IS NOT excluded.summary
+              OR items.published_at IS NOT excluded.published_at
+              OR items.tags IS NOT excluded.tags
+              OR items.updated_at IS NULL
+            THEN excluded.updated_at ELSE items.updated_at END
+    """
+
+    def _item_payload(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
             "guid": item.get("guid") or item.get("link"),
             "source": item.get("source") or "",
             "title": item.get("title") or "",
@@ -450,26 +939,63 @@ class DB:
             "content": item.get("content") or "",
             "summary": item.get("summary") or "",
             "published_at": item.get("published_at") or "",
+            "published_ts": published_epoch(item.get("published_at")),
             "tags": self._dump_tags(item.get("tags")),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
         }
+
+    def upsert_item(self, item: Dict[str, Any]) -> None:
+        """Upsert an item."""
+        payload = self._item_payload(item)
         with self._conn() as conn, closing(conn.cursor()) as cur:
-            cur.execute(
-                """
-                INSERT INTO items (guid, source, title, link, content, summary, published_at, tags)
-                VALUES (:guid, :source, :title, :link, :content, :summary, :published_at, :tags)
-                ON CONFLICT(guid) DO UPDATE SET
-                  source=excluded.source,
-                  title=excluded.title,
-                  link=excluded.link,
-                  content=excluded.content,
-                  summary=excluded.summary,
-                  published_at=excluded.published_at,
-                  tags=excluded.tags
-                """,
-                payload,
-            )
+            cur.execute(self._UPSERT_ITEM_SQL, payload)
+            bump_data_version(conn)
             conn.commit()
 
+    def upsert_items(self, items: Iterable[Dict[str, Any]], batch_size: int = 500) -> tuple[int, int]:
+        """
+        Upsert many items with executemany, one transaction per batch.
+
+        If a batch fails it is rolled back and retried row by row so one bad
+        item doesn't lose the rest. Returns (saved, failed).
+        """
+        saved = failed = 0
+        batch: List[Dict[str, Any]] = []
+        with self._conn() as conn:
+            for item in items:
+                batch.append(self._item_payload(item))
+                if len(batch) >= batch_size:
+                    s, f = self._write_item_batch(conn, batch)
+                    saved, failed, batch = saved + s, failed + f, []
+            if batch:
+                s, f = self._write_item_batch(conn, batch)
+                saved, failed = saved + s, failed + f
+        return saved, failed
+
+    def _write_item_batch(self, conn: sqlite3.Connection, batch: List[Dict[str, Any]]) -> tuple[int, int]:
+        try:
+            with conn:
+                conn.executemany(self._UPSERT_ITEM_SQL, batch)
+                bump_data_version(conn)
+            return len(batch), 0
+        except sqlite3.Error as e:
+            print(f"! Batch of {len(batch)} items failed ({e}); retrying one by one")
+        saved = failed = 0
+        for payload in batch:
+            try:
+                with conn:
+                    conn.execute(self._UPSERT_ITEM_SQL, payload)
+                    bump_data_version(conn)
+                saved += 1
+            except sqlite3.Error as e:
+                failed += 1
+                print(f"! Failed to save '{(payload.get('title') or '')[:90]}': {e}")
+        return saved, failed
+
+    def ingest(self, batch_size: int = 500) -> "IngestSession":
+        """Context-managed buffered writer for scrapers: `with db.ingest() as s: s.add(item)`."""
+        return IngestSession(self, batch_size=batch_size)
+
     def insert_item(self, item: Dict[str, Any]) -> None:
         return self.upsert_item(item)
 
@@ -484,7 +1010,7 @@ class DB:
                 SELECT guid, source, title, link, content, summary, published_at, tags,
                        ai_summary, ai_summary_updated_at
                 FROM items
-                ORDER BY datetime(COALESCE(published_at, '1970-01-01T00:00:00Z')) DESC, rowid DESC
+                ORDER BY published_ts DESC, guid DESC
                 LIMIT ?
                 """,
                 (int(limit),),
@@ -607,7 +1133,7 @@ class DB:
                              JOIN items i ON i.guid = s.item_guid
                     WHERE s.user_email = ?
                       AND s.folder_id = ?
-                    ORDER BY datetime(COALESCE(i.published_at, '1970-01-01')) DESC LIMIT ?
+                    ORDER BY i.published_ts DESC, i.guid DESC LIMIT ?
                     """,
                     (user_email, int(folder_id), int(limit)),
                 )
@@ -618,7 +1144,7 @@ class DB:
                     FROM saved_items s
                              JOIN items i ON i.guid = s.item_guid
                     WHERE s.user_email = ?
-                    ORDER BY datetime(COALESCE(i.published_at, '1970-01-01')) DESC LIMIT ?
+                    ORDER BY i.published_ts DESC, i.guid DESC LIMIT ?
                     """,
                     (user_email, int(limit)),
                 )
@@ -748,76 +1274,178 @@ class DB:
             return [dict(r) for r in cur.fetchall()]
 
     # --- linkage: items → controls -----------------------------------------
-    _WORD = re.compile(r"[A-Za-z0-9]{3,}")
-
-    def _tokenize(self, text: str) -> set[str]:
-        return {w.lower() for w in self._WORD.findall(text or "")}
-
-    def _score_item_against_control(self, item_text: str, ctrl_keywords_json: str) -> float:
-        try:
-            kws = json.loads(ctrl_keywords_json or "[]")
-        except json.JSONDecodeError:
-            kws = []
-        kws = [k for k in (kws or []) if isinstance(k, str) and k.strip()]
-        if not kws:
-            return 0.0
-
-        text = (item_text or "").lower()
-        words = self._tokenize(text)
-        overlap = 0
-        phrase_boost = 0.0
-        for kw in kws:
-            k = kw.strip().lower()
-            if " " in k and k in text:
-                phrase_boost += 0.5
-            elif k in words:
-                overlap += 1
-        base = overlap / max(1, len([k for k in kws if " " not in k]))
-        score = min(1.0, base + min(1.0, phrase_boost / 2.0))
-        return float(score)
+    # Scoring lives in storage.controls_index (controls are indexed once).
 
     def relink_item_controls(self, item: dict, min_relevance: float = 0.35) -> List[tuple[str, float]]:
         """Compute and store control links for a single item."""
-        text = " ".join(
-            [
-                (item.get("title") or "").strip(),
-                (item.get("ai_summary") or item.get("summary") or item.get("content") or "").strip(),
-            ]
-        ).strip()
-        if not text:
-            return []
+        return self.relink_items_controls([item], min_relevance=min_relevance).get(item["guid"], [])
 
-        with self._conn() as conn, closing(conn.cursor()) as cur:
-            cur.execute("SELECT id, ref, name, keywords FROM controls")
-            ctrls = cur.fetchall()
-            if not ctrls:
-                return []
-
-            scored: List[tuple[int, str, float]] = []
-            lowtext = text.lower()
-            for c in ctrls:
-                score = self._score_item_against_control(text, c["keywords"])
-                # small bonus if control name terms appear in text
-                name_tokens = self._tokenize(c["name"])
-                if any(tok in lowtext for tok in name_tokens):
-                    score += 0.1
-                score = min(1.0, score)
-                if score >= float(min_relevance):
-                    scored.append((c["id"], c["ref"], score))
+    def relink_items_controls(
+        self,
+        items: Iterable[dict],
+        min_relevance: float = 0.35,
+        batch_size: int = 500,
+        only_changed: bool = False,
+        stats: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, List[tuple[str, float]]]:
+        """
+        Score many items against all controls and store the links.
 
-            if scored:
-                cur.execute("DELETE FROM item_control_links WHERE item_guid=?", (item["guid"],))
-                now = datetime.now(timezone.utc).isoformat()
-                cur.executemany(
-                    """
-                    INSERT INTO item_control_links (item_guid, control_id, relevance, created_at)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    [(item["guid"], cid, rel, now) for (cid, _ref, rel) in scored],
+        Controls are loaded into an inverted index once; links are written
+        with one DELETE + INSERT executemany per batch of items. Every item
+        scored has its old links replaced, so one that no longer matches
+        anything ends up with none.
+
+        Each item's text hash and the controls version are recorded in
+        link_state. With `only_changed`, items whose text, the controls and
+        min_relevance are all unchanged since then are skipped (pass
+        items_for_linking(only_changed=True) to avoid loading the rest).
+
+        Returns {guid: [(ref, relevance), ...]} for items that got links;
+        `stats` (if given) receives relinked / unchanged counts.
+        """
+        results: Dict[str, List[tuple[str, float]]] = {}
+        if stats is not None:
+            stats.setdefault("relinked", 0)
+            stats.setdefault("unchanged", 0)
+        with self._conn() as conn:
+            index = ControlIndex.load(conn)
+            if not len(index):
+                return results
+            version = _link_version(index, min_relevance)
+
+            chunk: List[dict] = []
+            for item in items:
+                chunk.append(item)
+                if len(chunk) >= batch_size:
+                    self._relink_chunk(conn, index, version, chunk, min_relevance, only_changed, results, stats)
+                    chunk = []
+            if chunk:
+                self._relink_chunk(conn, index, version, chunk, min_relevance, only_changed, results, stats)
+        return results
+
+    def _relink_chunk(
+        self,
+        conn: sqlite3.Connection,
+        index: ControlIndex,
+        version: str,
+        items: List[dict],
+        min_relevance: float,
+        only_changed: bool,
+        results: Dict[str, List[tuple[str, float]]],
+        stats: Optional[Dict[str, int]],
+    ) -> None:
+        previous: Dict[str, str] = {}
+        if only_changed:
+            qmarks = ",".join("?" * len(items))
+            previous = {
+                r["item_guid"]: r["text_hash"]
+                for r in conn.execute(
+                    f"SELECT item_guid, text_hash FROM link_state WHERE controls_version=? AND item_guid IN ({qmarks})",
+                    (version, *(it["guid"] for it in items)),
                 )
-                conn.commit()
+            }
+
+        batch: List[tuple[str, str, List[tuple[int, str, float]]]] = []
+        for item in items:
+            text = controls_item_text(item)
+            digest = controls_text_hash(text)
+            if only_changed and previous.get(item["guid"]) == digest:
+                if stats is not None:
+                    stats["unchanged"] += 1
+                continue
+            scored = index.score(text, min_relevance=min_relevance)
+            batch.append((item["guid"], digest, scored))
+            if scored:
+                results[item["guid"]] = [(ref, rel) for (_cid, ref, rel) in scored]
+            if stats is not None:
+                stats["relinked"] += 1
+        if batch:
+            self._write_control_links(conn, batch, version)
 
-            return [(ref, rel) for (_cid, ref, rel) in scored]
+    def _write_control_links(
+        self,
+        conn: sqlite3.Connection,
+        batch: List[tuple[str, str, List[tuple[int, str, float]]]],
+        version: str,
+    ) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        with conn:
+            conn.executemany(
+                "DELETE FROM item_control_links WHERE item_guid=?",
+                [(guid,) for guid, _digest, _scored in batch],
+            )
+            conn.executemany(
+                """
+                INSERT INTO item_control_links (item_guid, control_id, relevance, created_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                [(guid, cid, rel, now) for guid, _digest, scored in batch for (cid, _ref, rel) in scored],
+            )
+            conn.executemany(
+                """
+                INSERT INTO link_state (item_guid, text_hash, controls_version, linked_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(item_guid) DO UPDATE SET
+                  text_hash=excluded.text_hash,
+                  controls_version=excluded.controls_version,
+                  linked_at=excluded.linked_at
+                """,
+                [(guid, digest, version, now) for guid, digest, _scored in batch],
+            )
+
+    def items_for_linking(
+        self,
+        limit: Optional[int] = None,
+        only_changed: bool = False,
+        min_relevance: float = 0.35,
+        stats: Optional[Dict[str, int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Lean (guid, title, summary) rows for relinking, newest first. Full
+        content is only pulled for items that have no summary at all.
+
+        With `only_changed`, only items never linked, linked against other
+        controls or another min_relevance, or updated since (items.updated_at
+        later than link_state.linked_at) are returned; stats["unchanged"]
+        counts the rest.
+        """
+        sql = """
+            SELECT guid, title,
+                   CASE
+                     WHEN COALESCE(ai_summary, '') <> '' THEN ai_summary
+                     WHEN COALESCE(summary, '') <> '' THEN summary
+                     ELSE COALESCE(content, '')
+                   END AS summary
+            FROM items
+        """
+        where: List[str] = []
+        params: List[Any] = []
+        with self._conn() as conn:
+            if limit:
+                where.append(
+                    "items.rowid IN (SELECT rowid FROM items ORDER BY published_ts DESC, guid DESC LIMIT ?)"
+                )
+                params.append(int(limit))
+            if only_changed:
+                version = _link_version(ControlIndex.load(conn), min_relevance)
+                sql += " LEFT JOIN link_state ls ON ls.item_guid = items.guid"
+                where.append(
+                    "(ls.item_guid IS NULL OR ls.controls_version <> ?"
+                    " OR items.updated_at IS NULL OR items.updated_at > ls.linked_at)"
+                )
+                params.append(version)
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += " ORDER BY published_ts DESC, guid DESC"
+            with closing(conn.execute(sql, params)) as cur:
+                rows = [dict(r) for r in cur.fetchall()]
+            if only_changed and stats is not None:
+                (total,) = conn.execute("SELECT COUNT(*) FROM items").fetchone()
+                if limit:
+                    total = min(int(total), int(limit))
+                stats["unchanged"] = stats.get("unchanged", 0) + int(total) - len(rows)
+        return rows
 
     def list_item_links(self, item_guid: str) -> List[Dict[str, Any]]:
         with self._conn() as conn, closing(conn.cursor()) as cur:
@@ -842,6 +1470,7 @@ class DB:
                 (name.strip(), now, created_by),
             )
             if cur.lastrowid:
+                bump_data_version(conn)
                 conn.commit()
                 return int(cur.lastrowid)
             cur.execute("SELECT id FROM orgs WHERE name=?", (name.strip(),))
@@ -876,6 +1505,7 @@ class DB:
                 payload,
             )
             if cur.lastrowid:
+                bump_data_version(conn)
                 conn.commit()
                 return int(cur.lastrowid)
             cur.execute("SELECT id FROM sites WHERE org_id=? AND name=?", (int(org_id), name.strip()))
@@ -951,6 +1581,7 @@ class DB:
                 """,
                 payload,
             )
+            bump_data_version(conn)
             conn.commit()
             return int(cur.lastrowid)
 
@@ -1087,7 +1718,7 @@ class DB:
                 FROM v_item_org_control_links v
                 JOIN items i ON i.guid = v.item_guid
                 WHERE v.org_control_id=?
-                ORDER BY datetime(COALESCE(i.published_at,'1970-01-01T00:00:00Z')) DESC
+                ORDER BY i.published_ts DESC, i.guid DESC
                 LIMIT ?
                 """,
                 (int(org_control_id), int(limit)),
@@ -1283,6 +1914,7 @@ class DB:
                 """,
                 params,
             )
+            bump_data_version(conn)
             conn.commit()
             return cur.rowcount > 0
 
@@ -1293,6 +1925,7 @@ class DB:
                 "DELETE FROM org_risks WHERE id = ? AND org_id = ?",
                 (int(risk_id), int(org_id)),
             )
+            bump_data_version(conn)
             conn.commit()
             return cur.rowcount > 0
     # --- org risks (org_risks) ---------------------------------------------
@@ -1553,6 +2186,7 @@ class DB:
                 """,
                 payload,
             )
+            bump_data_version(conn)
             conn.commit()
             return cur.rowcount > 0
 
@@ -1566,6 +2200,7 @@ class DB:
                 "DELETE FROM org_risks WHERE id = ? AND org_id = ?",
                 (int(risk_id), int(org_id)),
             )
+            bump_data_version(conn)
             conn.commit()
             return cur.rowcount > 0
 
@@ -1607,6 +2242,7 @@ class DB:
                     """,
                     [(int(risk_id), sid) for sid in clean_ids],
                 )
+            bump_data_version(conn)
             conn.commit()
 
     def list_sites_for_control(self, org_id: int, org_control_id: int) -> list[dict]:
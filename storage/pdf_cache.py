@@ -0,0 +1,107 @@
+# storage/pdf_cache.py
+"""
+Extracted PDF text, cached by URL and by content hash (table `pdf_text_cache`).
+
+- by URL: the precompute finds the text without downloading the PDF again.
+- by sha256 of the file: when a PDF is downloaded anyway (the scraper's
+  conditional GET got a 200, or the same file is posted under another URL),
+  the text is reused without parsing it again.
+
+Rows remember the `max_chars` they were extracted with. A row is reused
+when it covers the caller's window, or when it holds the whole document.
+
+The table lives in DB_PATH, or else ofgem.db at the repo root (like
+storage.summary_cache), whatever the working directory.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from typing import Any, Dict, Optional
+
+from storage.db import DEFAULT_DB_PATH, pooled_connection
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdf_text_cache (
+    url          TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    text         TEXT NOT NULL,
+    pages        INTEGER,
+    max_chars    INTEGER,
+    created_at   TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE INDEX IF NOT EXISTS idx_pdf_text_cache_hash ON pdf_text_cache(content_hash);
+"""
+
+_ready: set[str] = set()
+
+
+def _conn(path: Optional[str] = None) -> sqlite3.Connection:
+    path = path or os.getenv("DB_PATH") or DEFAULT_DB_PATH
+    conn = pooled_connection(path, foreign_keys=False)
+    if path not in _ready:
+        with conn:
+            conn.executescript(_SCHEMA)
+        _ready.add(path)
+    return conn
+
+
+def _usable(row: Optional[sqlite3.Row], max_chars: Optional[int]) -> Optional[Dict[str, Any]]:
+    if row is None:
+        return None
+    have = row["max_chars"]
+    # Covers the requested window, or the document was shorter than its own cap
+    if not max_chars or have is None or have >= max_chars or len(row["text"]) < have:
+        return dict(row)
+    return None
+
+
+def by_url(url: str, max_chars: Optional[int] = None, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    try:
+        row = _conn(path).execute("SELECT * FROM pdf_text_cache WHERE url = ?", (url,)).fetchone()
+        return _usable(row, max_chars)
+    except sqlite3.Error as e:
+        print(f"[pdf-cache] ⚠️ lookup failed: {e}")
+        return None
+
+
+def by_hash(content_hash: str, max_chars: Optional[int] = None, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    try:
+        row = _conn(path).execute(
+            "SELECT * FROM pdf_text_cache WHERE content_hash = ? ORDER BY max_chars DESC LIMIT 1",
+            (content_hash,),
+        ).fetchone()
+        return _usable(row, max_chars)
+    except sqlite3.Error as e:
+        print(f"[pdf-cache] ⚠️ lookup failed: {e}")
+        return None
+
+
+def store(
+    url: str,
+    content_hash: str,
+    text: str,
+    *,
+    pages: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    path: Optional[str] = None,
+) -> None:
+    try:
+        conn = _conn(path)
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO pdf_text_cache (url, content_hash, text, pages, max_chars)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    text         = excluded.text,
+                    pages        = excluded.pages,
+                    max_chars    = excluded.max_chars,
+                    created_at   = datetime('now')
+                """,
+                (url, content_hash, text or "", pages, max_chars),
+            )
+    except sqlite3.Error as e:
+        print(f"[pdf-cache] ⚠️ store failed: {e}")
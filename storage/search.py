@@ -0,0 +1,83 @@
+# storage/search.py
+"""
+Full-text search over items (SQLite FTS5).
+
+`items_fts` is an external-content FTS5 table over items(title, summary,
+ai_summary, content), kept in sync by triggers created in DB._init_schema.
+This module holds the query side, used by the API's /api/search and
+/summaries:
+
+- fts_query(): turn free text from a search box into a safe MATCH expression
+  (prefix match per word, "quoted phrases" kept as phrases).
+- SEARCH_SQL: ranked (bm25) search with a highlighted snippet.
+- highlight(): HTML-escape a snippet and turn the match markers into <mark>.
+
+If items_fts is missing (old DB, or SQLite without FTS5) callers fall back to
+LIKE; `python -m scripts.rebuild_search_index` creates and fills it.
+"""
+
+from __future__ import annotations
+
+import html
+import re
+
+FTS_TABLE = "items_fts"
+
+# Column weights for bm25(): title, summary, ai_summary, content
+BM25_WEIGHTS = (10.0, 4.0, 4.0, 1.0)
+
+# Control characters never appear in scraped text, so they are safe markers
+# to escape around before swapping in real <mark> tags.
+_MARK_OPEN = "\x02"
+_MARK_CLOSE = "\x03"
+
+_PHRASE_RE = re.compile(r'"([^"]+)"')
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(text: str) -> str:
+    """
+    Build an FTS5 MATCH expression from user input, or "" if nothing usable.
+
+    Every bare word becomes a quoted prefix term ("grid"*), "quoted phrases"
+    stay phrases; terms are ANDed. Operators and punctuation typed by the
+    user are never passed through, so the query can't be a syntax error.
+    """
+    text = text or ""
+    terms: list[str] = []
+    for phrase in _PHRASE_RE.findall(text):
+        words = _WORD_RE.findall(phrase)
+        if words:
+            terms.append('"' + " ".join(words) + '"')
+    for word in _WORD_RE.findall(_PHRASE_RE.sub(" ", text)):
+        terms.append(f'"{word}"*')
+    return " ".join(terms)
+
+
+# Rank expression and snippet column for queries joining items_fts f ON f.rowid = i.rowid
+RANK_SQL = "bm25({t}, {w})".format(t=FTS_TABLE, w=", ".join(str(x) for x in BM25_WEIGHTS))
+SNIPPET_SQL = f"snippet({FTS_TABLE}, -1, '{_MARK_OPEN}', '{_MARK_CLOSE}', '…', 24)"
+
+SEARCH_SQL = f"""
+    SELECT
+        i.guid,
+        i.title,
+        i.link,
+        i.source,
+        i.published_at,
+        {SNIPPET_SQL} AS snippet,
+        {RANK_SQL} AS score
+    FROM {FTS_TABLE}
+    JOIN items i ON i.rowid = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH ?
+    ORDER BY score
+    LIMIT ? OFFSET ?
+"""
+
+COUNT_SQL = f"SELECT COUNT(*) AS n FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?"
+
+
+def highlight(snippet: str | None) -> str:
+    """HTML-safe snippet with matches wrapped in <mark>."""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
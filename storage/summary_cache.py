@@ -0,0 +1,174 @@
+# storage/summary_cache.py
+"""
+Content-addressed cache of AI summaries (table `summary_cache`).
+
+The key is sha256 over (model, prompt version, limit_words, title + text),
+with whitespace collapsed. So the same text summarised through the same
+prompt is sent to the API only once. Cross-posted items, re-scrapes and
+re-upserts all hit the cache, whichever path asks: tools.ai_utils,
+api.ai_summary or summariser.model.
+
+Only real model output is stored. Fallback snippets are never cached, so a
+failed call is retried next time.
+
+- lookup() / store(): used around each API call.
+- STATS: per-process hit / miss / store counters. Each row also keeps its
+  own `hits` count and `last_hit_at`.
+- prune(): drops entries unused for SUMMARY_CACHE_MAX_AGE_DAYS, then the
+  least recently used beyond SUMMARY_CACHE_MAX_ROWS. It runs every
+  PRUNE_EVERY stores and from `python -m scripts.summary_cache --prune`.
+
+The table lives in DB_PATH, or else ofgem.db at the repo root (the API's
+database), whatever the working directory. Set SUMMARY_CACHE=0 to bypass it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+from storage.db import DEFAULT_DB_PATH, pooled_connection
+
+ENABLED = os.getenv("SUMMARY_CACHE", "1") == "1"
+MAX_ROWS = int(os.getenv("SUMMARY_CACHE_MAX_ROWS", "50000"))
+MAX_AGE_DAYS = int(os.getenv("SUMMARY_CACHE_MAX_AGE_DAYS", "180"))
+PRUNE_EVERY = 500
+
+# Bump when a prompt template changes so old summaries stop matching.
+# tools.ai_utils and api.ai_summary send the same prompt, so they share one.
+ITEM_PROMPT_VERSION = "item-summary-v1"
+SCRAPE_PROMPT_VERSION = "scrape-summary-v1"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summary_cache (
+    key            TEXT PRIMARY KEY,
+    model          TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    limit_words    INTEGER,
+    summary        TEXT NOT NULL,
+    created_at     TEXT NOT NULL DEFAULT (datetime('now')),
+    last_hit_at    TEXT,
+    hits           INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_summary_cache_used
+    ON summary_cache(COALESCE(last_hit_at, created_at));
+"""
+
+STATS: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "pruned": 0}
+_lock = threading.Lock()
+_ready: set[str] = set()
+
+
+def _db_path(path: Optional[str] = None) -> str:
+    return path or os.getenv("DB_PATH") or DEFAULT_DB_PATH
+
+
+def _bump(name: str, n: int = 1) -> None:
+    with _lock:
+        STATS[name] += n
+
+
+def _conn(path: Optional[str] = None) -> sqlite3.Connection:
+    path = _db_path(path)
+    conn = pooled_connection(path, foreign_keys=False)
+    if path not in _ready:
+        with conn:
+            conn.executescript(_SCHEMA)
+        _ready.add(path)
+    return conn
+
+
+def cache_key(model: str, prompt_version: str, limit_words: Optional[int], title: str, text: str) -> str:
+    """Hash of everything that determines the model's answer."""
+    body = " ".join(f"{title or ''}\n{text or ''}".split())
+    raw = f"{model}|{prompt_version}|{limit_words or ''}|{body}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def lookup(key: str, path: Optional[str] = None) -> Optional[str]:
+    """Cached summary for `key`, or None (counted as a miss)."""
+    if not ENABLED:
+        return None
+    try:
+        conn = _conn(path)
+        row = conn.execute("SELECT summary FROM summary_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            _bump("misses")
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE summary_cache SET hits = hits + 1, last_hit_at = datetime('now') WHERE key = ?",
+                (key,),
+            )
+        _bump("hits")
+        return row["summary"]
+    except sqlite3.Error as e:
+        print(f"[cache] ⚠️ summary cache lookup failed: {e}")
+        return None
+
+
+def store(
+    key: str,
+    summary: str,
+    *,
+    model: str,
+    prompt_version: str,
+    limit_words: Optional[int] = None,
+    path: Optional[str] = None,
+) -> None:
+    if not ENABLED or not (summary or "").strip():
+        return
+    try:
+        conn = _conn(path)
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO summary_cache (key, model, prompt_version, limit_words, summary)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET summary = excluded.summary
+                """,
+                (key, model, prompt_version, limit_words, summary),
+            )
+        _bump("stores")
+        if STATS["stores"] % PRUNE_EVERY == 0:
+            prune(path=path)
+    except sqlite3.Error as e:
+        print(f"[cache] ⚠️ summary cache store failed: {e}")
+
+
+def prune(max_rows: int = MAX_ROWS, max_age_days: int = MAX_AGE_DAYS, path: Optional[str] = None) -> int:
+    """Drop stale entries, then least-recently-used ones beyond max_rows. Returns rows deleted."""
+    conn = _conn(path)
+    deleted = 0
+    with conn:
+        if max_age_days > 0:
+            deleted += conn.execute(
+                "DELETE FROM summary_cache WHERE COALESCE(last_hit_at, created_at) < datetime('now', ?)",
+                (f"-{int(max_age_days)} days",),
+            ).rowcount
+        if max_rows > 0:
+            deleted += conn.execute(
+                """
+                DELETE FROM summary_cache WHERE key IN (
+                    SELECT key FROM summary_cache
+                    ORDER BY COALESCE(last_hit_at, created_at) DESC, hits DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (int(max_rows),),
+            ).rowcount
+    _bump("pruned", deleted)
+    return deleted
+
+
+def stats(path: Optional[str] = None) -> Dict[str, int]:
+    """This process's counters plus table totals."""
+    conn = _conn(path)
+    rows, hits = conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM summary_cache").fetchone()
+    with _lock:
+        out = dict(STATS)
+    out.update({"rows": int(rows), "total_hits": int(hits)})
+    return out
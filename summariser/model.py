@@ -2,6 +2,11 @@
 import os, re
 from typing import List, Tuple, Optional
 
+from scraper.matcher import TagMatcher, text_blob
+from storage import summary_cache
+
+MODEL = "gpt-4o-mini"
+
 def _fallback_summary(text: str, title: str = "") -> str:
     words = re.findall(r"\w+[^\s]*", text or "")
     snippet = " ".join(words[:100])
@@ -16,12 +21,10 @@ RULES = {
     "Enforcement": ["enforcement", "compliance case"],
 }
 
+_RULES_MATCHER = TagMatcher(RULES)
+
 def _heuristic_tags(text: str, title: str = "", source: Optional[str] = None) -> List[str]:
-    blob = f"{title}\n{text}".lower()
-    tags = set()
-    for tag, needles in RULES.items():
-        if any(n in blob for n in needles):
-            tags.add(tag)
+    tags = set(_RULES_MATCHER.tags(text_blob(title, text)))
     if source:
         tags.add(source.upper())
     return sorted(tags)
@@ -38,9 +41,17 @@ def _openai_client():
 
 def summarise_and_tag(text: str, title: str = "", source: Optional[str] = None) -> Tuple[str, List[str]]:
     text = text or ""
-    client = _openai_client()
+    if not text.strip():
+        return _fallback_summary(text, title), _heuristic_tags(text, title, source)
+
+    # Same text seen before (cross-post, re-scrape): no API call
+    key = summary_cache.cache_key(MODEL, summary_cache.SCRAPE_PROMPT_VERSION, 100, title, text[:6000])
+    cached = summary_cache.lookup(key)
+    if cached:
+        return cached, _heuristic_tags(text, title, source)
 
-    if not client or not text.strip():
+    client = _openai_client()
+    if not client:
         return _fallback_summary(text, title), _heuristic_tags(text, title, source)
 
     try:
@@ -53,7 +64,7 @@ TEXT:
 {text[:6000]}
 """
         resp = client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=MODEL,
             messages=[
                 {"role": "system", "content": "Be precise, plain UK English."},
                 {"role": "user", "content": prompt},
@@ -61,6 +72,8 @@ TEXT:
             temperature=0.2,
         )
         summary = (resp.choices[0].message.content or "").strip()
+        summary_cache.store(key, summary, model=MODEL, prompt_version=summary_cache.SCRAPE_PROMPT_VERSION,
+                            limit_words=100)
         tags = _heuristic_tags(text, title, source)
         return summary, tags
     except Exception:
@@ -0,0 +1,72 @@
+# tests/test_batch_summaries.py
+"""tools.batch_summaries end to end with the offline backend, on a temp database."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from storage import summary_cache
+from storage.db import DB
+from tools import batch_summaries as bs
+
+N = 5
+
+
+@pytest.fixture()
+def scratch(tmp_path, monkeypatch):
+    path = str(tmp_path / "scratch.db")
+    now = datetime.now(timezone.utc).isoformat()
+    DB(path).upsert_items(
+        {
+            "guid": f"g{i}",
+            "title": f"Decision {i}",
+            "link": f"https://example.com/{i}",
+            "content": f"Ofgem has published decision number {i} on network charging. " * 5,
+            "published_at": now,
+        }
+        for i in range(N)
+    )
+    monkeypatch.setattr(bs, "BATCH_DIR", tmp_path / "batches")
+    conn = bs.connect(path)
+    bs.ensure_min_schema(conn, bs.choose_table(conn))
+    bs.ensure_job_tables(conn)
+    yield path, conn
+    conn.close()
+
+
+def _summaries(conn):
+    return dict(conn.execute("SELECT guid, ai_summary FROM items ORDER BY guid").fetchall())
+
+
+def test_local_submit_collect_merge(scratch):
+    path, conn = scratch
+    backend = bs.LocalBatchBackend()
+
+    job_id = bs.submit(conn, backend, cache_path=path, allow_fake=True)
+    assert job_id
+    assert conn.execute("SELECT n_requests FROM summary_batches WHERE id = ?", (job_id,)).fetchone()[0] == N
+
+    stats = bs.collect(conn, allow_fake=True, cache_path=path)
+    assert stats["completed"] == 1 and stats["merged"] == N and stats["open"] == 0
+    assert all(s.startswith("[local] ") for s in _summaries(conn).values())
+
+    # Cached under the fake backend's own namespace only: real lookups miss
+    for (ckey,) in conn.execute("SELECT cache_key FROM summary_batch_items WHERE batch_id = ?", (job_id,)):
+        assert summary_cache.lookup(ckey, path=path) is None
+        assert summary_cache.lookup(backend.cache_key(ckey), path=path).startswith("[local] ")
+
+    # Nothing left to do on a second pass
+    assert bs.submit(conn, backend, cache_path=path, allow_fake=True) is None
+
+
+def test_local_results_are_not_merged_without_permission(scratch):
+    path, conn = scratch
+    backend = bs.LocalBatchBackend()
+
+    with pytest.raises(bs.FakeMergeRefused):
+        bs.submit(conn, backend, cache_path=path)
+
+    bs.submit(conn, backend, cache_path=path, allow_fake=True)
+    stats = bs.collect(conn, cache_path=path)
+    assert stats["refused"] == 1 and stats["open"] == 1 and stats["merged"] == 0
+    assert not any(_summaries(conn).values())
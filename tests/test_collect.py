@@ -0,0 +1,44 @@
+# tests/test_collect.py
+"""scraper.ofgem._collect_source: entry pages fetched concurrently, items kept in feed order."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper import ofgem
+
+N = 8
+FEED = "<rss><channel>" + "".join(
+    f"<item><title>Consultation {i}</title><link>https://example.com/{i}</link><guid>g{i}</guid></item>"
+    for i in range(N)
+) + "</channel></rss>"
+
+
+def test_entry_pages_are_fetched_concurrently_in_feed_order(monkeypatch):
+    active = peak = 0
+    lock = threading.Lock()
+
+    def fetch_raw(url, cache=None):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        # Later entries answer first
+        time.sleep(0.05 * (N - int(url.rsplit("/", 1)[1])) / N + 0.05)
+        with lock:
+            active -= 1
+        return "text", f"consultation text for {url}"
+
+    monkeypatch.setattr(ofgem, "_fetch", lambda url, cache=None: FEED)
+    monkeypatch.setattr(ofgem, "_fetch_raw", fetch_raw)
+    monkeypatch.setattr(ofgem, "BYPASS", True)
+
+    with ThreadPoolExecutor(max_workers=4) as fetcher:
+        started = time.perf_counter()
+        items = ofgem._collect_source("test", "https://example.com/feed", fetcher=fetcher)
+        elapsed = time.perf_counter() - started
+
+    assert [it["guid"] for it in items] == [f"g{i}" for i in range(N)]
+    assert items[3]["content"] == "consultation text for https://example.com/3"
+    assert peak > 1
+    assert elapsed < 0.05 * N  # well under the serial sum
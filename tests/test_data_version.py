@@ -0,0 +1,38 @@
+# tests/test_data_version.py
+"""Which writes bump the data version (and so invalidate the API's response cache)."""
+
+import pytest
+
+from storage.db import DB, data_version
+
+
+@pytest.fixture()
+def server(tmp_path, monkeypatch):
+    import api.server as srv
+
+    path = str(tmp_path / "ofgem.db")
+    DB(path)
+    monkeypatch.setattr(srv, "DB_PATH", path)
+    srv._ensure_users_tables()
+    return srv
+
+
+def _version(srv) -> int:
+    return data_version(srv._pooled_conn())
+
+
+def test_user_writes_leave_the_cache_alone(server):
+    before = _version(server)
+    server._create_user("someone@example.com", "x")
+    assert _version(server) == before
+
+
+def test_risk_and_control_writes_invalidate(server):
+    before = _version(server)
+    server._sql_exec("INSERT INTO orgs (name, created_at) VALUES (?, datetime('now'))", ("Org",), invalidate=True)
+    assert _version(server) == before + 1
+
+    # Tools writing through storage.db bump too
+    org_id = DB(server.DB_PATH).upsert_org("Another org")
+    DB(server.DB_PATH).upsert_org_control(org_id, "Patch servers", code="C-1")
+    assert _version(server) == before + 3
@@ -0,0 +1,64 @@
+# tests/test_fetch_raw.py
+"""scraper.ofgem._fetch_raw: one streamed GET per entry link, with the link's kind remembered across runs."""
+
+import pytest
+
+from scraper import http_cache, ofgem
+from storage.db import DB
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, content_type: str) -> None:
+        self.status_code = 200
+        self.headers = {"Content-Type": content_type}
+        self.encoding = "utf-8"
+        self._body = body
+
+    def iter_content(self, size):
+        yield self._body
+
+    def close(self):
+        pass
+
+
+@pytest.fixture()
+def db(tmp_path):
+    return DB(str(tmp_path / "fetch.db"))
+
+
+@pytest.fixture()
+def served(monkeypatch):
+    pages = {
+        "https://example.com/report": (b"%PDF-1.4 not really a pdf", "application/octet-stream"),
+        "https://example.com/news": (b"<html><body><p>News</p></body></html>", "text/html"),
+    }
+    calls = []
+
+    def get(url, **kwargs):
+        calls.append((url, kwargs))
+        return FakeResponse(*pages[url])
+
+    monkeypatch.setattr(ofgem.http_client, "get", get)
+    return calls
+
+
+def test_pdf_kind_is_remembered_and_skips_the_download(db, served):
+    url = "https://example.com/report"
+    kind, text = ofgem._fetch_raw(url, cache=db)
+    assert (kind, text) == ("text", ofgem.PDF_PLACEHOLDER)
+    assert http_cache.known_kind(db, url) == "pdf"
+
+    # Next run: known PDF with cached text, so no request at all
+    assert ofgem._fetch_raw(url, cache=db) == ("text", ofgem.PDF_PLACEHOLDER)
+    assert [u for u, _ in served] == [url]
+
+
+def test_html_is_fetched_every_time_and_never_conditionally(db, served):
+    url = "https://example.com/news"
+    for _ in range(2):
+        kind, payload = ofgem._fetch_raw(url, cache=db)
+        assert kind == "html" and "News" in payload
+    assert http_cache.known_kind(db, url) == "html"
+    assert len(served) == 2
+    assert all("cache" not in kw for _, kw in served)
+    assert db.get_http_validators(url) is None
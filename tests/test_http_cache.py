@@ -0,0 +1,40 @@
+# tests/test_http_cache.py
+"""scraper.http_cache.DeferredValidators: a run's validators are stored only when asked to."""
+
+from scraper import http_cache, http_client
+from storage.db import DB
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, etag: str | None = None) -> None:
+        self.status_code = status_code
+        self.headers = {"ETag": etag} if etag else {}
+
+
+def test_validators_are_held_until_saved(tmp_path, monkeypatch):
+    db = DB(str(tmp_path / "cache.db"))
+    db.save_http_validators("https://example.com/old", '"v1"', None)
+    sent = []
+
+    def send(method, url, headers=None, **kwargs):
+        sent.append(headers)
+        return FakeResponse(200, etag='"v2"')
+
+    monkeypatch.setattr(http_client, "_send", send)
+    cache = http_cache.DeferredValidators(db)
+
+    http_client.get("https://example.com/old", cache=cache)
+    http_client.get("https://example.com/new", cache=cache)
+
+    # Requests are conditional on what's stored, but nothing new is stored yet
+    assert sent[0]["If-None-Match"] == '"v1"'
+    assert db.get_http_validators("https://example.com/old")["etag"] == '"v1"'
+    assert db.get_http_validators("https://example.com/new") is None
+
+    assert cache.save(urls={"https://example.com/new"}) == 1
+    assert db.get_http_validators("https://example.com/new")["etag"] == '"v2"'
+    assert db.get_http_validators("https://example.com/old")["etag"] == '"v1"'
+
+    assert cache.save() == 1
+    assert db.get_http_validators("https://example.com/old")["etag"] == '"v2"'
+    assert cache.save() == 0
@@ -0,0 +1,63 @@
+# tests/test_link_controls.py
+"""Incremental item → control relinking (DB.items_for_linking / relink_items_controls)."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from storage.db import DB
+
+
+def _item(guid, summary):
+    return {
+        "guid": guid,
+        "title": f"Item {guid}",
+        "link": f"https://example.com/{guid}",
+        "summary": summary,
+        "published_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+@pytest.fixture()
+def db(tmp_path):
+    db = DB(str(tmp_path / "links.db"))
+    db.upsert_control("CAF-B2", "Identity and access control", keywords=["password", "access", "identity"])
+    db.upsert_items([
+        _item("a", "Password and access reset guidance for identity providers"),
+        _item("b", "Password access requirements for identity systems"),
+        _item("c", "Gas price cap consultation"),
+    ])
+    return db
+
+
+def _relink(db, **kw):
+    stats: dict = {}
+    items = db.items_for_linking(only_changed=True, min_relevance=0.3, stats=stats, **kw)
+    db.relink_items_controls(items, min_relevance=0.3, only_changed=True, stats=stats)
+    return {it["guid"] for it in items}, stats
+
+
+def test_only_changed_selects_in_sql(db):
+    selected, stats = _relink(db)
+    assert selected == {"a", "b", "c"} and stats == {"relinked": 3, "unchanged": 0}
+    assert db.list_item_links("a") and db.list_item_links("b") and not db.list_item_links("c")
+
+    selected, stats = _relink(db)
+    assert selected == set() and stats["unchanged"] == 3
+
+    db.upsert_items([_item("b", "Password access requirements, revised")])
+    selected, stats = _relink(db)
+    assert selected == {"b"} and stats == {"relinked": 1, "unchanged": 2}
+
+    # Another threshold is another link version: everything is a candidate again
+    assert len(db.items_for_linking(only_changed=True, min_relevance=0.9)) == 3
+
+
+def test_links_are_dropped_when_an_item_stops_matching(db):
+    _relink(db)
+    assert db.list_item_links("a")
+
+    db.upsert_items([_item("a", "Electricity network charging decision")])
+    selected, _ = _relink(db)
+    assert selected == {"a"}
+    assert db.list_item_links("a") == []
@@ -0,0 +1,49 @@
+# tests/test_publications.py
+"""scraper.ofgem_publications: validators are stored only for listing pages whose cards were gone through."""
+
+import time
+
+from scraper import http_client
+from scraper.ofgem_publications import scrape_ofgem_publications
+from storage.db import DB
+
+ROOT = "https://example.com/publications"
+
+
+class FakeResponse:
+    def __init__(self, url: str) -> None:
+        page = int(url.rsplit("page=", 1)[1]) if "page=" in url else 1
+        cards = "".join(
+            f"<article><a href='/pub/{page}-{i}'>Publication {page}-{i}</a>"
+            f"<time datetime='2025-01-0{page}'></time></article>"
+            for i in range(2)
+        )
+        self.status_code = 200
+        self.headers = {"ETag": f'"{url}"'}
+        self.text = f"<html><body>{cards}<a href='{ROOT}?page={page + 1}'>Next</a></body></html>"
+
+    def raise_for_status(self):
+        pass
+
+
+def test_only_consumed_listing_pages_keep_validators(tmp_path, monkeypatch):
+    db = DB(str(tmp_path / "pubs.db"))
+    requested = []
+
+    def send(method, url, **kwargs):
+        requested.append(url)
+        time.sleep(0.01)
+        return FakeResponse(url)
+
+    monkeypatch.setattr(http_client, "_send", send)
+    # Page 2 is already stored, so the section stops there
+    known = {"https://example.com/pub/2-0", "https://example.com/pub/2-1"}
+
+    kept, skipped = scrape_ofgem_publications(
+        db, start_urls=[ROOT], max_pages=6, workers=4, delay_seconds=0.001, known=known,
+    )
+
+    assert (kept, skipped) == (2, 2)
+    assert any("page=3" in u for u in requested)  # fetched ahead, then abandoned
+    stored = [u for u in [ROOT] + [f"{ROOT}?page={n}" for n in range(2, 7)] if db.get_http_validators(u)]
+    assert stored == [ROOT, f"{ROOT}?page=2"]
@@ -0,0 +1,133 @@
+# tools/ai_pipeline.py
+"""
+Shared plumbing for the AI summary jobs (precompute / backfill).
+
+- RateLimiter: thread-safe token bucket (requests per minute).
+- openai_retry: tenacity retry for OpenAI calls on 429 / 5xx / connection
+  errors, with exponential backoff.
+- run_bounded(): run a function over items on a thread pool with a bounded
+  number of jobs in flight, yielding results as they finish so the caller
+  (on the main thread) can write them in checkpointed batches.
+
+Tune with PRECOMPUTE_WORKERS, PRECOMPUTE_RPM, PRECOMPUTE_BATCH and
+PRECOMPUTE_MAX_MINUTES.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, TypeVar
+
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+WORKERS = max(1, int(os.getenv("PRECOMPUTE_WORKERS", "4")))
+RPM = float(os.getenv("PRECOMPUTE_RPM", "60"))
+BATCH = max(1, int(os.getenv("PRECOMPUTE_BATCH", "20")))
+MAX_MINUTES = float(os.getenv("PRECOMPUTE_MAX_MINUTES", "0"))  # 0 = no time budget
+RETRIES = max(1, int(os.getenv("PRECOMPUTE_RETRIES", "5")))
+
+
+# --- rate limiting -------------------------------------------------------------
+class RateLimiter:
+    """
+    Token bucket allowing `per_minute` acquisitions per minute, with bursts up
+    to `burst` (default: one second's worth, at least 1). `per_minute <= 0`
+    disables limiting.
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None) -> None:
+        self.rate = float(per_minute) / 60.0
+        self.capacity = max(1.0, float(burst) if burst is not None else self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_for = (1 - self._tokens) / self.rate
+            time.sleep(wait_for)
+
+
+# --- retry ---------------------------------------------------------------------
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """429 / 5xx / timeouts / connection errors from the OpenAI client."""
+    try:
+        import openai
+    except Exception:
+        return False
+    if isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in RETRY_STATUSES or exc.status_code >= 500
+    return False
+
+
+openai_retry = retry(
+    retry=retry_if_exception(is_retryable),
+    stop=stop_after_attempt(RETRIES),
+    wait=wait_random_exponential(multiplier=1, max=60),
+    reraise=True,
+)
+
+
+# --- bounded concurrent map ------------------------------------------------------
+def run_bounded(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    workers: int = WORKERS,
+    max_minutes: float = MAX_MINUTES,
+) -> Iterator[Tuple[T, Optional[R], Optional[BaseException]]]:
+    """
+    Yield (item, result, error) as each call of fn(item) finishes.
+
+    At most 2 x workers jobs are queued at once. Once `max_minutes` have
+    passed no new jobs are started (jobs in flight still finish), so a job
+    with a hard CI timeout can stop cleanly and pick up next run.
+    """
+    deadline = time.monotonic() + max_minutes * 60 if max_minutes > 0 else None
+    it = iter(items)
+    pending: dict[Future, Any] = {}
+    exhausted = False
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        try:
+            while True:
+                while not exhausted and len(pending) < 2 * max(1, workers):
+                    if deadline is not None and time.monotonic() >= deadline:
+                        print(f"[ai] ⏱ time budget of {max_minutes:g} min reached; not starting new jobs")
+                        exhausted = True
+                        break
+                    try:
+                        item = next(it)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[pool.submit(fn, item)] = item
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    item = pending.pop(fut)
+                    exc = fut.exception()
+                    yield item, (None if exc else fut.result()), exc
+        finally:
+            for fut in pending:
+                fut.cancel()
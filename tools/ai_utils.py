@@ -1,7 +1,12 @@
 # tools/ai_utils.py
-import os, re, io, requests
+import os, re, io, hashlib, tempfile
+from typing import Optional, Tuple
 from urllib.parse import urlparse
 
+from scraper import http_client
+from storage import pdf_cache, summary_cache
+from tools.ai_pipeline import openai_retry
+
 # --- Boilerplate cleaner for extracted text ---
 _BOILERPLATE_PATTERNS = [
     r"\bskip to (main )?content\b",
@@ -54,62 +59,138 @@ def is_pdf_link(url: str) -> bool:
     except Exception:
         return False
 
-def fetch_pdf_bytes(url: str, timeout: int = 30) -> bytes:
-    r = requests.get(url, timeout=timeout, allow_redirects=True, stream=True)
-    r.raise_for_status()
+PDF_MAX_BYTES = 15 * 1024 * 1024
+# A little over the summariser's 6000-char prompt window: cleaning drops some lines
+PDF_TEXT_MAX_CHARS = int(os.getenv("PDF_TEXT_MAX_CHARS", "8000"))
+_SPOOL_IN_MEMORY = 1024 * 1024  # larger downloads go to a temp file
+
+def spool_response(resp, max_bytes: int = PDF_MAX_BYTES):
+    """
+    Stream a response body into a SpooledTemporaryFile (RAM up to 1 MB, then
+    disk), hashing as it goes. Returns (file positioned at 0, sha256 hex).
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_IN_MEMORY)
+    digest = hashlib.sha256()
     total = 0
-    chunks = []
-    for chunk in r.iter_content(65536):
+    for chunk in resp.iter_content(65536):
         if not chunk:
-            break
+            continue
+        spool.write(chunk)
+        digest.update(chunk)
         total += len(chunk)
-        if total > 15 * 1024 * 1024:
+        if total >= max_bytes:
             break
-        chunks.append(chunk)
-    return b"".join(chunks)
+    spool.seek(0)
+    return spool, digest.hexdigest()
+
+def fetch_pdf_bytes(url: str, timeout: int = 30) -> bytes:
+    r = http_client.get(url, timeout=timeout, stream=True)
+    try:
+        r.raise_for_status()
+        spool, _ = spool_response(r)
+        with spool:
+            return spool.read()
+    finally:
+        # Hand the pooled connection back
+        r.close()
 
-def pdf_to_text(blob: bytes, max_pages: int = 8) -> str:
+def pdf_file_to_text(fh, max_pages: int = 8, max_chars: Optional[int] = None) -> Tuple[str, int]:
+    """
+    Extract text page by page from a PDF file object, stopping after
+    `max_pages` or once `max_chars` characters are collected.
+    Returns (text, pages read).
+    """
     try:
         from pypdf import PdfReader
     except Exception:
-        return ""
+        return "", 0
     try:
-        reader = PdfReader(io.BytesIO(blob))
+        reader = PdfReader(fh)
         out = []
+        size = 0
+        pages = 0
         for i, page in enumerate(reader.pages):
-            if i >= max_pages:
+            if i >= max_pages or (max_chars and size >= max_chars):
                 break
+            pages += 1
             try:
-                out.append(page.extract_text() or "")
+                txt = page.extract_text() or ""
             except Exception:
-                pass
-        return "\n".join([x for x in out if x]).strip()
+                continue
+            if txt:
+                out.append(txt)
+                size += len(txt) + 1
+        text = "\n".join(out).strip()
+        if max_chars:
+            text = text[:max_chars]
+        return text, pages
     except Exception:
-        return ""
+        return "", 0
+
+def pdf_to_text(blob: bytes, max_pages: int = 8, max_chars: Optional[int] = None) -> str:
+    return pdf_file_to_text(io.BytesIO(blob), max_pages=max_pages, max_chars=max_chars)[0]
+
+def pdf_text_from_spool(url: str, spool, content_hash: str, max_chars: int = PDF_TEXT_MAX_CHARS,
+                        max_pages: int = 8, db_path: Optional[str] = None) -> str:
+    """Text of a downloaded PDF, parsed only if this content hash isn't cached yet."""
+    hit = pdf_cache.by_hash(content_hash, max_chars, path=db_path)
+    if hit is not None:
+        if hit["url"] != url:
+            pdf_cache.store(url, content_hash, hit["text"], pages=hit["pages"],
+                            max_chars=hit["max_chars"], path=db_path)
+        return hit["text"]
+    text, pages = pdf_file_to_text(spool, max_pages=max_pages, max_chars=max_chars)
+    pdf_cache.store(url, content_hash, text, pages=pages, max_chars=max_chars, path=db_path)
+    return text
+
+def fetch_pdf_text(url: str, max_chars: int = PDF_TEXT_MAX_CHARS, max_pages: int = 8,
+                   timeout: int = 30, refresh: bool = False, db_path: Optional[str] = None) -> str:
+    """
+    Text of the PDF at `url`. Cached per URL, so reruns neither download
+    nor parse it again (refresh=True forces a download; unchanged content is
+    still not re-parsed).
+    """
+    if not refresh:
+        hit = pdf_cache.by_url(url, max_chars, path=db_path)
+        if hit is not None:
+            return hit["text"]
+    r = http_client.get(url, timeout=timeout, stream=True)
+    try:
+        r.raise_for_status()
+        spool, digest = spool_response(r)
+    finally:
+        r.close()
+    with spool:
+        return pdf_text_from_spool(url, spool, digest, max_chars=max_chars, max_pages=max_pages, db_path=db_path)
+
+_CLIENTS = {}
 
 def openai_client():
+    # One client per key: it holds the HTTP pool and is safe to share across threads
     try:
         from openai import OpenAI
         key = os.getenv("OPENAI_API_KEY")
         if not key:
             return None
-        return OpenAI(api_key=key)
+        if key not in _CLIENTS:
+            _CLIENTS[key] = OpenAI(api_key=key, max_retries=0)  # retries are ours (openai_retry)
+        return _CLIENTS[key]
     except Exception:
         return None
 
+MODEL = "gpt-4o-mini"
+
 def fallback_summary(text: str, limit_words: int = 100) -> str:
     words = (text or "").split()
     snippet = " ".join(words[:limit_words])
     return snippet + ("…" if len(words) > limit_words else "")
 
-def generate_ai_summary(title: str, text: str, limit_words: int = 100) -> str:
-    text = (text or "").strip()
-    if not text:
-        return "No content available to summarise."
-    client = openai_client()
-    if not client:
-        return fallback_summary(text, limit_words)
+def summary_key(title: str, text: str, limit_words: int = 100) -> str:
+    """summary_cache key for this prompt (text as sent, i.e. first 6000 chars)."""
+    return summary_cache.cache_key(MODEL, summary_cache.ITEM_PROMPT_VERSION, limit_words, title, text[:6000])
 
+def summary_request(title: str, text: str, limit_words: int = 100) -> dict:
+    """Chat-completions body for one item (also what batch jobs submit)."""
     prompt = f"""Summarise the following item in up to {limit_words} words.
 Plain UK English, no bullet points, no headings. Cover what it is, who it affects, and likely action/implication.
 
@@ -117,19 +198,58 @@ TITLE: {title}
 TEXT:
 {text[:6000]}
 """
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": "You are a precise UK energy regulation analyst."},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": 0.2,
+    }
+
+def trim_words(out: str, limit_words: int = 100) -> str:
+    out = (out or "").strip()
+    words = out.split()
+    if len(words) > limit_words:
+        out = " ".join(words[:limit_words]) + "…"
+    return out
+
+def generate_ai_summary(title: str, text: str, limit_words: int = 100, limiter=None, strict: bool = False) -> str:
+    """
+    Up to `limit_words` words from the model, or the fallback snippet.
+
+    429 / 5xx / connection errors are retried with backoff; `limiter` (an
+    ai_pipeline.RateLimiter) is acquired before every attempt. With
+    strict=True the final error is raised instead of falling back, so batch
+    jobs can leave the row empty and pick it up on the next run.
+    Model output is cached by content hash (storage.summary_cache).
+    """
+    text = (text or "").strip()
+    if not text:
+        return "No content available to summarise."
+    key = summary_key(title, text, limit_words)
+    cached = summary_cache.lookup(key)
+    if cached:
+        return cached
+    client = openai_client()
+    if not client:
+        return fallback_summary(text, limit_words)
+
+    body = summary_request(title, text, limit_words)
+
+    @openai_retry
+    def _call():
+        if limiter is not None:
+            limiter.acquire()
+        return client.chat.completions.create(**body)
+
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a precise UK energy regulation analyst."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-        )
-        out = (resp.choices[0].message.content or "").strip()
-        words = out.split()
-        if len(words) > limit_words:
-            out = " ".join(words[:limit_words]) + "…"
+        resp = _call()
+        out = trim_words(resp.choices[0].message.content, limit_words)
+        summary_cache.store(key, out, model=MODEL, prompt_version=summary_cache.ITEM_PROMPT_VERSION,
+                            limit_words=limit_words)
         return out
     except Exception:
+        if strict:
+            raise
         return fallback_summary(text, limit_words)
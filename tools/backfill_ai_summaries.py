@@ -2,23 +2,35 @@
 """
 Backfill script to generate AI summaries for items without ai_summary.
 
+Requests run on a small thread pool behind a requests-per-minute limiter,
+with retry on 429 / 5xx; results are committed every PRECOMPUTE_BATCH rows,
+so an interrupted run simply resumes (only empty rows are selected).
+
 Usage:
-    python tools/backfill_ai_summaries.py
+    PYTHONPATH=. python tools/backfill_ai_summaries.py
 """
 
 import os
 import sqlite3
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from storage import summary_cache
+from storage.db import bump_data_version, connect as db_connect
+from tools.ai_pipeline import BATCH, MAX_MINUTES, RPM, WORKERS, RateLimiter, openai_retry, run_bounded
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DB_PATH = BASE_DIR / "ofgem.db"
 
+MODEL = "gpt-4.1-mini"
+PROMPT_VERSION = "backfill-summary-v1"
+
 
 # ---------------------------------------------------------------------------
 # OpenAI helpers (standalone, similar to server.py)
@@ -31,7 +43,7 @@ def _openai_client() -> Optional[OpenAI]:
         return None
 
     try:
-        client = OpenAI(api_key=key)
+        client = OpenAI(api_key=key, max_retries=0)  # retries via openai_retry
         print("[AI] ✅ OpenAI client created")
         return client
     except Exception as e:
@@ -54,6 +66,7 @@ def _generate_ai_summary(
     url: str,
     body: str,
     max_tokens: int = 220,
+    limiter: Optional[RateLimiter] = None,
 ) -> Optional[str]:
     if not body or not body.strip():
         print("[AI] ⚠️ No text provided to summarise.")
@@ -76,18 +89,32 @@ def _generate_ai_summary(
         "Focus on regulatory impact, obligations, deadlines, and risks."
     )
 
-    try:
-        resp = client.responses.create(
-            model="gpt-4.1-mini",
+    key = summary_cache.cache_key(MODEL, PROMPT_VERSION, max_tokens, title, body)
+    cached = summary_cache.lookup(key, path=str(DB_PATH))
+    if cached:
+        print("[AI] ♻️ Summary served from cache")
+        return cached
+
+    @openai_retry
+    def _call():
+        if limiter is not None:
+            limiter.acquire()
+        return client.responses.create(
+            model=MODEL,
             input=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
             max_output_tokens=max_tokens,
         )
+
+    try:
+        resp = _call()
         summary = _extract_text_from_response(resp)
         if summary:
             print("[AI] ✅ Summary generated")
+            summary_cache.store(key, summary, model=MODEL, prompt_version=PROMPT_VERSION,
+                                limit_words=max_tokens, path=str(DB_PATH))
             return summary
         else:
             print("[AI] ⚠️ Empty summary returned from API")
@@ -102,9 +129,20 @@ def _generate_ai_summary(
 # ---------------------------------------------------------------------------
 
 def _get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    # Shared pragmas (WAL, busy_timeout) so the API/scraper can keep working
+    return db_connect(str(DB_PATH))
+
+
+def _write_batch(conn: sqlite3.Connection, batch: List[Tuple[str, str]]) -> None:
+    if not batch:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    with conn:
+        conn.executemany(
+            "UPDATE items SET ai_summary = ?, ai_summary_updated_at = ? WHERE guid = ?",
+            [(summary, now, guid) for guid, summary in batch],
+        )
+        bump_data_version(conn)
 
 
 def main():
@@ -117,57 +155,58 @@ def main():
         return
 
     conn = _get_conn()
-    cur = conn.cursor()
-
-    # Find items that need AI summaries
-    cur.execute(
-        """
-        SELECT id, title, content, ai_summary, guid_or_link
-        FROM items
-        WHERE (ai_summary IS NULL OR TRIM(ai_summary) = '')
-        ORDER BY id ASC
-        """
-    )
-    rows = cur.fetchall()
-    total = len(rows)
-    print(f"[AI-BACKFILL] Found {total} items needing summaries")
-
-    if not rows:
-        print("[AI-BACKFILL] No items needing AI summaries.")
-        return
-
-    updated_count = 0
-
-    for idx, row in enumerate(rows, start=1):
-        row = dict(row)
-        title = row.get("title") or ""
-        url = row.get("guid_or_link") or ""
-        body = row.get("content") or ""
-
-        print(
-            f"[AI] 🔎 ({idx}/{total}) Generating summary "
-            f"id={row['id']} title='{title[:60]}' len={len(body)}"
-        )
-
-        summary = _generate_ai_summary(
-            client,
-            title=title,
-            url=url,
-            body=body,
-        )
-
-        if summary:
-            cur.execute(
-                "UPDATE items SET ai_summary = ? WHERE id = ?",
-                (summary, row["id"]),
+    try:
+        # Find items that need AI summaries
+        rows = conn.execute(
+            """
+            SELECT guid, link, title, content
+            FROM items
+            WHERE (ai_summary IS NULL OR TRIM(ai_summary) = '')
+            ORDER BY rowid ASC
+            """
+        ).fetchall()
+        total = len(rows)
+        print(f"[AI-BACKFILL] Found {total} items needing summaries "
+              f"(workers={WORKERS}, rpm={RPM:g}, batch={BATCH})")
+
+        if not rows:
+            print("[AI-BACKFILL] No items needing AI summaries.")
+            return
+
+        limiter = RateLimiter(RPM)
+
+        def work(row: sqlite3.Row) -> Optional[str]:
+            return _generate_ai_summary(
+                client,
+                title=row["title"] or "",
+                url=row["link"] or row["guid"] or "",
+                body=row["content"] or "",
+                limiter=limiter,
             )
-            conn.commit()
-            updated_count += 1
-            print(f"[AI-BACKFILL] Updated id={row['id']}")
-        else:
-            print(f"[AI-BACKFILL] Skipped id={row['id']} (no summary)")
 
-    print(f"[AI-BACKFILL] Done. Updated {updated_count} items.")
+        updated_count = 0
+        done = 0
+        pending: List[Tuple[str, str]] = []
+        try:
+            for row, summary, err in run_bounded(work, rows, max_minutes=MAX_MINUTES):
+                done += 1
+                title = (row["title"] or "")[:60]
+                if summary:
+                    pending.append((row["guid"], summary))
+                    updated_count += 1
+                    print(f"[AI-BACKFILL] ({done}/{total}) Updated guid={row['guid']} title='{title}'")
+                else:
+                    print(f"[AI-BACKFILL] ({done}/{total}) Skipped guid={row['guid']} ({err or 'no summary'})")
+                if len(pending) >= BATCH:
+                    _write_batch(conn, pending)
+                    pending = []
+        finally:
+            _write_batch(conn, pending)
+
+        print(f"[AI-BACKFILL] Done. Updated {updated_count} items.")
+        print(f"[AI-BACKFILL] Summary cache: {summary_cache.stats(path=str(DB_PATH))}")
+    finally:
+        conn.close()
 
 
 if __name__ == "__main__":
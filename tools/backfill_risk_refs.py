@@ -4,7 +4,7 @@ import sqlite3
 from contextlib import closing
 from datetime import datetime, timezone
 
-from storage.db import DB
+from storage.db import DB, bump_data_version
 
 DB_PATH = os.getenv("DB_PATH", "ofgem.db")
 db = DB(DB_PATH)
@@ -79,5 +79,7 @@ with db._conn() as conn, closing(conn.cursor()) as cur:
             )
             updated_count += 1
 
+        if updated_count:
+            bump_data_version(conn)  # the API's cached risk pages show these codes
         conn.commit()
         print(f"  Updated {updated_count} risk(s) for org {org_id}")
@@ -0,0 +1,457 @@
+# tools/batch_summaries.py
+"""
+Bulk AI summaries through a batch API instead of one request per item.
+
+    submit   write every pending prompt to a JSONL job file and hand it to the
+             backend (rows already cached in summary_cache are filled at once)
+    collect  poll open jobs; finished ones are merged into items.ai_summary
+             in one transaction each
+    run      submit + wait + collect (handy with the local backend)
+
+Backends:
+    openai   OpenAI Batch API (/v1/chat/completions, 24h window, ~half price)
+    local    file-based fake: "completes" immediately with the first words of
+             each prompt text, so the flow can be exercised offline. Its
+             output is not a summary: merging it into DB_PATH needs
+             --allow-local-merge (use --db with a scratch copy instead), and
+             it is cached under its own model/prompt version, so real
+             summarise calls never hit it
+
+Jobs are tracked in `summary_batches` / `summary_batch_items`; items in an
+open job are not submitted again. Prompts are the ones tools.ai_utils sends,
+so results also land in the summary cache.
+
+Usage:
+    PYTHONPATH=. python tools/batch_summaries.py submit [--backend local]
+    PYTHONPATH=. python tools/batch_summaries.py collect
+    PYTHONPATH=. python tools/batch_summaries.py run --backend local --db /tmp/scratch.db
+"""
+
+from __future__ import annotations
+
+import abc
+import argparse
+import json
+import os
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from storage import summary_cache
+from storage.db import bump_data_version
+from tools.ai_pipeline import run_bounded
+from tools.ai_utils import MODEL, openai_client, summary_key, summary_request, trim_words
+from tools.precompute_summaries import (
+    DB_PATH,
+    LIMIT_WORDS,
+    ONLY_EMPTY,
+    choose_table,
+    connect,
+    ensure_min_schema,
+    pending_rows,
+    primary_key_for_update,
+    row_key,
+    row_text,
+    utc_now,
+    write_summaries,
+)
+
+BATCH_DIR = Path(os.getenv("BATCH_DIR", "batches"))
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "50000"))  # OpenAI per-file limit
+ENDPOINT = "/v1/chat/completions"
+
+OPEN_STATUSES = ("submitted", "validating", "in_progress", "finalizing")
+
+
+# ------------------------------------------------------------------------------
+# Backends
+# ------------------------------------------------------------------------------
+class BatchBackend(abc.ABC):
+    """
+    submit(job file) -> remote id; status(id) -> str; results(id) -> output lines.
+
+    `fake` backends produce placeholder text: merge() refuses to write it
+    unless explicitly allowed, and caches it under the backend's own
+    model / prompt_version so it never answers a real lookup.
+    """
+
+    name = "base"
+    fake = False
+    model = MODEL
+    prompt_version = summary_cache.ITEM_PROMPT_VERSION
+
+    @abc.abstractmethod
+    def submit(self, path: Path) -> str: ...
+
+    @abc.abstractmethod
+    def status(self, remote_id: str) -> str: ...
+
+    @abc.abstractmethod
+    def results(self, remote_id: str) -> Iterator[Dict[str, Any]]: ...
+
+    def cache_key(self, ckey: str) -> str:
+        """Summary cache key for a result of this backend (namespaced for fakes)."""
+        if not self.fake:
+            return ckey
+        return summary_cache.cache_key(self.model, self.prompt_version, LIMIT_WORDS, ckey, "")
+
+
+class OpenAIBatchBackend(BatchBackend):
+    name = "openai"
+
+    def __init__(self) -> None:
+        self.client = openai_client()
+        if self.client is None:
+            raise RuntimeError("OPENAI_API_KEY is not set")
+
+    def submit(self, path: Path) -> str:
+        with path.open("rb") as fh:
+            upload = self.client.files.create(file=fh, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=upload.id, endpoint=ENDPOINT, completion_window="24h"
+        )
+        return batch.id
+
+    def status(self, remote_id: str) -> str:
+        # validating / in_progress / finalizing / completed / failed / expired / cancelled
+        return self.client.batches.retrieve(remote_id).status
+
+    def results(self, remote_id: str) -> Iterator[Dict[str, Any]]:
+        batch = self.client.batches.retrieve(remote_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+class LocalBatchBackend(BatchBackend):
+    """Offline stand-in: writes <job>.output.jsonl in the OpenAI output format."""
+
+    name = "local"
+    fake = True
+    model = "local-fake"
+    prompt_version = "local-batch-v1"
+
+    def __init__(self, words: int = 25) -> None:
+        self.words = words
+
+    def _output(self, remote_id: str) -> Path:
+        return BATCH_DIR / f"{remote_id}.output.jsonl"
+
+    def submit(self, path: Path) -> str:
+        remote_id = f"local_{path.stem}"
+        with path.open(encoding="utf-8") as src, self._output(remote_id).open("w", encoding="utf-8") as out:
+            for line in src:
+                if not line.strip():
+                    continue
+                req = json.loads(line)
+                prompt = req["body"]["messages"][-1]["content"]
+                text = prompt.split("TEXT:", 1)[-1].split()
+                content = "[local] " + " ".join(text[: self.words])
+                out.write(json.dumps({
+                    "id": f"resp_{uuid.uuid4().hex[:12]}",
+                    "custom_id": req["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"role": "assistant", "content": content}}]},
+                    },
+                    "error": None,
+                }) + "\n")
+        return remote_id
+
+    def status(self, remote_id: str) -> str:
+        return "completed" if self._output(remote_id).exists() else "failed"
+
+    def results(self, remote_id: str) -> Iterator[Dict[str, Any]]:
+        with self._output(remote_id).open(encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+
+BACKENDS = {"openai": OpenAIBatchBackend, "local": LocalBatchBackend}
+
+
+class FakeMergeRefused(RuntimeError):
+    """A fake backend's output was about to be written without allow_fake."""
+
+
+def get_backend_class(name: str) -> type:
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise SystemExit(f"unknown backend {name!r} (choose from {', '.join(BACKENDS)})")
+
+
+def get_backend(name: str) -> BatchBackend:
+    return get_backend_class(name)()
+
+
+# ------------------------------------------------------------------------------
+# Job tables
+# ------------------------------------------------------------------------------
+def ensure_job_tables(conn: sqlite3.Connection) -> None:
+    with conn:
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS summary_batches (
+                id           TEXT PRIMARY KEY,
+                backend      TEXT NOT NULL,
+                remote_id    TEXT,
+                status       TEXT NOT NULL,
+                input_path   TEXT,
+                n_requests   INTEGER NOT NULL DEFAULT 0,
+                n_merged     INTEGER NOT NULL DEFAULT 0,
+                n_failed     INTEGER NOT NULL DEFAULT 0,
+                created_at   TEXT NOT NULL,
+                completed_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS summary_batch_items (
+                batch_id  TEXT NOT NULL REFERENCES summary_batches(id) ON DELETE CASCADE,
+                item_key  TEXT NOT NULL,
+                cache_key TEXT NOT NULL,
+                PRIMARY KEY (batch_id, item_key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_summary_batch_items_key ON summary_batch_items(item_key);
+            """
+        )
+
+
+def in_open_jobs(conn: sqlite3.Connection) -> set:
+    qmarks = ",".join("?" * len(OPEN_STATUSES))
+    rows = conn.execute(
+        f"""
+        SELECT bi.item_key FROM summary_batch_items bi
+        JOIN summary_batches b ON b.id = bi.batch_id
+        WHERE b.status IN ({qmarks})
+        """,
+        OPEN_STATUSES,
+    ).fetchall()
+    return {r[0] for r in rows}
+
+
+# ------------------------------------------------------------------------------
+# submit
+# ------------------------------------------------------------------------------
+def submit(conn: sqlite3.Connection, backend: BatchBackend, limit: Optional[int] = None,
+           cache_path: Optional[str] = None, allow_fake: bool = False) -> Optional[str]:
+    if backend.fake and not allow_fake:
+        raise FakeMergeRefused(f"{backend.name} backend: pass allow_fake=True (scratch databases only)")
+    table = choose_table(conn)
+    pk_col = primary_key_for_update(conn, table)
+    busy = in_open_jobs(conn)
+    rows = [r for r in pending_rows(conn, table, pk_col) if row_key(r, pk_col) not in busy]
+    rows = rows[: min(limit or BATCH_MAX_REQUESTS, BATCH_MAX_REQUESTS)]
+    if not rows:
+        print("[batch] nothing to submit.")
+        return None
+
+    BATCH_DIR.mkdir(parents=True, exist_ok=True)
+    job_id = utc_now().strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    path = BATCH_DIR / f"{job_id}.jsonl"
+
+    cached: List[Tuple[Any, str]] = []
+    job_items: List[Tuple[str, str, str]] = []
+    # Text prep may fetch PDFs, so do it on the worker pool (no API calls here)
+    with path.open("w", encoding="utf-8") as fh:
+        for row, prepared, err in run_bounded(row_text, rows):
+            if err is not None or not prepared or not prepared[1]:
+                continue
+            title, text = prepared
+            key = row_key(row, pk_col)
+            ckey = summary_key(title, text, LIMIT_WORDS)
+            hit = summary_cache.lookup(backend.cache_key(ckey), path=cache_path)
+            if hit:
+                cached.append((key, hit))
+                continue
+            fh.write(json.dumps({
+                "custom_id": str(key),
+                "method": "POST",
+                "url": ENDPOINT,
+                "body": summary_request(title, text, LIMIT_WORDS),
+            }) + "\n")
+            job_items.append((job_id, str(key), ckey))
+
+    write_summaries(conn, table, pk_col, cached)
+    if cached:
+        print(f"[batch] ♻️ {len(cached)} summaries filled from the cache")
+    if not job_items:
+        path.unlink(missing_ok=True)
+        print("[batch] nothing left to submit.")
+        return None
+
+    remote_id = backend.submit(path)
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO summary_batches (id, backend, remote_id, status, input_path, n_requests, created_at)
+            VALUES (?, ?, ?, 'submitted', ?, ?, ?)
+            """,
+            (job_id, backend.name, remote_id, str(path), len(job_items), utc_now().isoformat()),
+        )
+        conn.executemany(
+            "INSERT INTO summary_batch_items (batch_id, item_key, cache_key) VALUES (?, ?, ?)", job_items
+        )
+    print(f"[batch] 📤 submitted {job_id} ({len(job_items)} requests) to {backend.name} as {remote_id}")
+    return job_id
+
+
+# ------------------------------------------------------------------------------
+# collect
+# ------------------------------------------------------------------------------
+def _content(result: Dict[str, Any]) -> Optional[str]:
+    resp = result.get("response") or {}
+    if resp.get("status_code") != 200:
+        return None
+    try:
+        return resp["body"]["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def merge(conn: sqlite3.Connection, job_id: str, results: Iterator[Dict[str, Any]],
+          backend: BatchBackend, allow_fake: bool = False,
+          cache_path: Optional[str] = None) -> Tuple[int, int]:
+    """Write a finished job's summaries in one transaction. Returns (merged, failed)."""
+    if backend.fake and not allow_fake:
+        raise FakeMergeRefused(
+            f"{job_id}: {backend.name} results are placeholders; refusing to merge them "
+            "(use a scratch --db, or --allow-local-merge)"
+        )
+    table = choose_table(conn)
+    pk_col = primary_key_for_update(conn, table)
+    keys = dict(conn.execute(
+        "SELECT item_key, cache_key FROM summary_batch_items WHERE batch_id = ?", (job_id,)
+    ).fetchall())
+
+    updates: List[Tuple[str, str, str]] = []
+    failed = 0
+    for res in results:
+        item_key = res.get("custom_id")
+        content = _content(res)
+        if item_key not in keys or not (content or "").strip():
+            failed += 1
+            continue
+        summary = trim_words(content, LIMIT_WORDS)
+        updates.append((summary, item_key, keys[item_key]))
+
+    only_empty = " AND (ai_summary IS NULL OR TRIM(ai_summary) = '')" if ONLY_EMPTY else ""
+    now = utc_now().isoformat()
+    with conn:
+        cur = conn.executemany(
+            f"UPDATE {table} SET ai_summary = ?, ai_summary_updated_at = ? WHERE {pk_col} = ?{only_empty}",
+            [(summary, now, item_key) for summary, item_key, _ in updates],
+        )
+        merged = cur.rowcount if cur.rowcount is not None and cur.rowcount >= 0 else len(updates)
+        bump_data_version(conn)
+    for summary, _, ckey in updates:
+        summary_cache.store(backend.cache_key(ckey), summary, model=backend.model,
+                            prompt_version=backend.prompt_version, limit_words=LIMIT_WORDS, path=cache_path)
+    # Requests with no usable result (errors, or missing from the output)
+    return merged, max(failed, len(keys) - len(updates))
+
+
+def collect(conn: sqlite3.Connection, allow_fake: bool = False,
+            cache_path: Optional[str] = None) -> Dict[str, int]:
+    stats = {"open": 0, "completed": 0, "failed": 0, "merged": 0, "refused": 0}
+    qmarks = ",".join("?" * len(OPEN_STATUSES))
+    jobs = conn.execute(
+        f"SELECT id, backend, remote_id FROM summary_batches WHERE status IN ({qmarks}) ORDER BY created_at",
+        OPEN_STATUSES,
+    ).fetchall()
+    backends: Dict[str, BatchBackend] = {}
+    for job_id, backend_name, remote_id in jobs:
+        try:
+            backend = backends.get(backend_name) or backends.setdefault(backend_name, get_backend(backend_name))
+            status = backend.status(remote_id)
+        except Exception as e:
+            print(f"[batch] ⚠️ {job_id}: could not poll {backend_name}: {e}")
+            stats["open"] += 1
+            continue
+
+        if status in OPEN_STATUSES:
+            with conn:
+                conn.execute("UPDATE summary_batches SET status = ? WHERE id = ?", (status, job_id))
+            stats["open"] += 1
+            print(f"[batch] ⏳ {job_id}: {status}")
+            continue
+
+        merged = errors = 0
+        if status == "completed":
+            try:
+                merged, errors = merge(conn, job_id, backend.results(remote_id), backend,
+                                       allow_fake=allow_fake, cache_path=cache_path)
+            except FakeMergeRefused as e:
+                # Left open: collect again against a scratch DB or with the flag
+                print(f"[batch] ⛔ {e}")
+                stats["open"] += 1
+                stats["refused"] += 1
+                continue
+            stats["completed"] += 1
+            stats["merged"] += merged
+            print(f"[batch] ✅ {job_id}: merged {merged} summaries ({errors} failed)")
+        else:
+            # failed / expired / cancelled: items become pending again
+            stats["failed"] += 1
+            print(f"[batch] ❌ {job_id}: {status}")
+        with conn:
+            conn.execute(
+                """
+                UPDATE summary_batches
+                   SET status = ?, n_merged = ?, n_failed = ?, completed_at = ?
+                 WHERE id = ?
+                """,
+                (status, merged, errors, utc_now().isoformat(), job_id),
+            )
+    return stats
+
+
+# ------------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------------
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("command", choices=("submit", "collect", "run"))
+    ap.add_argument("--backend", default=os.getenv("BATCH_BACKEND", "openai"), choices=sorted(BACKENDS))
+    ap.add_argument("--limit", type=int, default=None, help="max requests per job")
+    ap.add_argument("--poll", type=float, default=60.0, help="seconds between polls for `run`")
+    ap.add_argument("--db", default=DB_PATH, help="database to read items from and merge into (default: DB_PATH)")
+    ap.add_argument("--allow-local-merge", action="store_true",
+                    help="let fake (local) results be written into DB_PATH itself")
+    args = ap.parse_args()
+
+    # Fake output may only land in a scratch database unless asked for explicitly
+    allow_fake = args.allow_local_merge or os.path.abspath(args.db) != os.path.abspath(DB_PATH)
+    if get_backend_class(args.backend).fake and not allow_fake and args.command != "collect":
+        raise SystemExit(
+            f"[batch] the {args.backend} backend writes placeholder summaries; "
+            f"run it against a scratch copy (--db /tmp/scratch.db) or pass --allow-local-merge"
+        )
+
+    conn = connect(args.db)
+    try:
+        ensure_min_schema(conn, choose_table(conn))
+        ensure_job_tables(conn)
+        conn.commit()
+
+        if args.command in ("submit", "run"):
+            submit(conn, get_backend(args.backend), limit=args.limit, cache_path=args.db, allow_fake=allow_fake)
+        if args.command == "collect":
+            print(f"[batch] {collect(conn, allow_fake=allow_fake, cache_path=args.db)}")
+        if args.command == "run":
+            while True:
+                stats = collect(conn, allow_fake=allow_fake, cache_path=args.db)
+                if not stats["open"] or stats["refused"]:
+                    break
+                time.sleep(args.poll)
+            print(f"[batch] {stats}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# tools/bench_clean.py
+"""
+Benchmark HTML cleaning (scraper.cleaner) across parsers and worker counts.
+
+The corpus is a directory of saved pages (*.html). Build one from stored
+item links with --fetch N. If the directory is empty, a synthetic corpus
+of article-like pages is used instead.
+
+For each parser the output is compared with html.parser run inline
+(the old behaviour), and the number of pages whose text differs is printed.
+
+Usage:
+    python -m tools.bench_clean [--corpus bench/html] [--fetch 50]
+                                [--parsers html.parser,lxml] [--workers 0,2,4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import random
+import sqlite3
+import time
+from pathlib import Path
+
+from scraper import http_client
+from scraper.cleaner import CleanPool
+
+
+def fetch_corpus(corpus: Path, n: int) -> int:
+    """Save up to n HTML pages linked from the items table into `corpus`."""
+    path = os.getenv("DB_PATH", "ofgem.db")
+    with sqlite3.connect(path) as conn:
+        links = [r[0] for r in conn.execute(
+            "SELECT link FROM items WHERE link LIKE 'http%' AND link NOT LIKE '%.pdf' "
+            "ORDER BY published_at DESC LIMIT ?", (n * 2,)
+        )]
+    corpus.mkdir(parents=True, exist_ok=True)
+    saved = 0
+    for link in links:
+        if saved >= n:
+            break
+        try:
+            resp = http_client.get(link, timeout=20)
+            if resp.status_code != 200 or "html" not in (resp.headers.get("Content-Type") or "").lower():
+                continue
+            name = hashlib.sha1(link.encode()).hexdigest()[:16] + ".html"
+            (corpus / name).write_text(resp.text, encoding="utf-8")
+            saved += 1
+        except Exception as e:
+            print(f"[bench] skip {link}: {e}")
+    return saved
+
+
+def synthetic_corpus(n: int) -> list[str]:
+    rng = random.Random(7)
+    words = ("licence network ofgem consultation decision energy supplier code modification "
+             "the of and to for on with by market price cap review guidance incident").split()
+
+    def para(k: int) -> str:
+        return "<p>" + " ".join(rng.choice(words) for _ in range(k)) + ".</p>"
+
+    chrome = (
+        "<header><nav><a href='/'>Home</a> <a href='#main'>Skip to main content</a>"
+        "<form role='search'><input name='q'></form></nav></header>"
+        "<div class='cookie-banner'>We use cookies <button>Accept all cookies</button></div>"
+        "<script>var x = 1;</script><style>body{}</style>"
+    )
+    footer = "<aside>Related links</aside><footer>Footer <a>Sign in</a></footer>"
+    pages = []
+    for _ in range(n):
+        body = "".join(para(rng.randint(40, 120)) for _ in range(rng.randint(10, 40)))
+        pages.append(f"<html><head><title>t</title></head><body>{chrome}<main><h1>Title</h1>{body}</main>{footer}</body></html>")
+    return pages
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", default="bench/html", help="directory of *.html pages")
+    ap.add_argument("--fetch", type=int, default=0, help="download N pages from item links into --corpus first")
+    ap.add_argument("--n", type=int, default=200, help="synthetic pages if the corpus is empty")
+    ap.add_argument("--parsers", default="html.parser,lxml")
+    ap.add_argument("--workers", default="0,2,4", help="comma-separated worker counts (0 = inline)")
+    args = ap.parse_args()
+
+    corpus = Path(args.corpus)
+    if args.fetch:
+        print(f"[bench] saved {fetch_corpus(corpus, args.fetch)} pages to {corpus}")
+    pages = [p.read_text(encoding="utf-8", errors="replace") for p in sorted(corpus.glob("*.html"))] if corpus.is_dir() else []
+    source = str(corpus)
+    if not pages:
+        pages, source = synthetic_corpus(args.n), "synthetic"
+    total_kb = sum(len(p) for p in pages) // 1024
+    print(f"[bench] {len(pages)} pages ({total_kb} KB) from {source}; {os.cpu_count()} CPUs")
+
+    baseline = CleanPool(workers=0, parser="html.parser").map(pages)
+    for parser in [p.strip() for p in args.parsers.split(",") if p.strip()]:
+        for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+            pool = CleanPool(workers=workers, parser=parser, inline_bytes=0)
+            try:
+                if workers:
+                    pool.map(pages[:workers])  # start the processes outside the timing
+                t = time.perf_counter()
+                out = pool.map(pages)
+                elapsed = time.perf_counter() - t
+            finally:
+                pool.shutdown()
+            diff = sum(1 for a, b in zip(out, baseline) if a != b)
+            print(f"[bench] {pool.parser:12s} workers={workers}  {elapsed * 1000:8.1f} ms  "
+                  f"({elapsed * 1000 / len(pages):5.2f} ms/page)  differs from html.parser: {diff}")
+
+
+if __name__ == "__main__":
+    main()
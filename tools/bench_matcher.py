@@ -0,0 +1,145 @@
+# tools/bench_matcher.py
+"""
+Micro-benchmark: compiled scraper.matcher vs the old per-pattern loops.
+
+Runs both over the same texts, checks they agree, and prints timings.
+Texts come from the items table (DB_PATH) when it has rows, otherwise a
+synthetic corpus built from the rule words is used.
+
+Usage:
+    python -m tools.bench_matcher [--n 2000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sqlite3
+import time
+
+from scraper import matcher
+from scraper.ofgem import FILTERS, SOURCE_FILTER, TOPIC_MATCHER, TOPIC_RULES
+from summariser.model import RULES, _RULES_MATCHER
+
+
+# --- the previous implementations, kept verbatim for comparison ----------------
+def _legacy_match(pattern: str, blob: str) -> bool:
+    if pattern.startswith("re:") or pattern.startswith("re:".upper()):
+        pat = pattern.split(":", 1)[1]
+        try:
+            return re.search(pat, blob, flags=re.IGNORECASE) is not None
+        except re.error:
+            return False
+    return pattern.lower() in blob
+
+
+def legacy_passes_filters(source: str, title: str, body: str) -> bool:
+    cfg = FILTERS.get(source, {})
+    inc = cfg.get("include") or []
+    exc = cfg.get("exclude") or []
+    blob = f"{title}\n{body}".lower()
+    if inc and not any(_legacy_match(p, blob) for p in inc):
+        return False
+    if exc and any(_legacy_match(p, blob) for p in exc):
+        return False
+    return True
+
+
+def legacy_topic_tags(title: str, content: str) -> list[str]:
+    blob = f"{title or ''}\n{content or ''}".lower()
+    hit = []
+    for tag, patterns in TOPIC_RULES.items():
+        for pat in patterns:
+            if pat.startswith(r"\b") or any(ch in pat for ch in r"[]()?*+{}|\b"):
+                try:
+                    if re.search(pat, blob, flags=re.IGNORECASE):
+                        hit.append(tag)
+                        break
+                except Exception:
+                    continue
+            else:
+                if pat.lower() in blob:
+                    hit.append(tag)
+                    break
+    return list(dict.fromkeys(hit))
+
+
+def legacy_heuristic_tags(text: str, title: str = "") -> list[str]:
+    blob = f"{title}\n{text}".lower()
+    return sorted(tag for tag, needles in RULES.items() if any(n in blob for n in needles))
+
+
+# --- corpus -----------------------------------------------------------------------
+def _db_corpus(n: int) -> list[tuple[str, str, str]]:
+    path = os.getenv("DB_PATH", "ofgem.db")
+    if not os.path.exists(path):
+        return []
+    try:
+        with sqlite3.connect(path) as conn:
+            rows = conn.execute(
+                "SELECT source, title, COALESCE(content, summary, '') FROM items ORDER BY published_at DESC LIMIT ?",
+                (n,),
+            ).fetchall()
+    except sqlite3.Error:
+        return []
+    return [(s or "", t or "", c or "") for s, t, c in rows]
+
+
+def _synthetic_corpus(n: int) -> list[tuple[str, str, str]]:
+    rng = random.Random(42)
+    words = [p.replace("re:", "") for cfg in FILTERS.values() for p in cfg.get("include", [])]
+    words += [p for pats in TOPIC_RULES.values() for p in pats if not matcher.sniffed_regex(p)]
+    filler = ("the of and to energy network update notice market licence holders published "
+              "today following review stakeholders 2024 operators").split()
+    sources = list(FILTERS) + [s.lower() for s in FILTERS]
+    out = []
+    for _ in range(n):
+        body = " ".join(rng.choice(filler) if rng.random() > 0.03 else rng.choice(words) for _ in range(400))
+        title = " ".join(rng.choice(filler + words) for _ in range(8)).title()
+        out.append((rng.choice(sources), title, body))
+    return out
+
+
+def _time(fn, corpus, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for src, title, body in corpus:
+            fn(src, title, body)
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=2000, help="number of texts")
+    ap.add_argument("--repeat", type=int, default=5, help="best-of repeats")
+    args = ap.parse_args()
+
+    corpus = _db_corpus(args.n) or _synthetic_corpus(args.n)
+    print(f"[bench] {len(corpus)} texts, avg {sum(len(b) for _, _, b in corpus) // max(1, len(corpus))} chars")
+
+    def legacy(src, title, body):
+        return (legacy_passes_filters(src, title, body), legacy_topic_tags(title, body),
+                legacy_heuristic_tags(body, title))
+
+    def compiled(src, title, body):
+        blob = matcher.text_blob(title, body)
+        return (SOURCE_FILTER.passes(src, blob), TOPIC_MATCHER.tags(blob),
+                sorted(_RULES_MATCHER.tags(blob)))
+
+    mismatches = sum(1 for src, title, body in corpus if legacy(src, title, body) != compiled(src, title, body))
+    print(f"[bench] mismatches: {mismatches}")
+
+    t_old = _time(legacy, corpus, args.repeat)
+    t_new = _time(compiled, corpus, args.repeat)
+    per = 1e6 / max(1, len(corpus))
+    print(f"[bench] legacy   {t_old * 1000:8.1f} ms  ({t_old * per:6.1f} µs/text)")
+    print(f"[bench] compiled {t_new * 1000:8.1f} ms  ({t_new * per:6.1f} µs/text)")
+    print(f"[bench] speed-up x{t_old / t_new:.1f}" if t_new else "")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,168 @@
 # tools/export_json.py
-import json, pathlib
-from storage.db import DB
-
-def main():
-    db = DB("ofgem.db")
-    items = db.list_items(limit=5000)  # export plenty
-    # Optional: slim fields
-    keep = {"title","link","published_at","summary","tags","guid","source"}
-    items = [{k:v for k,v in it.items() if k in keep} for it in items]
-    out = pathlib.Path("public")
-    out.mkdir(exist_ok=True)
-    (out / "items.json").write_text(json.dumps(items, indent=2), encoding="utf-8")
-    print(f"Wrote {len(items)} items to public/items.json")
+"""
+Export items as static JSON for the data branch.
+
+    public/items.json            latest EXPORT_LEGACY_LIMIT items (for /items.json and old clients)
+    public/items/YYYY-MM.json    every item, partitioned by (UTC) month published
+    public/items/manifest.json   shard list with item counts, bytes and sha256
+
+Output is compact JSON. Shards are sorted newest first and only rewritten
+when their content hash changes, so a daily run touches only the current
+month (plus any month whose items were re-scraped or summarised). Clients
+fetch the manifest and then only the shards whose sha256 they don't have.
+
+Settings:
+- EXPORT_DIR: output directory (default "public").
+- EXPORT_GZIP=1 (or --gzip): write shards as YYYY-MM.json.gz.
+- EXPORT_LEGACY_LIMIT: items in public/items.json (default 5000, 0 = skip).
+
+Usage:
+    PYTHONPATH=. python tools/export_json.py [--out public] [--gzip] [--full]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from storage.db import DB, connect
+
+DB_PATH = os.getenv("DB_PATH", "ofgem.db")
+EXPORT_DIR = os.getenv("EXPORT_DIR", "public")
+EXPORT_GZIP = os.getenv("EXPORT_GZIP", "0").lower() in ("1", "true", "yes")
+LEGACY_LIMIT = int(os.getenv("EXPORT_LEGACY_LIMIT", "5000"))
+
+FIELDS = ("title", "link", "published_at", "summary", "tags", "guid", "source")
+MANIFEST_VERSION = 1
+UNDATED = "undated"
+
+
+def _dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def month_of(published_ts: Optional[int]) -> str:
+    """UTC YYYY-MM of an item's published_ts (0 = unknown date)."""
+    if not published_ts:
+        return UNDATED
+    return datetime.fromtimestamp(int(published_ts), timezone.utc).strftime("%Y-%m")
+
+
+def iter_items(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(month, item) for all items (export fields only), newest first, straight off the cursor."""
+    conn = connect(path)
+    try:
+        with closing(conn.execute(
+            f"SELECT published_ts, {', '.join(FIELDS)} FROM items ORDER BY published_ts DESC, guid DESC"
+        )) as cur:
+            for row in cur:
+                d = dict(zip(FIELDS, row[1:]))
+                d["tags"] = list(dict.fromkeys(DB._load_tags(d.get("tags"))))
+                yield month_of(row[0]), d
+    finally:
+        conn.close()
+
+
+def encode_shard(items: List[Dict[str, Any]], use_gzip: bool) -> bytes:
+    raw = _dumps(items)
+    # mtime=0 keeps the bytes (and so the hash) stable for unchanged shards
+    return gzip.compress(raw, compresslevel=9, mtime=0) if use_gzip else raw
+
+
+def load_manifest(path: pathlib.Path) -> Dict[str, Any]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") == MANIFEST_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def export(out: pathlib.Path, use_gzip: bool = EXPORT_GZIP, full: bool = False,
+           db_path: str = DB_PATH, legacy_limit: int = LEGACY_LIMIT) -> Dict[str, int]:
+    """Write changed shards, the manifest and items.json. Returns counts."""
+    shard_dir = out / "items"
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = shard_dir / "manifest.json"
+    old = {s["month"]: s for s in load_manifest(manifest_path).get("shards", [])}
+
+    by_month: Dict[str, List[Dict[str, Any]]] = {}
+    legacy: List[Dict[str, Any]] = []
+    for month, item in iter_items(db_path):
+        by_month.setdefault(month, []).append(item)
+        if len(legacy) < legacy_limit:
+            legacy.append(item)
+
+    stats = {"items": 0, "shards": 0, "written": 0, "unchanged": 0, "removed": 0}
+    shards: List[Dict[str, Any]] = []
+    suffix = ".json.gz" if use_gzip else ".json"
+    for month in sorted(by_month, key=lambda m: (m != UNDATED, m), reverse=True):
+        items = by_month[month]
+        blob = encode_shard(items, use_gzip)
+        digest = hashlib.sha256(blob).hexdigest()
+        name = f"{month}{suffix}"
+        prev = old.get(month)
+        if (not full and prev and prev.get("sha256") == digest and prev.get("path") == name
+                and (shard_dir / name).exists()):
+            stats["unchanged"] += 1
+        else:
+            tmp = shard_dir / (name + ".tmp")
+            tmp.write_bytes(blob)
+            tmp.replace(shard_dir / name)
+            stats["written"] += 1
+        shards.append({"month": month, "path": name, "count": len(items), "bytes": len(blob), "sha256": digest})
+        stats["items"] += len(items)
+    stats["shards"] = len(shards)
+
+    # Shards of months that are gone, or left over from the other compression setting
+    keep = {s["path"] for s in shards}
+    for prev in old.values():
+        stale = shard_dir / prev.get("path", "")
+        if prev.get("path") and prev["path"] not in keep and stale.is_file():
+            stale.unlink()
+            stats["removed"] += 1
+
+    if stats["written"] or stats["removed"] or not manifest_path.exists() or full:
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "fields": list(FIELDS),
+            "compression": "gzip" if use_gzip else None,
+            "items": stats["items"],
+            "shards": shards,
+        }
+        manifest_path.write_bytes(_dumps(manifest))
+
+    if legacy_limit > 0:
+        (out / "items.json").write_bytes(_dumps(legacy))
+    return stats
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--out", default=EXPORT_DIR, help="output directory (default: EXPORT_DIR or public)")
+    ap.add_argument("--gzip", action="store_true", default=EXPORT_GZIP, help="gzip the monthly shards")
+    ap.add_argument("--full", action="store_true", help="rewrite every shard even if unchanged")
+    args = ap.parse_args()
+
+    DB(DB_PATH)  # make sure the schema is current
+    out = pathlib.Path(args.out)
+    stats = export(out, use_gzip=args.gzip, full=args.full)
+    print(
+        f"Exported {stats['items']} items in {stats['shards']} monthly shards to {out / 'items'} "
+        f"({stats['written']} written, {stats['unchanged']} unchanged, {stats['removed']} removed)"
+    )
+    if LEGACY_LIMIT > 0:
+        print(f"Wrote latest {min(stats['items'], LEGACY_LIMIT)} items to {out / 'items.json'}")
+
 
 if __name__ == "__main__":
     main()
@@ -1,21 +1,44 @@
 # tools/link_controls.py
+import argparse
+import time
+
 from storage.db import DB
 
 def main():
+    parser = argparse.ArgumentParser(description="Link stored items to framework controls")
+    parser.add_argument("--limit", type=int, default=None, help="Only the N most recent items (default: all)")
+    parser.add_argument("--min-relevance", type=float, default=0.25)
+    parser.add_argument("--quiet", action="store_true", help="Don't print a line per linked item")
+    parser.add_argument("--full", action="store_true",
+                        help="Relink every item, not just those whose text or the controls changed")
+    args = parser.parse_args()
+
     db = DB("ofgem.db")
-    items = db.list_items(limit=20000)
+    started = time.perf_counter()
+    stats: dict = {}
+    # Unless --full, only items never linked or changed since their last link are loaded
+    items = db.items_for_linking(
+        limit=args.limit, only_changed=not args.full, min_relevance=args.min_relevance, stats=stats
+    )
     if not items:
-        print("No items found.")
+        print(f"Nothing to relink ({stats.get('unchanged', 0)} unchanged)." if stats else "No items found.")
         return
 
-    linked = 0
-    for it in items:
-        res = db.relink_item_controls(it, min_relevance=0.25)
-        if res:
-            linked += 1
-            print(f"[{it['guid'][:8]}] {it.get('title','')[:60]} -> {', '.join(f'{r}:{s:.2f}' for r,s in res)}")
+    results = db.relink_items_controls(
+        items, min_relevance=args.min_relevance, only_changed=not args.full, stats=stats
+    )
+    elapsed = time.perf_counter() - started
+
+    if not args.quiet:
+        for it in items:
+            res = results.get(it["guid"])
+            if res:
+                print(f"[{it['guid'][:8]}] {it.get('title','')[:60]} -> {', '.join(f'{r}:{s:.2f}' for r,s in res)}")
 
-    print(f"✅ linked {linked}/{len(items)} items")
+    print(
+        f"✅ relinked {stats['relinked']} items ({len(results)} with links), "
+        f"{stats['unchanged']} unchanged, in {elapsed:.1f}s"
+    )
 
 if __name__ == "__main__":
     main()
@@ -5,19 +5,19 @@ import os
 import sqlite3
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-# App/DB wrapper (if present)
-from storage.db import DB
+from storage import summary_cache
+from storage.db import bump_data_version, connect as db_connect
 
 # AI / PDF helpers
 from tools.ai_utils import (
     clean_extracted_text,
     is_pdf_link,
-    fetch_pdf_bytes,
-    pdf_to_text,
+    fetch_pdf_text,
     generate_ai_summary,
 )
+from tools.ai_pipeline import BATCH, MAX_MINUTES, RPM, WORKERS, RateLimiter, run_bounded
 
 # ------------------------------------------------------------------------------
 # Config
@@ -26,6 +26,8 @@ DB_PATH = os.getenv("DB_PATH", "ofgem.db")
 DAYS_BACK = int(os.getenv("PRECOMPUTE_DAYS_BACK", "365"))
 LIMIT_WORDS = int(os.getenv("PRECOMPUTE_LIMIT_WORDS", "100"))
 ONLY_EMPTY = os.getenv("PRECOMPUTE_ONLY_EMPTY", "1") == "1"  # skip rows already summarised
+MAX_ROWS = int(os.getenv("PRECOMPUTE_MAX_ROWS", "20000"))
+# Workers / rate / commit batch / time budget: see tools/ai_pipeline.py
 
 # ------------------------------------------------------------------------------
 # Small helpers
@@ -85,9 +87,8 @@ def ensure_min_schema(conn: sqlite3.Connection, table: str) -> None:
     })
 
 def connect(db_path: str) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+    # Shared pragmas (WAL, busy_timeout) so the API can keep reading meanwhile
+    return db_connect(db_path)
 
 def choose_table(conn: sqlite3.Connection) -> str:
     if has_table(conn, "items"):
@@ -122,32 +123,84 @@ def is_recent(published_at: Optional[str]) -> bool:
 # ------------------------------------------------------------------------------
 # Data access
 # ------------------------------------------------------------------------------
-def fetch_rows(conn: sqlite3.Connection, table: str) -> Iterable[Any]:
-    """Use DB.list_items() if available; otherwise SELECT from the table."""
-    db = DB(DB_PATH)
-    if hasattr(db, "list_items"):
-        # list_items returns dict-like rows
-        for it in db.list_items(limit=20000):
-            yield it
-        return
-
-    # Fallback: generic SELECT
+def fetch_rows(conn: sqlite3.Connection, table: str) -> List[Any]:
+    """
+    Rows to summarise, newest first. With ONLY_EMPTY the filter runs in SQL,
+    so a resumed run only reads what is still missing.
+    """
     cols = table_columns(conn, table)
     wanted = [c for c in ("id", "guid", "title", "content", "summary", "link", "published_at", "ai_summary") if c in cols]
-    sql = f"SELECT {', '.join(wanted)} FROM {table}"
-    for r in conn.execute(sql):
-        yield r
-
-def update_summary(conn: sqlite3.Connection, table: str, pk_col: str, pk_val: Any, summary: str) -> None:
-    conn.execute(
-        f"""
-        UPDATE {table}
-           SET ai_summary = ?,
-               ai_summary_updated_at = ?
-         WHERE {pk_col} = ?
-        """,
-        (summary, utc_now().isoformat(), pk_val),
-    )
+    where = ""
+    if ONLY_EMPTY and "ai_summary" in cols:
+        where = "WHERE ai_summary IS NULL OR TRIM(ai_summary) = ''"
+    if "published_ts" in cols:
+        order = "ORDER BY published_ts DESC"
+    else:
+        order = "ORDER BY published_at DESC" if "published_at" in cols else ""
+    sql = f"SELECT {', '.join(wanted)} FROM {table} {where} {order} LIMIT ?"
+    return conn.execute(sql, (MAX_ROWS,)).fetchall()
+
+def write_summaries(conn: sqlite3.Connection, table: str, pk_col: str, batch: List[Tuple[Any, str]]) -> None:
+    """One transaction per batch: a checkpoint an interrupted run resumes from."""
+    if not batch:
+        return
+    now = utc_now().isoformat()
+    with conn:
+        conn.executemany(
+            f"""
+            UPDATE {table}
+               SET ai_summary = ?,
+                   ai_summary_updated_at = ?
+             WHERE {pk_col} = ?
+            """,
+            [(summary, now, pk_val) for pk_val, summary in batch],
+        )
+        bump_data_version(conn)
+
+# ------------------------------------------------------------------------------
+# Per-row work (runs on a worker thread; no DB access here)
+# ------------------------------------------------------------------------------
+def row_key(row: Any, pk_col: str) -> Any:
+    if pk_col == "guid":
+        return rget(row, "guid") or rget(row, "link")
+    return rget(row, "id")
+
+def row_text(row: Any) -> Tuple[str, str]:
+    """(title, cleaned text) to summarise; text is "" when there is nothing usable."""
+    title = (rget(row, "title") or "").strip()
+    link = (rget(row, "link") or "").strip()
+
+    text = (rget(row, "content") or rget(row, "summary") or "").strip()
+    if not text and link and is_pdf_link(link):
+        try:
+            # Cached per URL / content hash: reruns don't download or parse it again
+            text = fetch_pdf_text(link, db_path=DB_PATH)
+        except Exception:
+            pass
+
+    return title, clean_extracted_text(title, text) or ""
+
+def pending_rows(conn: sqlite3.Connection, table: str, pk_col: str) -> List[Any]:
+    """Rows that still need a summary (ONLY_EMPTY / DAYS_BACK / MAX_ROWS)."""
+    have_ai_summary = has_column(conn, table, "ai_summary")
+    todo = []
+    for row in fetch_rows(conn, table):
+        if ONLY_EMPTY and have_ai_summary and rget(row, "ai_summary"):
+            continue
+        if not is_recent(rget(row, "published_at")):
+            continue
+        if row_key(row, pk_col) in (None, ""):
+            continue
+        todo.append(row)
+    return todo
+
+def summarise_row(row: Any, limiter: RateLimiter) -> Optional[str]:
+    title, text = row_text(row)
+    if not text:
+        return None
+
+    # strict: after retries an API error leaves the row empty for the next run
+    return generate_ai_summary(title, text, limit_words=LIMIT_WORDS, limiter=limiter, strict=True)
 
 # ------------------------------------------------------------------------------
 # Main
@@ -162,51 +215,40 @@ def main() -> None:
         conn.commit()
 
         pk_col = primary_key_for_update(conn, table)
-        have_ai_summary = has_column(conn, table, "ai_summary")
-
-        updated = 0
-
-        for row in fetch_rows(conn, table):
-            # Skip if ONLY_EMPTY and already has a summary
-            if ONLY_EMPTY and have_ai_summary and rget(row, "ai_summary"):
-                continue
-
-            if not is_recent(rget(row, "published_at")):
-                continue
+        todo = pending_rows(conn, table, pk_col)
 
-            title = (rget(row, "title") or "").strip()
-            link = (rget(row, "link") or "").strip()
+        print(f"🧮 {len(todo)} rows to summarise "
+              f"(workers={WORKERS}, rpm={RPM:g}, batch={BATCH}, budget={MAX_MINUTES:g} min)")
 
-            text = (rget(row, "content") or rget(row, "summary") or "").strip()
-            if not text and link and is_pdf_link(link):
-                try:
-                    blob = fetch_pdf_bytes(link)
-                    text = pdf_to_text(blob, max_pages=8)
-                except Exception:
-                    pass
+        limiter = RateLimiter(RPM)
+        stats = {"updated": 0, "skipped": 0, "failed": 0}
+        pending: List[Tuple[Any, str]] = []
 
-            text = clean_extracted_text(title, text)
-            if not text:
-                continue
-
-            summary = generate_ai_summary(title, text, limit_words=LIMIT_WORDS)
-
-            # Determine key to update by
-            if pk_col == "guid":
-                pk_val = rget(row, "guid") or rget(row, "link")
-                if not pk_val:
+        try:
+            for row, summary, err in run_bounded(lambda r: summarise_row(r, limiter), todo):
+                title = (rget(row, "title") or "").strip()
+                if err is not None:
+                    stats["failed"] += 1
+                    print(f"⚠️ failed: {title[:80]!r}: {err}")
                     continue
-            else:
-                pk_val = rget(row, "id")
-                if pk_val is None:
+                if not summary:
+                    stats["skipped"] += 1
                     continue
 
-            update_summary(conn, table, pk_col, pk_val, summary)
-            updated += 1
-            print(f"📦 cached: {title[:80]!r}")
-
-        conn.commit()
-        print(f"✅ done: {updated} summaries cached.")
+                pending.append((row_key(row, pk_col), summary))
+                stats["updated"] += 1
+                print(f"📦 cached: {title[:80]!r}")
+                if len(pending) >= BATCH:
+                    write_summaries(conn, table, pk_col, pending)
+                    pending = []
+        finally:
+            # Keep whatever finished, even on Ctrl-C / CI timeout
+            write_summaries(conn, table, pk_col, pending)
+
+        left = len(todo) - sum(stats.values())
+        print(f"✅ done: {stats['updated']} summaries cached, {stats['skipped']} without text, "
+              f"{stats['failed']} failed" + (f", {left} left for the next run" if left > 0 else "") + ".")
+        print(f"♻️ summary cache: {summary_cache.stats()}")
 
     finally:
         conn.close()